@@ -1,25 +1,207 @@
 """Analytics Agent - Generates adherence metrics and summaries"""
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+from collections import deque
+from datetime import date, datetime
+import heapq
+import itertools
+import threading
+import numpy as np
 from ..tools.persistence import MemoryBank
+from ..tools.cohort import compute_cohort_metrics, parse_age_band
+from ..tools.summary_cache import SummaryCache
 from ..tools.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Symptoms listed in a summary
+RECENT_SYMPTOMS = 5
+
+# Rolling adherence windows, in days
+ADHERENCE_WINDOWS = (7, 30, 90)
+
+
+# Risk score weights: missed-dose percentage points, recent high/critical
+# symptoms, and detected interactions (capped)
+RISK_WEIGHTS = {"non_adherence": 1.0, "high": 15.0, "critical": 30.0, "interaction": 10.0}
+RISK_MAX_INTERACTIONS = 3
+
+
+def _event_day(event: Dict[str, Any]) -> Optional[int]:
+    """Calendar day (date ordinal) of an event's timestamp, or None if it has none"""
+    timestamp = event.get("timestamp")
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        return datetime.fromisoformat(timestamp).date().toordinal()
+    except ValueError:
+        return None
+
+
+def _rate(scheduled: int, taken: int) -> Optional[float]:
+    """Adherence percentage, or None when no doses were scheduled"""
+    return round(taken / scheduled * 100, 1) if scheduled > 0 else None
+
+
+class PatientStats:
+    """Running aggregates of one patient's events"""
+    
+    __slots__ = (
+        "events", "scheduled", "taken", "high_severity", "recent_symptoms", "interactions",
+        "daily", "medication_daily"
+    )
+    
+    def __init__(self):
+        self.events = 0
+        self.scheduled = 0
+        self.taken = 0
+        self.high_severity = False
+        self.recent_symptoms: deque = deque(maxlen=RECENT_SYMPTOMS)
+        self.interactions: List[Any] = []
+        # day ordinal -> [scheduled, taken], overall and per medication
+        self.daily: Dict[int, List[int]] = {}
+        self.medication_daily: Dict[str, Dict[int, List[int]]] = {}
+    
+    def add(self, event: Dict[str, Any]) -> None:
+        """Fold one event into the aggregates"""
+        self.events += 1
+        event_type = event.get("type")
+        if event_type == "dose":
+            scheduled = 1 if event.get("scheduled") else 0
+            taken = 1 if event.get("taken") else 0
+            self.scheduled += scheduled
+            self.taken += taken
+            day = _event_day(event)
+            if day is not None:
+                buckets = [self.daily]
+                medication = event.get("medication")
+                if medication is not None:
+                    buckets.append(self.medication_daily.setdefault(medication, {}))
+                for daily in buckets:
+                    bucket = daily.get(day)
+                    if bucket is None:
+                        bucket = daily[day] = [0, 0]
+                    bucket[0] += scheduled
+                    bucket[1] += taken
+        elif event_type == "symptom":
+            self.recent_symptoms.append(dict(event))
+            if event.get("triage_level") in ["high", "critical"]:
+                self.high_severity = True
+        elif event_type == "interaction":
+            self.interactions.append(event.get("interaction"))
+    
+    @property
+    def adherence_rate(self) -> float:
+        """Taken doses as a percentage of scheduled doses"""
+        return (self.taken / self.scheduled * 100) if self.scheduled > 0 else 100.0
+    
+    def recent_severe(self) -> Dict[str, int]:
+        """High and critical triage levels among the recent symptoms"""
+        counts = {"high": 0, "critical": 0}
+        for symptom in self.recent_symptoms:
+            level = symptom.get("triage_level")
+            if level in counts:
+                counts[level] += 1
+        return counts
+    
+    def risk_score(self) -> float:
+        """Combined risk from adherence, recent severe symptoms and interactions"""
+        severe = self.recent_severe()
+        score = (100.0 - self.adherence_rate) * RISK_WEIGHTS["non_adherence"]
+        score += severe["high"] * RISK_WEIGHTS["high"] + severe["critical"] * RISK_WEIGHTS["critical"]
+        score += min(len(self.interactions), RISK_MAX_INTERACTIONS) * RISK_WEIGHTS["interaction"]
+        return round(score, 1)
+
+
+def _adherence_trend(
+    daily: Dict[int, List[int]],
+    as_of: int,
+    days: int,
+    windows: Tuple[int, ...]
+) -> Dict[str, Any]:
+    """
+    Rolling-window rates and a daily series from per-day buckets
+    
+    Walks back from as_of once, over max(days, windows) buckets, so the cost
+    does not depend on how long the history is.
+    """
+    span = max((days,) + tuple(windows))
+    series = []
+    window_totals = {window: [0, 0] for window in windows}
+    for offset in range(span):
+        scheduled, taken = daily.get(as_of - offset, (0, 0))
+        for window, totals in window_totals.items():
+            if offset < window:
+                totals[0] += scheduled
+                totals[1] += taken
+        if offset < days:
+            series.append({
+                "date": date.fromordinal(as_of - offset).isoformat(),
+                "scheduled": scheduled,
+                "taken": taken,
+                "adherence_rate": _rate(scheduled, taken)
+            })
+    series.reverse()
+    return {
+        "windows": {
+            f"{window}d": {"scheduled": s, "taken": t, "adherence_rate": _rate(s, t)}
+            for window, (s, t) in window_totals.items()
+        },
+        "daily": series
+    }
+
 
 class AnalyticsAgent:
     """Agent that computes adherence metrics and generates summaries"""
     
     def __init__(self, memory_bank: MemoryBank):
         self.memory = memory_bank
+        # Aggregates are updated as events are added, so summaries do not
+        # depend on the length of a patient's history
+        self._stats: Dict[str, PatientStats] = {}
+        self._event_count = 0
+        self._lock = threading.Lock()
+        self.summary_cache = SummaryCache()
+        # Max-heap of (-risk score, entry id, patient_id) with lazy invalidation:
+        # an entry is live only while its id is the patient's latest. Patients
+        # with new events are re-scored when the queue is next read.
+        self._risk_heap: List[Tuple[float, int, str]] = []
+        self._risk_entry: Dict[str, int] = {}
+        self._risk_dirty: set = set()
+        self._entry_ids = itertools.count()
+        self.memory.add_listener(self._on_event)
         logger.info("AnalyticsAgent initialized")
     
+    def _on_event(self, event: Optional[Dict[str, Any]]) -> None:
+        """MemoryBank listener; None means the history is about to be replayed"""
+        with self._lock:
+            if event is None:
+                self._stats.clear()
+                self._event_count = 0
+                self._risk_heap.clear()
+                self._risk_entry.clear()
+                self._risk_dirty.clear()
+                return
+            patient_id = event.get("patient_id")
+            stats = self._stats.get(patient_id)
+            if stats is None:
+                stats = self._stats[patient_id] = PatientStats()
+            stats.add(event)
+            self._event_count += 1
+            self._risk_dirty.add(patient_id)
+    
+    def total_events(self) -> int:
+        """Number of events stored, from the running aggregates"""
+        self.memory.refresh()
+        with self._lock:
+            return self._event_count
+    
     def generate_summary(self, patient_id: str) -> Dict[str, Any]:
         """
         Generate comprehensive summary for clinician
         
         Args:
             patient_id: Patient identifier
-            
+        
         Returns:
             Summary dictionary with metrics and insights
         """
@@ -27,29 +209,21 @@ class AnalyticsAgent:
         if not patient:
             return {"error": f"Patient {patient_id} not found"}
         
-        events = self.memory.get_patient_events(patient_id)
-        
-        # Calculate adherence metrics
-        dose_events = [e for e in events if e.get("type") == "dose"]
-        total_doses = len([e for e in dose_events if e.get("scheduled")])
-        taken_doses = len([e for e in dose_events if e.get("taken")])
+        with self._lock:
+            stats = self._stats.get(patient_id) or PatientStats()
+            total_doses = stats.scheduled
+            taken_doses = stats.taken
+            adherence_rate = stats.adherence_rate
+            high_severity = stats.high_severity
+            recent_symptoms = [dict(e) for e in stats.recent_symptoms]
+            interactions_detected = list(stats.interactions)
         missed_doses = total_doses - taken_doses
         
-        adherence_rate = (taken_doses / total_doses * 100) if total_doses > 0 else 100.0
-        
-        # Get symptoms
-        symptom_events = [e for e in events if e.get("type") == "symptom"]
-        recent_symptoms = symptom_events[-5:] if symptom_events else []
-        
-        # Get interactions
-        interaction_events = [e for e in events if e.get("type") == "interaction"]
-        interactions_detected = [e.get("interaction") for e in interaction_events]
-        
         # Generate alerts
         alerts = []
         if adherence_rate < 80:
             alerts.append(f"Low adherence rate: {adherence_rate:.1f}%")
-        if any(s.get("triage_level") in ["high", "critical"] for s in symptom_events):
+        if high_severity:
             alerts.append("High severity symptoms reported")
         if interactions_detected:
             alerts.append(f"{len(interactions_detected)} medication interactions detected")
@@ -70,7 +244,229 @@ class AnalyticsAgent:
         logger.info(f"Generated summary for {patient_id}: {adherence_rate:.1f}% adherence")
         return summary
     
+    def get_summary(self, patient_id: str, version: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Summary served from the cache while the patient's data is unchanged
+        
+        Args:
+            patient_id: Patient identifier
+            version: Data version already read by the caller (default: read it)
+        
+        Returns:
+            (data version, summary); the summary is shared and must not be modified
+        """
+        if version is None:
+            version = self.memory.data_version(patient_id)
+        summary = self.summary_cache.get(patient_id, version)
+        if summary is None:
+            summary = self.generate_summary(patient_id)
+            if "error" not in summary:
+                self.summary_cache.put(patient_id, version, summary)
+        return version, summary
+    
     def calculate_adherence(self, patient_id: str) -> float:
         """Calculate simple adherence percentage"""
-        summary = self.generate_summary(patient_id)
-        return summary.get("adherence_rate", 0.0)
+        if not self.memory.get_patient(patient_id):
+            return 0.0
+        with self._lock:
+            stats = self._stats.get(patient_id)
+            return round(stats.adherence_rate, 1) if stats else 100.0
+    
+    def generate_cohort_summary(
+        self,
+        medication: Optional[str] = None,
+        age_band: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Adherence metrics across all patients
+        
+        Args:
+            medication: Only include patients taking this medication (case-insensitive)
+            age_band: Only include patients in this age band, e.g. "40-64" or "65+"
+        
+        Returns:
+            Cohort metrics with per-patient rows and population aggregates
+        """
+        low_age, high_age = parse_age_band(age_band) if age_band else (None, None)
+        wanted = medication.strip().lower() if medication else None
+        
+        cohort = []
+        for patient in self.memory.get_all_patients():
+            if wanted is not None and not any(
+                str(med.get("name", "")).lower() == wanted for med in patient.get("medications", [])
+            ):
+                continue
+            if low_age is not None:
+                age = patient.get("age")
+                if age is None or age < low_age or (high_age is not None and age > high_age):
+                    continue
+            cohort.append(patient["patient_id"])
+        
+        with self._lock:
+            stats = [self._stats.get(patient_id) or PatientStats() for patient_id in cohort]
+            count = len(stats)
+            scheduled = np.fromiter((s.scheduled for s in stats), dtype=np.int64, count=count)
+            taken = np.fromiter((s.taken for s in stats), dtype=np.int64, count=count)
+            high_severity = np.fromiter((s.high_severity for s in stats), dtype=bool, count=count)
+            interactions = np.fromiter((len(s.interactions) for s in stats), dtype=np.int64, count=count)
+            events = sum(s.events for s in stats)
+        
+        result = compute_cohort_metrics(cohort, scheduled, taken, high_severity, interactions)
+        result["aggregate"]["total_events"] = events
+        result["filters"] = {"medication": medication, "age_band": age_band}
+        logger.info(f"Generated cohort summary for {count} patients")
+        return result
+    
+    def rolling_adherence(
+        self,
+        patient_id: str,
+        as_of: Optional[date] = None,
+        medication: Optional[str] = None,
+        windows: Tuple[int, ...] = ADHERENCE_WINDOWS
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Adherence over the last N days for each window
+        
+        Args:
+            patient_id: Patient identifier
+            as_of: Last day of every window (default: today)
+            medication: Only count doses of this medication
+            windows: Window lengths in days
+        
+        Returns:
+            {"7d": {"scheduled", "taken", "adherence_rate"}, ...}; the rate is
+            None for windows without scheduled doses
+        """
+        return self.adherence_trend(patient_id, days=0, as_of=as_of, medication=medication,
+                                    windows=windows)["windows"]
+    
+    def daily_adherence(
+        self,
+        patient_id: str,
+        days: int = 30,
+        as_of: Optional[date] = None,
+        medication: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Daily adherence series ending at as_of
+        
+        Args:
+            patient_id: Patient identifier
+            days: Number of days in the series
+            as_of: Last day of the series (default: today)
+            medication: Only count doses of this medication
+        
+        Returns:
+            One {"date", "scheduled", "taken", "adherence_rate"} per day, oldest first
+        """
+        return self.adherence_trend(patient_id, days=days, as_of=as_of, medication=medication,
+                                    windows=())["daily"]
+    
+    def adherence_trend(
+        self,
+        patient_id: str,
+        days: int = 30,
+        as_of: Optional[date] = None,
+        medication: Optional[str] = None,
+        windows: Tuple[int, ...] = ADHERENCE_WINDOWS
+    ) -> Dict[str, Any]:
+        """
+        Rolling-window adherence and daily series, overall or for one medication
+        
+        Returns:
+            {"windows": {...}, "daily": [...]} as in rolling_adherence and daily_adherence
+        """
+        as_of_day = (as_of or date.today()).toordinal()
+        with self._lock:
+            stats = self._stats.get(patient_id)
+            if stats is None:
+                daily: Dict[int, List[int]] = {}
+            elif medication is None:
+                daily = stats.daily
+            else:
+                daily = stats.medication_daily.get(medication, {})
+            return _adherence_trend(daily, as_of_day, days, windows)
+    
+    def adherence_report(
+        self,
+        patient_id: str,
+        days: int = 30,
+        as_of: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Rolling adherence and daily series for a patient and each of their medications
+        
+        Args:
+            patient_id: Patient identifier
+            days: Number of days in the daily series
+            as_of: Last day covered (default: today)
+        
+        Returns:
+            Report with overall and per-medication trends
+        """
+        as_of = as_of or date.today()
+        with self._lock:
+            stats = self._stats.get(patient_id)
+            medications = sorted(stats.medication_daily) if stats else []
+        report = {
+            "patient_id": patient_id,
+            "as_of": as_of.isoformat(),
+            "overall": self.adherence_trend(patient_id, days=days, as_of=as_of),
+            "medications": {
+                medication: self.adherence_trend(patient_id, days=days, as_of=as_of, medication=medication)
+                for medication in medications
+            }
+        }
+        logger.info(f"Generated adherence report for {patient_id} ({len(medications)} medications)")
+        return report
+    
+    def _rescore(self) -> None:
+        """Push fresh heap entries for patients with new events; call with the lock held"""
+        for patient_id in self._risk_dirty:
+            entry = next(self._entry_ids)
+            self._risk_entry[patient_id] = entry
+            heapq.heappush(self._risk_heap, (-self._stats[patient_id].risk_score(), entry, patient_id))
+        self._risk_dirty.clear()
+        # Drop superseded entries once they outnumber the live ones
+        if len(self._risk_heap) > 2 * len(self._risk_entry) + 64:
+            self._risk_heap = [item for item in self._risk_heap if self._risk_entry.get(item[2]) == item[1]]
+            heapq.heapify(self._risk_heap)
+    
+    def top_risk_patients(self, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Patients most in need of attention, highest risk first
+        
+        Args:
+            k: Number of patients
+        
+        Returns:
+            Up to k {"patient_id", "risk_score", "adherence_rate",
+            "recent_high", "recent_critical", "interactions"} entries
+        """
+        # Events written by other workers reach the listener first
+        self.memory.refresh()
+        with self._lock:
+            self._rescore()
+            heap = self._risk_heap
+            live = []
+            while heap and len(live) < k:
+                item = heapq.heappop(heap)
+                if self._risk_entry.get(item[2]) == item[1]:
+                    live.append(item)
+            # Stale entries popped above are simply dropped
+            for item in live:
+                heapq.heappush(heap, item)
+            
+            top = []
+            for neg_score, _, patient_id in live:
+                stats = self._stats[patient_id]
+                severe = stats.recent_severe()
+                top.append({
+                    "patient_id": patient_id,
+                    "risk_score": -neg_score,
+                    "adherence_rate": round(stats.adherence_rate, 1),
+                    "recent_high": severe["high"],
+                    "recent_critical": severe["critical"],
+                    "interactions": len(stats.interactions)
+                })
+        return top
@@ -1,43 +1,227 @@
 """Interaction Agent - Checks medication interactions"""
-from typing import List
-from ..tools.med_db import MedicationDB
+from typing import Dict, Any, List, Set, Tuple
+from collections import Counter, OrderedDict
+import threading
+from ..tools.med_db import get_medication_db
+from ..tools.drug_names import get_drug_normalizer
 from ..tools.logger import get_logger
 
 logger = get_logger(__name__)
 
 
 class InteractionAgent:
-    """Agent that checks for medication interactions"""
+    """
+    Agent that checks for medication interactions
     
-    def __init__(self):
-        self.med_db = MedicationDB()
+    The interacting pairs of a regimen are cached under its fingerprint, the
+    sorted set of canonical drug names, so patients on the same regimen share
+    one check. The LRU holds up to cache_size regimens and is cleared when
+    the MedicationDB version changes (add_interaction).
+    
+    Each checked patient's interacting pairs are also kept, so a medication
+    list change only checks the added drugs against the others and drops
+    the pairs of removed drugs (see update_patient).
+    """
+    
+    def __init__(self, med_db=None, normalizer=None, cache_size: int = 10000):
+        # Shared, hot-reloadable rules unless a database is given
+        self.med_db = med_db or get_medication_db()
+        # Brand, salt and misspelled names are checked as their generic name
+        self.normalizer = normalizer or get_drug_normalizer()
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, ...], List[Tuple[str, str, str]]]" = OrderedDict()
+        self._cache_version = self.med_db.version
+        self._cache_stats = {"hits": 0, "misses": 0}
+        # patient_id -> (rules version, canonical name counts, interacting pairs)
+        self._patients: Dict[str, Tuple[int, Counter, Set[Tuple[str, str, str]]]] = {}
+        self._lock = threading.Lock()
         logger.info("InteractionAgent initialized")
     
+    def _regimen_pairs(self, fingerprint: Tuple[str, ...]) -> List[Tuple[str, str, str]]:
+        """Interacting (drug, drug, warning) pairs of a regimen, cached per rules version"""
+        version = self.med_db.version
+        with self._lock:
+            if version != self._cache_version:
+                self._cache.clear()
+                self._cache_version = version
+            pairs = self._cache.get(fingerprint)
+            if pairs is not None:
+                self._cache.move_to_end(fingerprint)
+                self._cache_stats["hits"] += 1
+                return pairs
+            self._cache_stats["misses"] += 1
+        
+        pairs = [
+            (fingerprint[i], fingerprint[j], warning)
+            for i, j, warning in self.med_db.find_interactions(list(fingerprint))
+        ]
+        with self._lock:
+            # Rules changed while checking: don't cache a stale result
+            if self._cache_version == version:
+                self._cache[fingerprint] = pairs
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return pairs
+    
+    @staticmethod
+    def _warnings(medications: List[str], canonical: List[str], pairs: List[Tuple[str, str, str]]) -> List[str]:
+        """Warnings for a medication list from its regimen's interacting pairs, in list order"""
+        positions: Dict[str, List[int]] = {}
+        for index, name in enumerate(canonical):
+            positions.setdefault(name, []).append(index)
+        found = []
+        for med1, med2, interaction in pairs:
+            for i in positions[med1]:
+                for j in positions[med2]:
+                    found.append((min(i, j), max(i, j), interaction))
+        found.sort()
+        return [f"{medications[i]} + {medications[j]}: {interaction}" for i, j, interaction in found]
+    
+    def interaction_key(self, warning: str) -> Tuple[str, ...]:
+        """
+        Order-independent canonical drug pair of a warning ("A + B: ..."),
+        so the same interaction matches whatever labels the drugs had
+        """
+        names = warning.split(": ", 1)[0].split(" + ")
+        if len(names) != 2:
+            return (warning,)
+        return tuple(sorted(self.normalizer.resolve(name) for name in names))
+    
+    @staticmethod
+    def _pair(med1: str, med2: str, warning: str) -> Tuple[str, str, str]:
+        return (med1, med2, warning) if med1 <= med2 else (med2, med1, warning)
+    
+    def check_patient(self, patient_id: str, medications: List[str]) -> List[str]:
+        """
+        Check a patient's full medication list and keep the result for
+        incremental updates
+        
+        Args:
+            patient_id: Patient identifier
+            medications: List of medication names
+        
+        Returns:
+            List of interaction warnings
+        """
+        version = self.med_db.version
+        canonical = self.normalizer.resolve_all(medications)
+        pairs = self._regimen_pairs(tuple(sorted(set(canonical))))
+        with self._lock:
+            self._patients[patient_id] = (version, Counter(canonical), {self._pair(*p) for p in pairs})
+        return self.check_interactions(medications)
+    
+    def update_patient(
+        self,
+        patient_id: str,
+        medications: List[str],
+        diff: Dict[str, List[str]]
+    ) -> List[str]:
+        """
+        Update a patient's interactions after a medication list change
+        
+        Drugs are compared by canonical name: only a drug the patient did not
+        take before (its count goes from 0 to at least 1) is new, so
+        relabelling a drug ("Aspirin" -> "Bayer 81mg") reports nothing. New
+        drugs are checked against the rest of the list only, and pairs of
+        drugs no longer taken are dropped, so the cost grows with the list
+        length rather than with the number of pairs.
+        
+        The kept results live in this process's memory only. After a restart,
+        on another worker, or when the rules changed, the whole list is
+        checked and the previous list is reconstructed from the diff.
+        
+        Args:
+            patient_id: Patient identifier
+            medications: The patient's new medication list
+            diff: Names added and removed, as returned by MemoryBank.add_patient
+        
+        Returns:
+            Warnings for interactions that involve a newly taken drug
+        """
+        version = self.med_db.version
+        counts = Counter(self.normalizer.resolve_all(medications))
+        with self._lock:
+            state = self._patients.get(patient_id)
+        
+        if state is None or state[0] != version:
+            previous = counts.copy()
+            previous.subtract(self.normalizer.resolve_all(diff.get("added", [])))
+            previous.update(self.normalizer.resolve_all(diff.get("removed", [])))
+            fresh = {name for name in counts if previous[name] <= 0}
+            pairs = {self._pair(*p) for p in self._regimen_pairs(tuple(sorted(counts)))}
+            new_pairs = {p for p in pairs if p[0] in fresh or p[1] in fresh}
+        else:
+            previous = state[1]
+            fresh = {name for name in counts if previous[name] <= 0}
+            # Drugs still taken keep their pairs
+            pairs = {p for p in state[2] if p[0] in counts and p[1] in counts}
+            new_pairs = set()
+            for med1 in fresh:
+                for med2 in counts:
+                    if med2 == med1:
+                        continue
+                    warning = self.med_db.check_interaction(med1, med2)
+                    if warning:
+                        new_pairs.add(self._pair(med1, med2, warning))
+            pairs |= new_pairs
+        
+        with self._lock:
+            self._patients[patient_id] = (version, counts, pairs)
+        if not new_pairs:
+            return []
+        warnings = self._warnings(medications, self.normalizer.resolve_all(medications), list(new_pairs))
+        for warning in warnings:
+            logger.warning(f"New interaction detected: {warning}")
+        return warnings
+    
+    def forget_patient(self, patient_id: str) -> None:
+        """Drop the kept result of a patient"""
+        with self._lock:
+            self._patients.pop(patient_id, None)
+    
+    def _check(self, medications: List[str]) -> List[str]:
+        canonical = self.normalizer.resolve_all(medications)
+        pairs = self._regimen_pairs(tuple(sorted(set(canonical))))
+        return self._warnings(medications, canonical, pairs) if pairs else []
+    
     def check_interactions(self, medications: List[str]) -> List[str]:
         """
         Check for interactions between medications
         
         Args:
             medications: List of medication names
-            
+        
         Returns:
             List of interaction warnings
         """
         if len(medications) < 2:
             return []
         
-        interactions = []
-        
-        # Check each pair
-        for i in range(len(medications)):
-            for j in range(i + 1, len(medications)):
-                med1 = medications[i].lower()
-                med2 = medications[j].lower()
-                
-                interaction = self.med_db.check_interaction(med1, med2)
-                if interaction:
-                    warning = f"{medications[i]} + {medications[j]}: {interaction}"
-                    interactions.append(warning)
-                    logger.warning(f"Interaction detected: {warning}")
+        interactions = self._check(medications)
+        for warning in interactions:
+            logger.warning(f"Interaction detected: {warning}")
         
         return interactions
+    
+    def check_batch(self, medication_lists: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        Check many medication lists at once
+        
+        Lists are grouped by regimen fingerprint, so each distinct regimen is
+        checked at most once (and not at all if cached).
+        
+        Args:
+            medication_lists: Medication names keyed by patient ID (or any key)
+        
+        Returns:
+            Interaction warnings keyed like medication_lists
+        """
+        results = {key: self._check(medications) for key, medications in medication_lists.items()}
+        flagged = sum(1 for warnings in results.values() if warnings)
+        logger.info(f"Batch-checked {len(results)} medication lists, {flagged} with interactions")
+        return results
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Regimen cache size and hit/miss counts"""
+        with self._lock:
+            return {"regimens": len(self._cache), "rules_version": self._cache_version, **self._cache_stats}
@@ -1,18 +1,27 @@
 """Notifier Agent - Sends notifications to caregivers"""
-from typing import Optional
+from typing import Optional, Dict, Any, List
+from ..tools.outbox import NotificationOutbox
 from ..tools.logger import get_logger
-import json
-from pathlib import Path
 
 logger = get_logger(__name__)
 
 
 class NotifierAgent:
-    """Agent that sends notifications to caregivers"""
+    """
+    Agent that sends notifications to caregivers
     
-    def __init__(self):
-        self.notifications_file = Path("backend/data/notifications.json")
-        self.notifications_file.parent.mkdir(parents=True, exist_ok=True)
+    Recent notifications are indexed in memory by this process's outbox
+    when it opens, so with several API workers get_recent_notifications()
+    misses notifications other workers sent after that.
+    """
+    
+    def __init__(self, outbox: Optional[NotificationOutbox] = None):
+        # Notifications go to an append-only outbox written in the background,
+        # so alerting a caregiver does not slow down the request that raised it
+        self.outbox = outbox or NotificationOutbox(
+            "backend/data/notifications",
+            legacy_file="backend/data/notifications.json"
+        )
         logger.info("NotifierAgent initialized")
     
     def notify_caregiver(
@@ -28,7 +37,7 @@ class NotifierAgent:
             patient_id: Patient identifier
             message: Notification message
             severity: Severity level (low, medium, high, critical)
-            
+        
         Returns:
             Notification result
         """
@@ -50,15 +59,58 @@ class NotifierAgent:
         
         return notification
     
-    def _save_notification(self, notification: Dict[str, Any]) -> None:
-        """Save notification to file"""
-        notifications = []
+    def send_reminder(
+        self,
+        patient_id: str,
+        medication: str,
+        time_slot: str,
+        job_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a medication reminder
         
-        if self.notifications_file.exists():
-            with open(self.notifications_file, 'r') as f:
-                notifications = json.load(f)
+        Args:
+            patient_id: Patient identifier
+            medication: Medication name
+            time_slot: Scheduled time slot (e.g., "09:00")
+            job_id: Scheduler job that fired
         
-        notifications.append(notification)
+        Returns:
+            Notification result
+        """
+        from datetime import datetime
         
-        with open(self.notifications_file, 'w') as f:
-            json.dump(notifications, f, indent=2)
+        notification = {
+            "patient_id": patient_id,
+            "type": "reminder",
+            "message": f"Time to take {medication} ({time_slot})",
+            "medication": medication,
+            "job_id": job_id,
+            "severity": "low",
+            "timestamp": datetime.now().isoformat(),
+            "status": "sent"
+        }
+        logger.info(f"[REMINDER] Patient {patient_id}: {medication} at {time_slot}")
+        self._save_notification(notification)
+        return notification
+    
+    def _save_notification(self, notification: Dict[str, Any]) -> None:
+        """Queue notification in the outbox"""
+        self.outbox.append(notification)
+    
+    def get_recent_notifications(self, patient_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get the most recent notifications for a patient
+        
+        Args:
+            patient_id: Patient identifier
+            limit: Maximum number of notifications
+        
+        Returns:
+            Notifications, newest first
+        """
+        return self.outbox.recent(patient_id, limit)
+    
+    def close(self) -> None:
+        """Write queued notifications and close the outbox"""
+        self.outbox.close()
@@ -1,5 +1,5 @@
 """Orchestrator Agent - Coordinates all sub-agents"""
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .reminder_agent import ReminderAgent
 from .interaction_agent import InteractionAgent
 from .monitor_agent import MonitorAgent
@@ -14,12 +14,12 @@ logger = get_logger(__name__)
 class OrchestratorAgent:
     """Main orchestrator coordinating all sub-agents"""
     
-    def __init__(self, memory_bank: MemoryBank):
+    def __init__(self, memory_bank: MemoryBank, notifier: Optional[NotifierAgent] = None):
         self.memory = memory_bank
         self.reminder_agent = ReminderAgent(memory_bank)
         self.interaction_agent = InteractionAgent()
         self.monitor_agent = MonitorAgent()
-        self.notifier_agent = NotifierAgent()
+        self.notifier_agent = notifier or NotifierAgent()
         self.analytics_agent = AnalyticsAgent(memory_bank)
         logger.info("OrchestratorAgent initialized")
     
@@ -31,7 +31,7 @@ class OrchestratorAgent:
             patient_id: Patient identifier
             action: Action to perform
             data: Optional action data
-            
+        
         Returns:
             Result dictionary
         """
@@ -60,9 +60,10 @@ class OrchestratorAgent:
     def _check_interactions(self, patient: Dict[str, Any]) -> Dict[str, Any]:
         """Check medication interactions"""
         medications = [med["name"] for med in patient.get("medications", [])]
-        interactions = self.interaction_agent.check_interactions(medications)
+        interactions = self.interaction_agent.check_patient(patient["patient_id"], medications)
         
         if interactions:
+            self._record_interactions(patient["patient_id"], interactions)
             logger.warning(f"Interactions found for patient {patient['patient_id']}: {interactions}")
             self.notifier_agent.notify_caregiver(
                 patient_id=patient["patient_id"],
@@ -72,6 +73,76 @@ class OrchestratorAgent:
         
         return {"interactions": interactions, "medication_count": len(medications)}
     
+    def on_patient_updated(self, patient: Dict[str, Any], diff: Dict[str, List[str]]) -> List[str]:
+        """
+        Check a saved patient's medication changes for new interactions
+        
+        Args:
+            patient: The saved patient record
+            diff: Medication names added and removed, from MemoryBank.add_patient
+        
+        Returns:
+            Warnings for interactions involving an added medication; these
+            are recorded and sent to the caregiver
+        """
+        # Changed time slots replace the patient's reminder jobs
+        self.reminder_agent.sync_patient(patient)
+        if not diff["added"] and not diff["removed"]:
+            return []
+        medications = [med["name"] for med in patient.get("medications", [])]
+        new_interactions = self.interaction_agent.update_patient(patient["patient_id"], medications, diff)
+        if new_interactions:
+            self._record_interactions(patient["patient_id"], new_interactions)
+            self.notifier_agent.notify_caregiver(
+                patient_id=patient["patient_id"],
+                message=f"New medication interactions detected: {', '.join(new_interactions)}",
+                severity="high"
+            )
+        return new_interactions
+    
+    def rescreen_population(self) -> Dict[str, Any]:
+        """
+        Check every patient's medications against the current rules
+        
+        Patients on the same regimen are checked once (see
+        InteractionAgent.check_batch); nothing is recorded or notified.
+        
+        Returns:
+            Patients screened and the warnings of each flagged patient
+        """
+        medication_lists = {
+            patient["patient_id"]: [med["name"] for med in patient.get("medications", [])]
+            for patient in self.memory.get_all_patients()
+        }
+        results = self.interaction_agent.check_batch(medication_lists)
+        flagged = {patient_id: warnings for patient_id, warnings in results.items() if warnings}
+        return {
+            "patients_screened": len(results),
+            "patients_flagged": len(flagged),
+            "interactions": flagged,
+            "cache": self.interaction_agent.cache_stats()
+        }
+    
+    def _record_interactions(self, patient_id: str, interactions: List[str]) -> None:
+        """
+        Store newly detected interactions as events for analytics; an
+        interaction is new if its drug pair, by canonical name, is
+        """
+        key = self.interaction_agent.interaction_key
+        recorded = {
+            key(str(e.get("interaction")))
+            for e in self.memory.get_patient_events(patient_id, "interaction")
+        }
+        for interaction in interactions:
+            pair = key(interaction)
+            if pair not in recorded:
+                recorded.add(pair)
+                self.memory.add_event({
+                    "type": "interaction",
+                    "patient_id": patient_id,
+                    "interaction": interaction
+                })
+    
     def _schedule_reminders(self, patient: Dict[str, Any]) -> Dict[str, Any]:
         """Schedule medication reminders"""
         scheduled = self.reminder_agent.schedule_reminders(patient)
@@ -1,5 +1,8 @@
 """Reminder Agent - Manages medication reminders"""
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import time
 from ..tools.scheduler import Scheduler
 from ..tools.logger import get_logger
 
@@ -7,13 +10,30 @@ logger = get_logger(__name__)
 
 
 class ReminderAgent:
-    """Agent responsible for scheduling medication reminders"""
+    """
+    Agent responsible for scheduling medication reminders
+    
+    Jobs live in this process's Scheduler. They are rebuilt from the stored
+    patients (sync_patients) and follow each patient's time slots: a patient
+    whose slots changed is rescheduled, others are left alone.
+    """
     
     def __init__(self, memory_bank):
         self.memory = memory_bank
         self.scheduler = Scheduler()
+        # patient_id -> (medication, time slot) pairs currently scheduled
+        self._schedules: Dict[str, Tuple[Tuple[str, str], ...]] = {}
         logger.info("ReminderAgent initialized")
     
+    @staticmethod
+    def _time_slots(patient: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+        """(medication, time slot) pairs to schedule for a patient"""
+        return tuple(
+            (med["name"], time_slot)
+            for med in patient.get("medications", [])
+            for time_slot in med.get("time_slots", ["09:00", "21:00"])
+        )
+    
     def schedule_reminders(self, patient: Dict[str, Any]) -> List[Dict[str, str]]:
         """
         Schedule reminders for a patient's medications
@@ -25,29 +45,106 @@ class ReminderAgent:
             List of scheduled jobs
         """
         patient_id = patient["patient_id"]
-        medications = patient.get("medications", [])
+        time_slots = self._time_slots(patient)
+        
+        # The new schedule replaces the patient's previous one
+        self.scheduler.remove_patient_jobs(patient_id)
         
         scheduled_jobs = []
         
-        for med in medications:
-            med_name = med["name"]
-            time_slots = med.get("time_slots", ["09:00", "21:00"])
-            
-            for time_slot in time_slots:
-                job_id = self.scheduler.schedule_job(
-                    patient_id=patient_id,
-                    medication=med_name,
-                    time=time_slot
-                )
-                scheduled_jobs.append({
-                    "job_id": job_id,
-                    "medication": med_name,
-                    "time": time_slot
-                })
-                logger.info(f"Scheduled reminder {job_id} for {patient_id}: {med_name} at {time_slot}")
+        for med_name, time_slot in time_slots:
+            job_id = self.scheduler.schedule_job(
+                patient_id=patient_id,
+                medication=med_name,
+                time=time_slot
+            )
+            scheduled_jobs.append({
+                "job_id": job_id,
+                "medication": med_name,
+                "time": time_slot
+            })
+            logger.info(f"Scheduled reminder {job_id} for {patient_id}: {med_name} at {time_slot}")
         
+        self._schedules[patient_id] = time_slots
         return scheduled_jobs
     
+    def sync_patient(self, patient: Dict[str, Any]) -> bool:
+        """
+        Reschedule a patient's reminders if their time slots changed
+        
+        Returns:
+            Whether the patient was rescheduled
+        """
+        if self._schedules.get(patient["patient_id"]) == self._time_slots(patient):
+            return False
+        self.schedule_reminders(patient)
+        return True
+    
+    def sync_patients(self, patients: Iterable[Dict[str, Any]]) -> int:
+        """
+        Bring the jobs in line with the stored patients, e.g. after a restart
+        
+        Returns:
+            Number of patients rescheduled
+        """
+        changed = sum(1 for patient in patients if self.sync_patient(patient))
+        if changed:
+            logger.info(f"Rescheduled reminders for {changed} patients")
+        return changed
+    
     def get_scheduled_reminders(self, patient_id: str) -> List[Dict[str, Any]]:
         """Get all scheduled reminders for a patient"""
         return self.scheduler.get_patient_jobs(patient_id)
+    
+    def dispatch_due(self, notifier, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Hand every due reminder to the notifier; daily jobs are rescheduled
+        
+        Args:
+            notifier: NotifierAgent
+            now: Current time (default: datetime.now())
+        
+        Returns:
+            The jobs that fired
+        """
+        due = self.scheduler.pop_due(now)
+        for job in due:
+            notifier.send_reminder(
+                patient_id=job["patient_id"],
+                medication=job["medication"],
+                time_slot=job["time"],
+                job_id=job["job_id"]
+            )
+        if due:
+            logger.info(f"Dispatched {len(due)} reminders")
+        return due
+    
+    async def run_dispatch_loop(self, notifier, tick_s: float = 1.0, sync_s: float = 0.0) -> None:
+        """
+        Dispatch reminders as they come due, until cancelled
+        
+        Sleeps until the earliest fire time, waking at least every tick_s
+        seconds to pick up jobs scheduled in the meantime.
+        
+        Args:
+            notifier: NotifierAgent
+            tick_s: Longest sleep between checks
+            sync_s: Seconds between re-reads of the stored patients, to pick
+                up changes saved by other processes (0 = never)
+        """
+        logger.info(f"Reminder dispatch loop started (tick {tick_s}s)")
+        last_sync = time.monotonic()
+        while True:
+            try:
+                if sync_s > 0 and time.monotonic() - last_sync >= sync_s:
+                    last_sync = time.monotonic()
+                    patients = await asyncio.to_thread(self.memory.get_all_patients)
+                    self.sync_patients(patients)
+                self.dispatch_due(notifier)
+            except Exception as e:
+                logger.error(f"Reminder dispatch failed: {e}")
+            next_fire = self.scheduler.next_fire()
+            delay = tick_s
+            if next_fire is not None:
+                delay = min(tick_s, max(0.0, (next_fire - datetime.now()).total_seconds()))
+            await asyncio.sleep(delay)
@@ -30,6 +30,14 @@ class OrchestrationRequest(BaseModel):
     data: Optional[Dict[str, Any]] = None
 
 
+class BatchInteractionRequest(BaseModel):
+    medication_lists: Dict[str, List[str]] = Field(description="medication names keyed by patient ID")
+
+
+class PrecautionBatchRequest(BaseModel):
+    medications: List[str] = Field(description="medication names to look up")
+
+
 class SummaryResponse(BaseModel):
     patient_id: str
     adherence_rate: float
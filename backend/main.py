@@ -1,13 +1,21 @@
 """FastAPI main application"""
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from datetime import date, datetime
 from pathlib import Path
+import asyncio
+import os
 
-from .agents.schemas import Patient, OrchestrationRequest, SummaryResponse
+from .agents.schemas import Patient, OrchestrationRequest, SummaryResponse, BatchInteractionRequest, PrecautionBatchRequest
 from .agents.orchestrator import OrchestratorAgent
-from .tools.persistence import MemoryBank
+from .tools.persistence import create_memory_bank
+from .tools.export import EXPORT_FORMATS, export_summaries
+from .tools.med_db import get_medication_db
+from .tools.precautions import PrecautionCatalog
+from .tools.scheduler import acquire_dispatch_lock
 from .tools.logger import get_logger
 
 logger = get_logger(__name__)
@@ -29,8 +37,16 @@ app.add_middleware(
 )
 
 # Initialize components
-memory = MemoryBank()
+memory = create_memory_bank()
 orchestrator = OrchestratorAgent(memory)
+try:
+    precautions: Optional[PrecautionCatalog] = PrecautionCatalog()
+except FileNotFoundError as e:
+    # The catalog is shared with the Next.js app; the API runs without it
+    logger.warning(f"Precaution catalog unavailable: {e}")
+    precautions = None
+reminder_task: Optional[asyncio.Task] = None
+reminder_lock: Optional[int] = None
 
 logger.info("MediBuddy v2 API started")
 
@@ -46,17 +62,27 @@ async def root():
     }
 
 
+# Write endpoints are plain functions so FastAPI runs them in its threadpool:
+# concurrent requests can then share a MemoryBank group commit instead of
+# blocking the event loop one fsync at a time.
 @app.post("/api/patient")
-async def create_or_update_patient(patient: Patient) -> Dict[str, Any]:
+def create_or_update_patient(patient: Patient) -> Dict[str, Any]:
     """Create or update a patient"""
     try:
-        memory.add_patient(patient.model_dump())
+        record = patient.model_dump()
+        diff = memory.add_patient(record)
         logger.info(f"Patient {patient.patient_id} created/updated")
+        # Only drugs added by this update are checked, and only their
+        # interactions are notified
+        new_interactions = orchestrator.on_patient_updated(record, diff)
         
         return {
             "status": "success",
             "message": f"Patient {patient.patient_id} saved",
-            "patient_id": patient.patient_id
+            "patient_id": patient.patient_id,
+            "medications_added": diff["added"],
+            "medications_removed": diff["removed"],
+            "new_interactions": new_interactions
         }
     except Exception as e:
         logger.error(f"Error creating patient: {e}")
@@ -83,7 +109,7 @@ async def list_patients() -> Dict[str, Any]:
 
 
 @app.post("/api/run/{patient_id}")
-async def run_orchestration(patient_id: str, request: OrchestrationRequest) -> Dict[str, Any]:
+def run_orchestration(patient_id: str, request: OrchestrationRequest) -> Dict[str, Any]:
     """Run orchestration for a patient"""
     try:
         result = orchestrator.orchestrate(
@@ -97,28 +123,283 @@ async def run_orchestration(patient_id: str, request: OrchestrationRequest) -> D
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/interactions/batch")
+def check_interactions_batch(request: BatchInteractionRequest) -> Dict[str, Any]:
+    """Check many medication lists at once; identical regimens are checked once"""
+    results = orchestrator.interaction_agent.check_batch(request.medication_lists)
+    return {
+        "count": len(results),
+        "results": results,
+        "cache": orchestrator.interaction_agent.cache_stats()
+    }
+
+
+@app.post("/api/interactions/rescreen")
+def rescreen_interactions() -> Dict[str, Any]:
+    """Re-check every patient against the current interaction rules"""
+    return orchestrator.rescreen_population()
+
+
+@app.post("/api/interactions/reload")
+def reload_interaction_rules(force: bool = False) -> Dict[str, Any]:
+    """
+    Rebuild the interaction rules from their file and swap them in; checks
+    continue meanwhile. Only the worker serving the request reloads.
+    """
+    try:
+        return get_medication_db().reload(force=force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed, previous rules kept: {e}")
+
+
+@app.get("/api/interactions/metrics")
+async def get_interaction_metrics() -> Dict[str, Any]:
+    """Rule reload/swap latency and interaction cache statistics"""
+    return {
+        "rules": get_medication_db().get_metrics(),
+        "cache": orchestrator.interaction_agent.cache_stats(),
+        "normalizer": orchestrator.interaction_agent.normalizer.stats()
+    }
+
+
+def _precaution_catalog() -> PrecautionCatalog:
+    """The precaution catalog, or 503 if its file was not found at startup"""
+    if precautions is None:
+        raise HTTPException(status_code=503, detail="Precaution catalog unavailable")
+    return precautions
+
+
+@app.get("/api/precautions/search")
+async def search_precautions(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=100)
+) -> Dict[str, Any]:
+    """Medicines matching a name: exact match first, then prefix and substring matches"""
+    results = _precaution_catalog().search(q, limit)
+    return {"query": q, "count": len(results), "results": results}
+
+
+@app.get("/api/precautions/autocomplete")
+async def autocomplete_precautions(
+    prefix: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=100)
+) -> Dict[str, Any]:
+    """Medicine names starting with a prefix"""
+    return {"prefix": prefix, "suggestions": _precaution_catalog().autocomplete(prefix, limit)}
+
+
+@app.post("/api/precautions/batch")
+async def batch_precautions(request: PrecautionBatchRequest) -> Dict[str, Any]:
+    """Precautions for a list of medication names (null for unknown names)"""
+    return {"precautions": _precaution_catalog().for_medications(request.medications)}
+
+
+@app.get("/api/patient/{patient_id}/precautions")
+async def get_patient_precautions(patient_id: str) -> Dict[str, Any]:
+    """Precautions for every medication of a patient"""
+    catalog = _precaution_catalog()
+    patient = memory.get_patient(patient_id)
+    if not patient:
+        raise HTTPException(status_code=404, detail=f"Patient {patient_id} not found")
+    names = [med["name"] for med in patient.get("medications", [])]
+    return {"patient_id": patient_id, "precautions": catalog.for_medications(names)}
+
+
+@app.get("/api/precautions/{name}")
+async def get_precautions(name: str) -> Dict[str, Any]:
+    """Precautions for one medicine, like the Next.js route: exact match, else the best search match"""
+    catalog = _precaution_catalog()
+    entry = catalog.get(name)
+    if entry is None:
+        matches = catalog.search(name, limit=1)
+        entry = matches[0] if matches else None
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Medication not found")
+    return entry
+
+
 @app.get("/api/summary/{patient_id}")
-async def get_summary(patient_id: str) -> Dict[str, Any]:
-    """Get clinician summary for a patient"""
+async def get_summary(patient_id: str, request: Request) -> Response:
+    """Get clinician summary for a patient (ETag / If-None-Match aware)"""
     patient = memory.get_patient(patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail=f"Patient {patient_id} not found")
     
-    summary = orchestrator.analytics_agent.generate_summary(patient_id)
-    return summary
+    version = memory.data_version(patient_id)
+    etag = f'"{version}"'
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    _, summary = orchestrator.analytics_agent.get_summary(patient_id, version)
+    return JSONResponse(summary, headers={"ETag": etag})
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names the current ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+@app.get("/api/analytics/cohort")
+async def get_cohort_analytics(
+    medication: Optional[str] = None,
+    age_band: Optional[str] = None
+) -> Dict[str, Any]:
+    """Get adherence metrics across all patients, optionally filtered"""
+    try:
+        return orchestrator.analytics_agent.generate_cohort_summary(medication=medication, age_band=age_band)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/analytics/totals")
+async def get_analytics_totals() -> Dict[str, Any]:
+    """Stored event total and patient list version, for pollers such as the dashboard"""
+    return {
+        "total_events": orchestrator.analytics_agent.total_events(),
+        "patients_version": memory.patients_version()
+    }
+
+
+@app.get("/api/analytics/adherence/{patient_id}")
+async def get_adherence_trend(
+    patient_id: str,
+    days: int = Query(30, ge=1, le=365),
+    as_of: Optional[str] = None
+) -> Dict[str, Any]:
+    """Get 7/30/90-day adherence and a daily series, overall and per medication"""
+    if not memory.get_patient(patient_id):
+        raise HTTPException(status_code=404, detail=f"Patient {patient_id} not found")
+    try:
+        as_of_date = date.fromisoformat(as_of) if as_of else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid as_of date '{as_of}'")
+    return orchestrator.analytics_agent.adherence_report(patient_id, days=days, as_of=as_of_date)
+
+
+@app.get("/api/alerts/top")
+async def get_top_alerts(k: int = Query(10, ge=1, le=1000)) -> Dict[str, Any]:
+    """Get the k patients with the highest risk score"""
+    patients = orchestrator.analytics_agent.top_risk_patients(k)
+    return {"count": len(patients), "patients": patients}
 
 
 @app.get("/api/events/{patient_id}")
-async def get_patient_events(patient_id: str) -> Dict[str, Any]:
-    """Get all events for a patient"""
-    events = memory.get_patient_events(patient_id)
+async def get_patient_events(
+    patient_id: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    event_type: Optional[str] = Query(None, alias="type"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """Get a page of a patient's events in timestamp order"""
+    try:
+        page = memory.query_events(
+            patient_id,
+            event_type=event_type,
+            since=since,
+            until=until,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "patient_id": patient_id,
-        "count": len(events),
-        "events": events
+        "count": len(page["events"]),
+        "events": page["events"],
+        "next_cursor": page["next_cursor"]
     }
 
 
+@app.get("/api/notifications/{patient_id}")
+async def get_notifications(patient_id: str, limit: int = 20) -> Dict[str, Any]:
+    """Get the most recent caregiver notifications for a patient"""
+    notifications = orchestrator.notifier_agent.get_recent_notifications(patient_id, limit)
+    return {
+        "patient_id": patient_id,
+        "count": len(notifications),
+        "notifications": notifications
+    }
+
+
+@app.get("/api/reminders/{patient_id}")
+async def get_reminders(patient_id: str) -> Dict[str, Any]:
+    """Get a patient's reminder jobs with their next fire times"""
+    patient = memory.get_patient(patient_id)
+    if patient:
+        # Picks up time slots saved through another worker
+        orchestrator.reminder_agent.sync_patient(patient)
+    jobs = orchestrator.reminder_agent.get_scheduled_reminders(patient_id)
+    return {
+        "patient_id": patient_id,
+        "count": len(jobs),
+        "reminders": jobs
+    }
+
+
+# Runs in the threadpool so the event loop stays free; rows come from the
+# analytics agent's running aggregates, so no event is re-read.
+@app.post("/api/export")
+def export_all_summaries(
+    format: str = Query("csv", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    chunk_size: int = Query(1000, ge=1)
+) -> Dict[str, Any]:
+    """Export every patient's summary to CSV or Parquet files under backend/data/exports"""
+    patient_ids = [p["patient_id"] for p in memory.get_all_patients()]
+    output_dir = Path("backend/data/exports") / datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    try:
+        return export_summaries(patient_ids, str(output_dir), fmt=format, chunk_size=chunk_size,
+                                analytics=orchestrator.analytics_agent)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.on_event("startup")
+async def startup() -> None:
+    """
+    Rebuild reminder jobs from the stored patients and start dispatching
+    them (MEDIBUDDY_REMINDER_TICK_S <= 0 disables dispatch)
+    
+    Of several workers sharing backend/data, only the one holding the
+    dispatch lock sends reminders; it re-reads the stored patients every
+    MEDIBUDDY_REMINDER_SYNC_S seconds to follow updates saved by the others.
+    """
+    global reminder_task, reminder_lock
+    reminders = orchestrator.reminder_agent
+    reminders.sync_patients(await asyncio.to_thread(memory.get_all_patients))
+    tick = float(os.getenv("MEDIBUDDY_REMINDER_TICK_S", "1.0"))
+    if tick <= 0:
+        return
+    reminder_lock = acquire_dispatch_lock("backend/data/reminders.lock")
+    if reminder_lock is None:
+        logger.info("Another worker dispatches reminders")
+        return
+    sync = float(os.getenv("MEDIBUDDY_REMINDER_SYNC_S", "60"))
+    reminder_task = asyncio.create_task(
+        reminders.run_dispatch_loop(orchestrator.notifier_agent, tick, sync_s=sync)
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    """Stop reminder dispatch and flush queued writes before the process exits"""
+    if reminder_task is not None:
+        reminder_task.cancel()
+        try:
+            await reminder_task
+        except asyncio.CancelledError:
+            pass
+    if reminder_lock is not None:
+        os.close(reminder_lock)
+    orchestrator.notifier_agent.close()
+    get_medication_db().stop_watching()
+    memory.close()
+
+
 # Serve frontend
 frontend_path = Path(__file__).parent.parent / "frontend"
 if frontend_path.exists():
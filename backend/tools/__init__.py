@@ -1,13 +1,30 @@
 """MediBuddy v2 Tools and Utilities"""
-from .med_db import MedicationDB
+from .med_db import MedicationDB, SharedMedicationDB, create_medication_db, get_medication_db
+from .interaction_store import MappedInteractionDB, write_interaction_store
+from .drug_names import DrugNameNormalizer, get_drug_normalizer
+from .precautions import PrecautionCatalog
 from .scheduler import Scheduler
-from .persistence import MemoryBank, SessionService
+from .persistence import MemoryBank, ShardedMemoryBank, SessionService, create_memory_bank
+from .sqlite_store import SQLiteMemoryBank
+from .outbox import NotificationOutbox
 from .logger import get_logger
 
 __all__ = [
     "MedicationDB",
+    "MappedInteractionDB",
+    "SharedMedicationDB",
+    "create_medication_db",
+    "get_medication_db",
+    "write_interaction_store",
+    "DrugNameNormalizer",
+    "get_drug_normalizer",
+    "PrecautionCatalog",
     "Scheduler",
     "MemoryBank",
+    "ShardedMemoryBank",
     "SessionService",
+    "SQLiteMemoryBank",
+    "NotificationOutbox",
+    "create_memory_bank",
     "get_logger",
 ]
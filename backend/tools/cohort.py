@@ -0,0 +1,88 @@
+"""Cohort analytics - vectorized adherence metrics across many patients"""
+from typing import Dict, Any, List, Optional, Tuple
+import re
+import numpy as np
+from ..tools.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Same thresholds as the per-patient summary alerts
+LOW_ADHERENCE_THRESHOLD = 80.0
+
+_AGE_BAND = re.compile(r"^\s*(\d+)\s*(?:-\s*(\d+)|\+)\s*$")
+
+
+def parse_age_band(age_band: str) -> Tuple[int, Optional[int]]:
+    """
+    Parse an age band such as "40-64" or "65+"
+    
+    Returns:
+        (lowest age, highest age or None if open-ended), both inclusive
+    """
+    match = _AGE_BAND.match(age_band)
+    if not match:
+        raise ValueError(f"Invalid age band '{age_band}', expected e.g. '40-64' or '65+'")
+    low = int(match.group(1))
+    high = int(match.group(2)) if match.group(2) is not None else None
+    if high is not None and high < low:
+        raise ValueError(f"Invalid age band '{age_band}': upper bound below lower bound")
+    return low, high
+
+
+def compute_cohort_metrics(
+    patient_ids: List[str],
+    scheduled: np.ndarray,
+    taken: np.ndarray,
+    high_severity: np.ndarray,
+    interactions: np.ndarray
+) -> Dict[str, Any]:
+    """
+    Per-patient and aggregate adherence metrics for a cohort
+    
+    Args:
+        patient_ids: Patient identifiers, one per array position
+        scheduled: Scheduled dose counts
+        taken: Taken dose counts
+        high_severity: Whether a high/critical symptom was reported
+        interactions: Detected interaction counts
+    
+    Returns:
+        {"patient_count", "aggregate", "patients"}
+    """
+    scheduled = scheduled.astype(np.int64, copy=False)
+    taken = taken.astype(np.int64, copy=False)
+    rates = np.full(len(patient_ids), 100.0)
+    np.divide(taken * 100.0, scheduled, out=rates, where=scheduled > 0)
+    missed = scheduled - taken
+    
+    low_adherence = rates < LOW_ADHERENCE_THRESHOLD
+    has_interactions = interactions > 0
+    alert_counts = low_adherence.astype(np.int64) + high_severity + has_interactions
+    
+    total_scheduled = int(scheduled.sum())
+    total_taken = int(taken.sum())
+    aggregate = {
+        "mean_adherence_rate": round(float(rates.mean()), 1) if len(rates) else None,
+        "overall_adherence_rate": round(total_taken / total_scheduled * 100, 1) if total_scheduled else 100.0,
+        "total_doses": total_scheduled,
+        "taken_doses": total_taken,
+        "missed_doses": int(missed.sum()),
+        "patients_with_alerts": int(np.count_nonzero(alert_counts)),
+        "alert_counts": {
+            "low_adherence": int(np.count_nonzero(low_adherence)),
+            "high_severity": int(np.count_nonzero(high_severity)),
+            "interactions": int(np.count_nonzero(has_interactions)),
+        },
+    }
+    patients = [
+        {
+            "patient_id": patient_id,
+            "adherence_rate": rate,
+            "missed_doses": missed_count,
+            "alert_count": alerts,
+        }
+        for patient_id, rate, missed_count, alerts in zip(
+            patient_ids, np.round(rates, 1).tolist(), missed.tolist(), alert_counts.tolist()
+        )
+    ]
+    return {"patient_count": len(patient_ids), "aggregate": aggregate, "patients": patients}
@@ -0,0 +1,212 @@
+"""Drug name normalization - brand, salt and misspelling resolution to canonical names"""
+from typing import Dict, Any, Iterable, List, Optional, Set
+from collections import defaultdict
+from functools import lru_cache
+import re
+import threading
+from ..tools.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Brand names and alternative generic names -> canonical generic name
+SYNONYMS: Dict[str, str] = {
+    "coumadin": "warfarin", "jantoven": "warfarin",
+    "bayer": "aspirin", "ecotrin": "aspirin", "acetylsalicylic acid": "aspirin", "asa": "aspirin",
+    "advil": "ibuprofen", "motrin": "ibuprofen", "nurofen": "ibuprofen",
+    "tylenol": "acetaminophen", "panadol": "acetaminophen", "paracetamol": "acetaminophen",
+    "amoxil": "amoxicillin",
+    "prinivil": "lisinopril", "zestril": "lisinopril",
+    "glucophage": "metformin",
+    "zocor": "simvastatin",
+    "synthroid": "levothyroxine", "levoxyl": "levothyroxine", "euthyrox": "levothyroxine",
+    "klor con": "potassium", "k dur": "potassium",
+    "tums": "calcium", "caltrate": "calcium",
+    "ethanol": "alcohol",
+    "grapefruit juice": "grapefruit",
+}
+
+# Canonical names known without a synonym pointing at them
+GENERICS = (
+    "warfarin", "aspirin", "ibuprofen", "acetaminophen", "amoxicillin", "lisinopril",
+    "metformin", "simvastatin", "levothyroxine", "potassium", "calcium", "alcohol", "grapefruit",
+)
+
+# Salt and hydrate forms dropped from the end of a name ("warfarin sodium")
+SALT_WORDS = frozenset({
+    "sodium", "potassium", "calcium", "magnesium", "hydrochloride", "hcl", "hydrobromide",
+    "sulfate", "sulphate", "phosphate", "citrate", "maleate", "mesylate", "besylate",
+    "tartrate", "succinate", "fumarate", "acetate", "chloride", "carbonate", "bromide",
+    "monohydrate", "dihydrate", "trihydrate",
+})
+
+# Dose units, dosage forms and qualifiers dropped anywhere in a name
+FORM_WORDS = frozenset({
+    "mg", "mcg", "g", "ml", "iu", "unit", "units", "tablet", "tablets", "tab", "tabs",
+    "capsule", "capsules", "cap", "caps", "oral", "solution", "suspension", "syrup",
+    "injection", "chewable", "er", "xr", "sr", "xl", "cr", "dr", "extended", "delayed",
+    "release", "low", "dose", "strength", "extra", "maximum", "regular", "enteric", "coated", "ec",
+    "supplement", "supplements",
+})
+
+# Trigram matches checked by edit distance per misspelled name
+FUZZY_CANDIDATES = 5
+
+# Largest edit distance accepted as a misspelling; different drugs often
+# differ by two edits ("fosinopril" / "lisinopril")
+MAX_EDIT_DISTANCE = 1
+
+_PARENTHESES = re.compile(r"\([^)]*\)")
+_TOKENS = re.compile(r"[a-z]+|\d+(?:\.\d+)?[a-z%]*")
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Edit distance counting an adjacent transposition as one edit"""
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[len(b)]
+
+
+class DrugNameNormalizer:
+    """
+    Resolves free-text medication names to canonical generic names
+    
+    Resolution cleans the name (case, dose, dosage form, parentheses),
+    drops trailing salt words, then looks it up in the synonym table. A
+    name made only of known names that agree ("bayer aspirin") resolves to
+    that name; a name merely containing one ("aspirin-free", "potassium
+    iodide") does not. Names still unknown are matched against the known
+    names: a trigram index proposes candidates, and a misspelling is
+    accepted only if exactly one of them is a single edit away and starts
+    with the same letter. Results are kept in an LRU cache, cleared when
+    names are added.
+    """
+    
+    def __init__(self, cache_size: int = 4096, min_similarity: float = 0.4):
+        self.min_similarity = min_similarity
+        self._synonyms: Dict[str, str] = {}
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+        self.add_synonyms(SYNONYMS)
+        self.add_names(GENERICS)
+        logger.info(f"DrugNameNormalizer initialized with {len(self._synonyms)} names")
+    
+    @staticmethod
+    def clean(name: str) -> str:
+        """Lowercase name without doses, dosage forms, punctuation or trailing salts"""
+        tokens = [
+            token for token in _TOKENS.findall(_PARENTHESES.sub(" ", name.lower()))
+            if not token[0].isdigit() and token not in FORM_WORDS
+        ]
+        while len(tokens) > 1 and tokens[-1] in SALT_WORDS:
+            tokens.pop()
+        return " ".join(tokens)
+    
+    @staticmethod
+    def _name_trigrams(name: str) -> Set[str]:
+        padded = f"  {name} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def add_names(self, names: Iterable[str]) -> None:
+        """Register canonical names"""
+        self.add_synonyms({name: name for name in names})
+    
+    def add_synonyms(self, synonyms: Dict[str, str]) -> None:
+        """Register alternative names (brand, generic, ...) for canonical names"""
+        with self._lock:
+            for alias, canonical in synonyms.items():
+                key = self.clean(alias)
+                if not key:
+                    continue
+                self._synonyms[key] = self.clean(canonical) or key
+                for trigram in self._name_trigrams(key):
+                    self._trigrams[trigram].add(key)
+            self.resolve.cache_clear()
+    
+    def _closest(self, key: str) -> Optional[str]:
+        """
+        The one known name a single edit away from key, or None
+        
+        The trigram index narrows the search to the few names with the most
+        trigrams in common (Dice coefficient); only those are compared by
+        edit distance, so unrelated names that merely share a suffix
+        ("atorvastatin" / "simvastatin") are not matched. Candidates must
+        start with the same letter, and an ambiguous match is rejected.
+        """
+        query = self._name_trigrams(key)
+        shared: Dict[str, int] = defaultdict(int)
+        for trigram in query:
+            for candidate in self._trigrams.get(trigram, ()):
+                shared[candidate] += 1
+        scored = sorted(
+            (-2 * count / (len(query) + len(self._name_trigrams(candidate))), candidate)
+            for candidate, count in shared.items()
+        )
+        matches = []
+        for neg_score, candidate in scored[:FUZZY_CANDIDATES]:
+            if -neg_score < self.min_similarity:
+                break
+            if candidate[0] == key[0] and _edit_distance(key, candidate) <= MAX_EDIT_DISTANCE:
+                matches.append(candidate)
+        return matches[0] if len(matches) == 1 else None
+    
+    def canonical(self, name: str) -> str:
+        """
+        Canonical name from cleaning and the synonym table only, without
+        misspelling correction; used for curated data such as rule files
+        """
+        key = self.clean(name)
+        with self._lock:
+            return self._synonyms.get(key, key)
+    
+    def _resolve(self, name: str) -> str:
+        key = self.clean(name)
+        if not key:
+            return name.strip().lower()
+        with self._lock:
+            canonical = self._synonyms.get(key)
+            if canonical is None:
+                # "bayer aspirin": every word a known name for the same drug
+                words = {self._synonyms.get(word) for word in key.split()}
+                if len(words) == 1 and None not in words:
+                    canonical = words.pop()
+            if canonical is None and len(key) >= 4:
+                closest = self._closest(key)
+                canonical = self._synonyms[closest] if closest else None
+        return canonical or key
+    
+    def aliases(self) -> Dict[str, str]:
+        """Known names (cleaned) mapped to their canonical name"""
+        with self._lock:
+            return dict(self._synonyms)
+    
+    def resolve_all(self, names: List[str]) -> List[str]:
+        """Canonical names for a list of names, in order"""
+        return [self.resolve(name) for name in names]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Known names and cache statistics"""
+        info = self.resolve.cache_info()
+        return {"names": len(self._synonyms), "cache_hits": info.hits,
+                "cache_misses": info.misses, "cache_size": info.currsize}
+
+
+_default_normalizer: Optional[DrugNameNormalizer] = None
+_default_lock = threading.Lock()
+
+
+def get_drug_normalizer() -> DrugNameNormalizer:
+    """Process-wide normalizer with the built-in tables"""
+    global _default_normalizer
+    with _default_lock:
+        if _default_normalizer is None:
+            _default_normalizer = DrugNameNormalizer()
+        return _default_normalizer
@@ -0,0 +1,237 @@
+"""Compact columnar storage for MemoryBank events"""
+from typing import Dict, Any, List, Optional, Tuple, Iterable, Iterator
+from array import array
+from collections import Counter
+import base64
+import json
+from datetime import datetime, timedelta
+from ..tools.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Known event types get small fixed codes; unknown types are added on first use
+EVENT_TYPES = ("dose", "symptom", "interaction")
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Sort key for events without a usable timestamp
+MISSING_TIMESTAMP = -(2 ** 63)
+
+# Presence bits for the fields held in dedicated columns
+_HAS_TYPE = 1
+_HAS_PATIENT = 2
+_HAS_TIMESTAMP = 4
+
+# Short string values (medication names, triage levels, ...) are shared
+_INTERN_MAX_LEN = 64
+_INTERN_MAX_ENTRIES = 100_000
+
+
+def timestamp_to_micros(timestamp: Any) -> Tuple[int, bool]:
+    """
+    Convert an ISO timestamp to epoch microseconds
+    
+    Returns:
+        (sort key, exact) where exact means the string is reproduced by
+        micros_to_timestamp, so it need not be stored separately
+    """
+    if not isinstance(timestamp, str):
+        return MISSING_TIMESTAMP, False
+    try:
+        dt = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return MISSING_TIMESTAMP, False
+    if dt.tzinfo is not None:
+        micros = (dt.replace(tzinfo=None) - dt.utcoffset() - _EPOCH) // _MICROSECOND
+        return micros, False
+    return (dt - _EPOCH) // _MICROSECOND, dt.isoformat() == timestamp
+
+
+def micros_to_timestamp(micros: int) -> str:
+    """Inverse of timestamp_to_micros for naive timestamps"""
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+def encode_cursor(key: Any, row: int) -> str:
+    """Opaque pagination cursor for the event at (sort key, row)"""
+    return base64.urlsafe_b64encode(json.dumps([key, row]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        key, row = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return key, int(row)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor '{cursor}'") from e
+
+
+def medication_diff(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Medication names added and removed by replacing a patient record
+    
+    Args:
+        old: Previous patient record, or None for a new patient
+        new: New patient record
+    
+    Returns:
+        {"added": [...], "removed": [...]}, repeated names counted per copy
+    """
+    before = Counter(med.get("name") for med in (old or {}).get("medications", []))
+    after = Counter(med.get("name") for med in new.get("medications", []))
+    return {
+        "added": list((after - before).elements()),
+        "removed": list((before - after).elements())
+    }
+
+
+class EventStore:
+    """
+    Columnar event storage
+    
+    Each event is one row: an interned patient code, an event type code,
+    an integer epoch-microsecond timestamp and a "shape" code naming the
+    remaining keys, whose values are kept in one tuple. Rows are handed
+    out as plain dicts, built on demand.
+    """
+    
+    def __init__(self):
+        self.patient_ids: List[str] = []
+        self._patient_codes: Dict[str, int] = {}
+        self.type_names: List[Any] = list(EVENT_TYPES)
+        self._type_codes: Dict[Any, int] = {name: code for code, name in enumerate(EVENT_TYPES)}
+        self._shapes: List[Tuple[int, Tuple[str, ...]]] = []
+        self._shape_codes: Dict[Tuple[int, Tuple[str, ...]], int] = {}
+        self._strings: Dict[str, str] = {}
+        
+        self.patients = array('I')
+        self.types = array('H')
+        self.timestamps = array('q')
+        self.shapes = array('I')
+        self.values: List[tuple] = []
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def patient_code(self, patient_id: str) -> Optional[int]:
+        """Interned code for a patient ID, or None if it has no events"""
+        return self._patient_codes.get(patient_id)
+    
+    def type_code(self, event_type: Any) -> Optional[int]:
+        """Code for an event type, or None if no event has that type"""
+        return self._type_codes.get(event_type)
+    
+    def _intern_patient(self, patient_id: Any) -> int:
+        code = self._patient_codes.get(patient_id)
+        if code is None:
+            code = self._patient_codes[patient_id] = len(self.patient_ids)
+            self.patient_ids.append(patient_id)
+        return code
+    
+    def _intern_type(self, event_type: Any) -> int:
+        code = self._type_codes.get(event_type)
+        if code is None:
+            code = self._type_codes[event_type] = len(self.type_names)
+            self.type_names.append(event_type)
+        return code
+    
+    def _intern_shape(self, shape: Tuple[int, Tuple[str, ...]]) -> int:
+        code = self._shape_codes.get(shape)
+        if code is None:
+            code = self._shape_codes[shape] = len(self._shapes)
+            self._shapes.append(shape)
+        return code
+    
+    def _intern_value(self, value: Any) -> Any:
+        if isinstance(value, str) and len(value) <= _INTERN_MAX_LEN:
+            shared = self._strings.get(value)
+            if shared is not None:
+                return shared
+            if len(self._strings) < _INTERN_MAX_ENTRIES:
+                self._strings[value] = value
+        return value
+    
+    def append(self, event: Dict[str, Any]) -> int:
+        """
+        Store one event
+        
+        Returns:
+            Row number of the event
+        """
+        mask = 0
+        extra_keys = []
+        extra_values = []
+        ts_key = MISSING_TIMESTAMP
+        for key, value in event.items():
+            if key == "type":
+                mask |= _HAS_TYPE
+            elif key == "patient_id":
+                mask |= _HAS_PATIENT
+            elif key == "timestamp":
+                ts_key, exact = timestamp_to_micros(value)
+                if exact:
+                    mask |= _HAS_TIMESTAMP
+                    continue
+                extra_keys.append(key)
+                extra_values.append(value)
+            else:
+                extra_keys.append(key)
+                extra_values.append(self._intern_value(value))
+        
+        row = len(self.values)
+        self.patients.append(self._intern_patient(event.get("patient_id")))
+        self.types.append(self._intern_type(event.get("type")))
+        self.timestamps.append(ts_key)
+        self.shapes.append(self._intern_shape((mask, tuple(extra_keys))))
+        self.values.append(tuple(extra_values))
+        return row
+    
+    def get(self, row: int) -> Dict[str, Any]:
+        """Dict view of one event"""
+        mask, keys = self._shapes[self.shapes[row]]
+        event: Dict[str, Any] = {}
+        if mask & _HAS_TYPE:
+            event["type"] = self.type_names[self.types[row]]
+        if mask & _HAS_PATIENT:
+            event["patient_id"] = self.patient_ids[self.patients[row]]
+        event.update(zip(keys, self.values[row]))
+        if mask & _HAS_TIMESTAMP:
+            event["timestamp"] = micros_to_timestamp(self.timestamps[row])
+        return event
+    
+    def iter_events(self, rows: Optional[Iterable[int]] = None) -> Iterator[Dict[str, Any]]:
+        """Dict views of the given rows (default: all rows, in insertion order)"""
+        get = self.get
+        for row in (range(len(self.values)) if rows is None else rows):
+            yield get(row)
+    
+    def to_state(self) -> Dict[str, Any]:
+        """Copy of the columns as marshal-friendly builtins"""
+        return {
+            "patient_ids": list(self.patient_ids),
+            "type_names": list(self.type_names),
+            "shapes": list(self._shapes),
+            "patients": self.patients.tobytes(),
+            "types": self.types.tobytes(),
+            "timestamps": self.timestamps.tobytes(),
+            "shape_codes": self.shapes.tobytes(),
+            "values": list(self.values),
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "EventStore":
+        """Rebuild a store from to_state() output"""
+        store = cls()
+        store.patient_ids = list(state["patient_ids"])
+        store._patient_codes = {pid: code for code, pid in enumerate(store.patient_ids)}
+        store.type_names = list(state["type_names"])
+        store._type_codes = {name: code for code, name in enumerate(store.type_names)}
+        store._shapes = [(mask, tuple(keys)) for mask, keys in state["shapes"]]
+        store._shape_codes = {shape: code for code, shape in enumerate(store._shapes)}
+        store.patients.frombytes(state["patients"])
+        store.types.frombytes(state["types"])
+        store.timestamps.frombytes(state["timestamps"])
+        store.shapes.frombytes(state["shape_codes"])
+        store.values = state["values"]
+        return store
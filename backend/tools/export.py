@@ -0,0 +1,226 @@
+"""Bulk export - clinician summaries for every patient to CSV or Parquet"""
+from typing import Dict, Any, Callable, List, Optional, Iterator
+import argparse
+import csv
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from ..tools.logger import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+logger = get_logger(__name__)
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+# One row per patient; list fields are joined with LIST_SEPARATOR
+COLUMNS = [
+    "patient_id", "patient_name", "adherence_rate", "total_doses", "taken_doses",
+    "missed_doses", "medication_count", "interaction_count", "interactions",
+    "alert_count", "alerts", "recent_symptoms",
+]
+LIST_SEPARATOR = "; "
+
+# Read-only storage handle of a worker process, opened by _open_worker_storage
+_worker_memory = None
+
+
+def summary_row(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a generate_summary() result into an export row"""
+    return {
+        "patient_id": summary["patient_id"],
+        "patient_name": summary.get("patient_name"),
+        "adherence_rate": summary["adherence_rate"],
+        "total_doses": summary["total_doses"],
+        "taken_doses": summary["taken_doses"],
+        "missed_doses": summary["missed_doses"],
+        "medication_count": summary["medication_count"],
+        "interaction_count": len(summary["interactions_detected"]),
+        "interactions": LIST_SEPARATOR.join(str(i) for i in summary["interactions_detected"]),
+        "alert_count": len(summary["alerts"]),
+        "alerts": LIST_SEPARATOR.join(summary["alerts"]),
+        "recent_symptoms": LIST_SEPARATOR.join(str(s.get("symptom")) for s in summary["recent_symptoms"]),
+    }
+
+
+class _ChunkStore:
+    """The storage surface AnalyticsAgent reads, limited to one chunk of patients"""
+    
+    def __init__(self, memory, patient_ids: List[str]):
+        self.memory = memory
+        self.patient_ids = patient_ids
+    
+    def get_patient(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        return self.memory.get_patient(patient_id)
+    
+    def add_listener(self, listener: Callable[[Optional[Dict[str, Any]]], None]) -> None:
+        for patient_id in self.patient_ids:
+            for event in self.memory.get_patient_events(patient_id):
+                listener(event)
+
+
+def _open_worker_storage(storage: Optional[str], data_file: Optional[str]) -> None:
+    """Pool initializer: open the worker's own read-only storage handle"""
+    global _worker_memory
+    from .persistence import create_memory_bank
+    _worker_memory = create_memory_bank(storage, data_file, read_only=True)
+
+
+def _export_chunk(part: int, patient_ids: List[str], output_dir: str, fmt: str) -> Dict[str, Any]:
+    """Summarize one chunk of patients from the worker's storage into its own part file"""
+    from ..agents.analytics_agent import AnalyticsAgent
+    
+    analytics = AnalyticsAgent(_ChunkStore(_worker_memory, patient_ids))
+    return _write_part(part, _summary_rows(analytics, patient_ids), output_dir, fmt)
+
+
+def _summary_rows(analytics, patient_ids: List[str]) -> List[Dict[str, Any]]:
+    """Export rows of the stored patients among patient_ids"""
+    rows = []
+    for patient_id in patient_ids:
+        summary = analytics.generate_summary(patient_id)
+        if "error" not in summary:
+            rows.append(summary_row(summary))
+    return rows
+
+
+def _write_part(part: int, rows: List[Dict[str, Any]], output_dir: str, fmt: str) -> Dict[str, Any]:
+    """Write rows to the part file numbered part"""
+    path = Path(output_dir) / f"part-{part:05d}.{fmt}"
+    if fmt == "csv":
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        table = pa.Table.from_pylist(rows, schema=_parquet_schema())
+        pq.write_table(table, path)
+    return {"file": str(path), "rows": len(rows)}
+
+
+def _parquet_schema():
+    """Arrow schema of the export rows"""
+    text, count = pa.string(), pa.int64()
+    types = {"adherence_rate": pa.float64()}
+    for column in ("total_doses", "taken_doses", "missed_doses", "medication_count",
+                   "interaction_count", "alert_count"):
+        types[column] = count
+    return pa.schema([(column, types.get(column, text)) for column in COLUMNS])
+
+
+def _chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def export_summaries(
+    patient_ids: List[str],
+    output_dir: str,
+    fmt: str = "csv",
+    workers: Optional[int] = None,
+    chunk_size: int = 1000,
+    storage: Optional[str] = None,
+    data_file: Optional[str] = None,
+    analytics=None
+) -> Dict[str, Any]:
+    """
+    Export clinician summaries, one part file per chunk of chunk_size patients
+    
+    With analytics (e.g. the server's AnalyticsAgent), rows are built in this
+    process from its running aggregates; no event is read. Otherwise a pool
+    of worker processes opens the storage read-only, one handle per worker,
+    and each worker reads and summarizes only the patients of its chunks.
+    This process hands out patient IDs, never patient data.
+    
+    Args:
+        patient_ids: Patients to export
+        output_dir: Directory for the part files (created if missing)
+        fmt: csv or parquet (parquet requires pyarrow)
+        workers: Worker processes (default: CPU count); unused with analytics
+        chunk_size: Patients per part file
+        storage: Storage engine, as for create_memory_bank
+        data_file: Storage path, as for create_memory_bank
+        analytics: AnalyticsAgent whose aggregates cover patient_ids
+    
+    Returns:
+        Manifest with the written files and row counts
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {EXPORT_FORMATS}")
+    if fmt == "parquet" and pa is None:
+        raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    chunks = list(_chunks(patient_ids, chunk_size))
+    
+    if analytics is not None:
+        workers = 0
+        parts = [
+            _write_part(part, _summary_rows(analytics, chunk), str(output), fmt)
+            for part, chunk in enumerate(chunks)
+        ]
+    else:
+        workers = workers or os.cpu_count() or 1
+        # spawn: the parent may be a server with live writer threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_open_worker_storage,
+                                 initargs=(storage, data_file)) as pool:
+            futures = [
+                pool.submit(_export_chunk, part, chunk, str(output), fmt)
+                for part, chunk in enumerate(chunks)
+            ]
+            parts = [future.result() for future in futures]
+    
+    manifest = {
+        "format": fmt,
+        "output_dir": str(output),
+        "files": [part["file"] for part in parts],
+        "rows": sum(part["rows"] for part in parts),
+        "workers": workers,
+        "elapsed_s": round(time.perf_counter() - start, 3),
+    }
+    logger.info(f"Exported {manifest['rows']} summaries to {len(parts)} {fmt} files in {output}")
+    return manifest
+
+
+def main() -> None:
+    """Command line entry point for the bulk export"""
+    parser = argparse.ArgumentParser(description="Export clinician summaries for every patient")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--output", default=None,
+                        help="Output directory (default: backend/data/exports/<timestamp>)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--storage", default=None, help="json, journal or sqlite (default: MEDIBUDDY_STORAGE)")
+    parser.add_argument("--data-file", default=None, help="Storage path (default: MEDIBUDDY_DATA_FILE)")
+    args = parser.parse_args()
+    
+    from .persistence import create_memory_bank
+    
+    memory = create_memory_bank(args.storage, args.data_file, read_only=True)
+    try:
+        patient_ids = [p["patient_id"] for p in memory.get_all_patients()]
+    finally:
+        memory.close()
+    output = args.output or f"backend/data/exports/{datetime.now():%Y%m%d-%H%M%S}"
+    manifest = export_summaries(
+        patient_ids, output, fmt=args.format, workers=args.workers,
+        chunk_size=args.chunk_size, storage=args.storage, data_file=args.data_file
+    )
+    print(f"Exported {manifest['rows']} patients to {manifest['output_dir']} in {manifest['elapsed_s']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Group commit - coalesce concurrent persistence writes into batched flushes"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Future
+import queue
+import threading
+import time
+from ..tools.logger import get_logger
+
+logger = get_logger(__name__)
+
+# fsync:    fsync every batch; callers are acknowledged once their batch is on disk
+# interval: fsync at most every sync_interval_ms; callers are acknowledged once the
+#           batch reaches the OS, so a crash can lose at most one interval of writes
+# os:       only fsync on close; callers are acknowledged once the batch reaches the OS
+DURABILITY_MODES = ("fsync", "interval", "os")
+
+
+class GroupCommitWriter:
+    """
+    Background writer that batches records from many callers into one flush
+    
+    Records submitted while a flush is in progress are written together in
+    the next flush (up to max_batch). A non-zero batch_window_ms also waits
+    that long after the first record for more to arrive.
+    """
+    
+    def __init__(
+        self,
+        write_batch: Callable[[List[Any], bool], None],
+        durability: str = "fsync",
+        batch_window_ms: float = 0.0,
+        max_batch: int = 512,
+        sync_interval_ms: float = 100.0,
+        name: str = "group-commit"
+    ):
+        """
+        Args:
+            write_batch: Called with (records, sync); must write the records and
+                fsync when sync is True. Called with no records to sync only.
+            durability: One of DURABILITY_MODES
+            batch_window_ms: How long to wait for more records after the first one
+            max_batch: Maximum records per flush
+            sync_interval_ms: fsync period in "interval" mode
+            name: Writer thread name
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability '{durability}', expected one of {DURABILITY_MODES}")
+        self.durability = durability
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.sync_interval = sync_interval_ms / 1000.0
+        self.stats: Dict[str, int] = {"batches": 0, "records": 0, "syncs": 0}
+        
+        self._write_batch = write_batch
+        self._queue: "queue.Queue[Optional[Tuple[Any, Future]]]" = queue.Queue()
+        self._state_lock = threading.Lock()
+        self._closed = False
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        logger.info(f"GroupCommitWriter started ({durability}, window {batch_window_ms}ms, max {max_batch})")
+    
+    def submit(self, record: Any) -> Future:
+        """Queue a record; the returned future resolves once its batch is acknowledged"""
+        future: Future = Future()
+        with self._state_lock:
+            if self._closed:
+                raise RuntimeError("GroupCommitWriter is closed")
+            self._queue.put((record, future))
+        return future
+    
+    def write(self, record: Any, timeout: Optional[float] = None) -> None:
+        """Queue a record and block until its batch is acknowledged"""
+        self.submit(record).result(timeout)
+    
+    def close(self) -> None:
+        """Flush outstanding records, sync, and stop the writer thread"""
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+    
+    def _run(self) -> None:
+        """Writer loop"""
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self._idle_timeout())
+            except queue.Empty:
+                # Interval mode: nothing new arrived, sync what is already written
+                self._commit([], sync=True)
+                continue
+            if item is None:
+                break
+            
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                try:
+                    remaining = deadline - time.monotonic()
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            self._commit(batch, sync=self._should_sync())
+        
+        if self._dirty:
+            self._commit([], sync=True)
+    
+    def _idle_timeout(self) -> Optional[float]:
+        """How long to wait for new records before a pending interval sync is due"""
+        if self.durability != "interval" or not self._dirty:
+            return None
+        return max(0.0, self._last_sync + self.sync_interval - time.monotonic())
+    
+    def _should_sync(self) -> bool:
+        """Whether the next batch must be fsynced"""
+        if self.durability == "fsync":
+            return True
+        if self.durability == "interval":
+            return time.monotonic() - self._last_sync >= self.sync_interval
+        return False
+    
+    def _commit(self, batch: List[Tuple[Any, Future]], sync: bool) -> None:
+        """Write one batch and acknowledge its callers"""
+        records = [record for record, _ in batch]
+        try:
+            self._write_batch(records, sync)
+        except Exception as e:
+            logger.error(f"Group commit of {len(records)} records failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        
+        if sync:
+            self._dirty = False
+            self._last_sync = time.monotonic()
+            self.stats["syncs"] += 1
+        elif records:
+            self._dirty = True
+        if records:
+            self.stats["batches"] += 1
+            self.stats["records"] += len(records)
+        
+        for _, future in batch:
+            future.set_result(None)
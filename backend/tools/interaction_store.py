@@ -0,0 +1,341 @@
+"""Interaction store - bulk-loaded, memory-mapped drug interaction database"""
+from typing import Dict, List, Optional, Iterable, Iterator, Tuple
+from array import array
+from bisect import bisect_left
+import argparse
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from pathlib import Path
+from ..tools.med_db import MedicationDB
+from ..tools.drug_names import get_drug_normalizer
+from ..tools.logger import get_logger
+
+logger = get_logger(__name__)
+
+STORE_MAGIC = b"MBIX"
+STORE_FORMAT = 1
+DEFAULT_COLUMNS = ("drug_a", "drug_b", "warning")
+
+# magic, format, byte order (0 little, 1 big), names, warnings, adjacency entries
+_HEADER = struct.Struct("<4sIIIIQ")
+
+
+def _hash_slots(count: int) -> int:
+    """Size of the open-addressing name hash table: a power of two >= 2 * count"""
+    slots = 8
+    while slots < 2 * count:
+        slots *= 2
+    return slots
+
+
+class _StringTable:
+    """
+    Read-only sequence of UTF-8 strings stored as an offsets array plus a blob
+    
+    Items are returned as bytes so names can be compared without decoding.
+    """
+    
+    def __init__(self, buffer: mmap.mmap, offsets: memoryview, blob_start: int):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._blob_start = blob_start
+    
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+    
+    def __getitem__(self, index: int) -> bytes:
+        start = self._blob_start + self._offsets[index]
+        return self._buffer[start:self._blob_start + self._offsets[index + 1]]
+
+
+def _string_section(values: List[bytes]) -> Tuple[array, bytes]:
+    """Offsets array and blob of a string table"""
+    offsets = array("I", [0])
+    for value in values:
+        offsets.append(offsets[-1] + len(value))
+    return offsets, b"".join(values)
+
+
+def _pad(size: int) -> int:
+    """Bytes needed to align size to 8"""
+    return -size % 8
+
+
+def write_interaction_store(rows: Iterable[Tuple[str, str, str]], output_file: str) -> Dict[str, int]:
+    """
+    Build a memory-mappable interaction file
+    
+    Layout (native byte order, sections 8-byte aligned): header, drug name
+    table sorted by UTF-8 bytes (a drug's ID is its position), a linear-probing
+    hash table of name CRC32 -> ID + 1, warning table, then a CSR adjacency: per-drug row offsets, and for each drug its
+    neighbour IDs in ascending order with the matching warning IDs. Every
+    rule is stored in both directions; a repeated pair keeps the last warning.
+    Drug names are stored as canonical names (see DrugNameNormalizer.canonical).
+    
+    Args:
+        rows: (drug, drug, warning) rules
+        output_file: Target path, replaced atomically
+    
+    Returns:
+        Counts of drugs, warnings and rules written
+    """
+    canonical = get_drug_normalizer().canonical
+    pairs: Dict[Tuple[str, str], str] = {}
+    for med1, med2, warning in rows:
+        med1, med2 = canonical(med1), canonical(med2)
+        if med1 and med2:
+            pairs[(med1, med2) if med1 <= med2 else (med2, med1)] = warning
+    
+    names = sorted({name for pair in pairs for name in pair}, key=lambda n: n.encode("utf-8"))
+    ids = {name: i for i, name in enumerate(names)}
+    warnings = sorted(set(pairs.values()))
+    warning_ids = {warning: i for i, warning in enumerate(warnings)}
+    
+    adjacency: List[List[Tuple[int, int]]] = [[] for _ in names]
+    for (med1, med2), warning in pairs.items():
+        id1, id2, wid = ids[med1], ids[med2], warning_ids[warning]
+        adjacency[id1].append((id2, wid))
+        if id1 != id2:
+            adjacency[id2].append((id1, wid))
+    
+    row_offsets = array("I", [0])
+    neighbors = array("I")
+    neighbor_warnings = array("I")
+    for entries in adjacency:
+        entries.sort()
+        neighbors.extend(other for other, _ in entries)
+        neighbor_warnings.extend(wid for _, wid in entries)
+        row_offsets.append(len(neighbors))
+    
+    encoded = [n.encode("utf-8") for n in names]
+    name_offsets, name_blob = _string_section(encoded)
+    name_hash = array("I", bytes(4 * _hash_slots(len(names))))
+    mask = len(name_hash) - 1
+    for drug_id, name in enumerate(encoded):
+        slot = zlib.crc32(name) & mask
+        while name_hash[slot]:
+            slot = (slot + 1) & mask
+        name_hash[slot] = drug_id + 1
+    warning_offsets, warning_blob = _string_section([w.encode("utf-8") for w in warnings])
+    sections = [name_offsets, name_blob, name_hash, warning_offsets, warning_blob,
+                row_offsets, neighbors, neighbor_warnings]
+    
+    output = Path(output_file)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = output.with_suffix(output.suffix + ".tmp")
+    with open(tmp_file, 'wb') as f:
+        f.write(_HEADER.pack(STORE_MAGIC, STORE_FORMAT, int(sys.byteorder == "big"),
+                             len(names), len(warnings), len(neighbors)))
+        f.write(b"\0" * _pad(_HEADER.size))
+        # Blob sizes are implied by the last offset of their table
+        for section in sections:
+            data = section.tobytes() if isinstance(section, array) else section
+            f.write(data)
+            f.write(b"\0" * _pad(len(data)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, output)
+    
+    stats = {"drugs": len(names), "warnings": len(warnings), "interactions": len(pairs)}
+    logger.info(f"Wrote interaction store {output}: {stats}")
+    return stats
+
+
+def read_interaction_rows(source_file: str, columns: Tuple[str, str, str] = DEFAULT_COLUMNS) -> Iterator[Tuple[str, str, str]]:
+    """
+    Stream rules from a CSV file with a header row, or a JSON list of
+    objects or [drug, drug, warning] triples
+    
+    Args:
+        source_file: .csv or .json dataset
+        columns: Names of the two drug columns and the warning column
+    """
+    path = Path(source_file)
+    if path.suffix.lower() == ".csv":
+        with open(path, newline='', encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            missing = [c for c in columns if c not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"{path} is missing columns {missing}")
+            for row in reader:
+                yield row[columns[0]], row[columns[1]], row[columns[2]]
+    else:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for item in data:
+            if isinstance(item, dict):
+                yield item[columns[0]], item[columns[1]], item[columns[2]]
+            else:
+                yield item[0], item[1], item[2]
+
+
+class MappedInteractionDB:
+    """
+    Read-only MedicationDB backed by a memory-mapped interaction store
+    
+    Nothing is parsed at open: names are found through the stored hash table
+    and rules by bisecting a drug's sorted neighbour IDs, all directly on the
+    mapped pages, which the OS shares between processes.
+    """
+    
+    def __init__(self, store_file: str):
+        self.store_file = Path(store_file)
+        with open(self.store_file, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, big_endian, n_names, n_warnings, n_entries = _HEADER.unpack_from(self._buffer)
+        if magic != STORE_MAGIC or version != STORE_FORMAT:
+            self._buffer.close()
+            raise ValueError(f"{self.store_file} is not an interaction store (format {STORE_FORMAT})")
+        if big_endian != int(sys.byteorder == "big"):
+            self._buffer.close()
+            raise ValueError(f"{self.store_file} was built on a machine with a different byte order")
+        
+        view = self._view = memoryview(self._buffer)
+        position = _HEADER.size + _pad(_HEADER.size)
+        
+        def uint32s(count: int) -> memoryview:
+            nonlocal position
+            section = view[position:position + 4 * count].cast("I")
+            position += 4 * count + _pad(4 * count)
+            return section
+        
+        def blob(size: int) -> int:
+            nonlocal position
+            start = position
+            position += size + _pad(size)
+            return start
+        
+        name_offsets = uint32s(n_names + 1)
+        self._names = _StringTable(self._buffer, name_offsets, blob(name_offsets[-1]))
+        self._name_hash = uint32s(_hash_slots(n_names))
+        self._mask = len(self._name_hash) - 1
+        warning_offsets = uint32s(n_warnings + 1)
+        self._warnings = _StringTable(self._buffer, warning_offsets, blob(warning_offsets[-1]))
+        self._rows = uint32s(n_names + 1)
+        self._neighbors = uint32s(n_entries)
+        self._neighbor_warnings = uint32s(n_entries)
+        logger.info(f"Mapped interaction store {self.store_file} ({n_names} drugs)")
+    
+    normalize = staticmethod(MedicationDB.normalize)
+    # The store never changes; see MedicationDB.version
+    version = 0
+    
+    def drug_id(self, name: str) -> Optional[int]:
+        """ID of a drug name, or None if no rule mentions it"""
+        key = self.normalize(name).encode("utf-8")
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            entry = self._name_hash[slot]
+            if not entry:
+                return None
+            if self._names[entry - 1] == key:
+                return entry - 1
+            slot = (slot + 1) & self._mask
+    
+    def drug_name(self, drug_id: int) -> str:
+        """Normalized name of a drug ID"""
+        return self._names[drug_id].decode("utf-8")
+    
+    def _warning(self, id1: int, id2: int) -> Optional[str]:
+        """Warning for a pair of drug IDs, if any"""
+        lo, hi = self._rows[id1], self._rows[id1 + 1]
+        index = bisect_left(self._neighbors, id2, lo, hi)
+        if index < hi and self._neighbors[index] == id2:
+            return self._warnings[self._neighbor_warnings[index]].decode("utf-8")
+        return None
+    
+    def neighbors(self, drug_id: int) -> Dict[int, str]:
+        """Drugs interacting with drug_id, mapped to the warning"""
+        lo, hi = self._rows[drug_id], self._rows[drug_id + 1]
+        return {
+            self._neighbors[i]: self._warnings[self._neighbor_warnings[i]].decode("utf-8")
+            for i in range(lo, hi)
+        }
+    
+    def adjacency_size(self) -> int:
+        """Number of (drug, neighbour) entries, each rule counted in both directions"""
+        return len(self._neighbors)
+    
+    def check_interaction(self, med1: str, med2: str) -> Optional[str]:
+        """
+        Check for interaction between two medications
+        
+        Args:
+            med1: First medication name
+            med2: Second medication name
+        
+        Returns:
+            Interaction warning or None
+        """
+        id1 = self.drug_id(med1)
+        id2 = self.drug_id(med2)
+        if id1 is None or id2 is None:
+            return None
+        return self._warning(id1, id2)
+    
+    def find_interactions(self, medications: List[str]) -> List[Tuple[int, int, str]]:
+        """
+        Find every interacting pair in a medication list
+        
+        Args:
+            medications: List of medication names
+        
+        Returns:
+            (i, j, warning) for each interacting pair of list positions, i < j,
+            in the order a pairwise scan of the list would report them
+        """
+        positions: Dict[int, List[int]] = {}
+        for index, name in enumerate(medications):
+            drug_id = self.drug_id(name)
+            if drug_id is not None:
+                positions.setdefault(drug_id, []).append(index)
+        
+        found = []
+        drug_ids = sorted(positions)
+        for n, drug_id in enumerate(drug_ids):
+            for other in drug_ids[n:]:
+                warning = self._warning(drug_id, other)
+                if warning is None:
+                    continue
+                for i in positions[drug_id]:
+                    for j in positions[other]:
+                        if i != j and (other != drug_id or i < j):
+                            found.append((min(i, j), max(i, j), warning))
+        found.sort()
+        return found
+    
+    def add_interaction(self, med1: str, med2: str, warning: str) -> None:
+        """The mapped store is immutable; rebuild it with write_interaction_store"""
+        raise ValueError(f"Interaction store {self.store_file} is read-only")
+    
+    def close(self) -> None:
+        """Unmap the store"""
+        for section in (self._rows, self._neighbors, self._neighbor_warnings, self._name_hash,
+                        self._names._offsets, self._warnings._offsets, self._view):
+            section.release()
+        self._buffer.close()
+
+
+def main() -> None:
+    """Command line entry point for building an interaction store"""
+    parser = argparse.ArgumentParser(description="Build a memory-mapped interaction store from CSV/JSON")
+    parser.add_argument("source", help="Interaction dataset (.csv with a header row, or .json)")
+    parser.add_argument("target", nargs="?", default="backend/data/interactions.bin",
+                        help="Interaction store to create")
+    parser.add_argument("--columns", default=",".join(DEFAULT_COLUMNS),
+                        help="Drug, drug and warning column names (default: %(default)s)")
+    args = parser.parse_args()
+    columns = tuple(args.columns.split(","))
+    if len(columns) != 3:
+        parser.error("--columns needs exactly three names")
+    stats = write_interaction_store(read_interaction_rows(args.source, columns), args.target)
+    print(f"Wrote {stats['interactions']} interactions between {stats['drugs']} drugs to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
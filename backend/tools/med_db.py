@@ -1,14 +1,30 @@
 """Medication Database - Stub with common interactions"""
-from typing import Dict, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from datetime import datetime
+from pathlib import Path
+import os
+import threading
+import time
 from ..tools.logger import get_logger
 
 logger = get_logger(__name__)
 
 
 class MedicationDB:
-    """Stub medication database with interaction checking"""
+    """
+    Stub medication database with interaction checking
     
-    def __init__(self):
+    Drug names are normalized and interned to integer IDs, and every rule is
+    kept in an adjacency index (drug ID -> {interacting drug ID: warning})
+    in both directions, so checking a medication list only visits each
+    drug's known neighbours instead of every pair.
+    """
+    
+    def __init__(self, rules: Optional[Iterable[Tuple[str, str, str]]] = None):
+        """
+        Args:
+            rules: (drug, drug, warning) rules replacing the built-in ones
+        """
         # Common medication interactions
         self.interactions: Dict[tuple, str] = {
             ("aspirin", "warfarin"): "Increased bleeding risk",
@@ -24,8 +40,56 @@ class MedicationDB:
             ("levothyroxine", "calcium"): "Reduced absorption",
             ("calcium", "levothyroxine"): "Reduced absorption",
         }
+        if rules is not None:
+            self.interactions = {
+                (self.normalize(med1), self.normalize(med2)): warning for med1, med2, warning in rules
+            }
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._adjacency: Dict[int, Dict[int, str]] = {}
+        # Incremented on every rule change, for caches of check results
+        self.version = 0
+        for (med1, med2), warning in self.interactions.items():
+            self._link(med1, med2, warning)
         logger.info(f"MedicationDB initialized with {len(self.interactions)} interactions")
     
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Canonical form of a drug name used for lookups"""
+        return name.strip().lower()
+    
+    def drug_id(self, name: str) -> Optional[int]:
+        """Interned ID of a drug name, or None if no rule mentions it"""
+        return self._ids.get(self.normalize(name))
+    
+    def drug_name(self, drug_id: int) -> str:
+        """Normalized name of an interned drug ID"""
+        return self._names[drug_id]
+    
+    def _intern(self, name: str) -> int:
+        """ID of a drug name, assigning the next ID to new names"""
+        name = self.normalize(name)
+        drug_id = self._ids.get(name)
+        if drug_id is None:
+            drug_id = len(self._names)
+            self._ids[name] = drug_id
+            self._names.append(name)
+        return drug_id
+    
+    def _link(self, med1: str, med2: str, warning: str) -> None:
+        """Record a rule in the adjacency index in both directions"""
+        id1, id2 = self._intern(med1), self._intern(med2)
+        self._adjacency.setdefault(id1, {})[id2] = warning
+        self._adjacency.setdefault(id2, {})[id1] = warning
+    
+    def neighbors(self, drug_id: int) -> Dict[int, str]:
+        """Drugs interacting with drug_id, mapped to the warning"""
+        return self._adjacency.get(drug_id, {})
+    
+    def adjacency_size(self) -> int:
+        """Number of (drug, neighbour) entries, each rule counted in both directions"""
+        return sum(len(neighbors) for neighbors in self._adjacency.values())
+    
     def check_interaction(self, med1: str, med2: str) -> Optional[str]:
         """
         Check for interaction between two medications
@@ -33,17 +97,313 @@ class MedicationDB:
         Args:
             med1: First medication name
             med2: Second medication name
-            
+        
         Returns:
             Interaction warning or None
         """
-        key1 = (med1.lower(), med2.lower())
-        key2 = (med2.lower(), med1.lower())
+        id1 = self.drug_id(med1)
+        id2 = self.drug_id(med2)
+        if id1 is None or id2 is None:
+            return None
+        return self._adjacency.get(id1, {}).get(id2)
+    
+    def find_interactions(self, medications: List[str]) -> List[Tuple[int, int, str]]:
+        """
+        Find every interacting pair in a medication list
+        
+        Each drug's neighbour set is intersected with the drugs on the list,
+        so only pairs with a rule are visited rather than every pair.
+        
+        Args:
+            medications: List of medication names
+        
+        Returns:
+            (i, j, warning) for each interacting pair of list positions, i < j,
+            in the order a pairwise scan of the list would report them
+        """
+        positions: Dict[int, List[int]] = {}
+        for index, name in enumerate(medications):
+            drug_id = self.drug_id(name)
+            if drug_id is not None:
+                positions.setdefault(drug_id, []).append(index)
         
-        return self.interactions.get(key1) or self.interactions.get(key2)
+        found = []
+        for drug_id, indexes in positions.items():
+            neighbors = self._adjacency.get(drug_id)
+            if not neighbors:
+                continue
+            # Key-view intersection iterates the smaller side; each
+            # unordered drug pair is taken once, from its lower ID
+            for other in neighbors.keys() & positions.keys():
+                if other < drug_id:
+                    continue
+                warning = neighbors[other]
+                for i in indexes:
+                    for j in positions[other]:
+                        if i != j and (other != drug_id or i < j):
+                            found.append((min(i, j), max(i, j), warning))
+        found.sort()
+        return found
     
     def add_interaction(self, med1: str, med2: str, warning: str) -> None:
-        """Add new interaction to database"""
-        key = (med1.lower(), med2.lower())
+        """
+        Add new interaction to database
+        
+        Names are resolved to their canonical generic name, as patient
+        medications are before lookup, so a rule added by brand name matches.
+        """
+        from .drug_names import get_drug_normalizer
+        canonical = get_drug_normalizer().canonical
+        med1, med2 = canonical(med1), canonical(med2)
+        key = (self.normalize(med1), self.normalize(med2))
         self.interactions[key] = warning
+        self._link(med1, med2, warning)
+        self.version += 1
         logger.info(f"Added interaction: {med1} + {med2}")
+
+
+def create_medication_db(store_file: Optional[str] = None):
+    """
+    Build the interaction database selected by configuration
+    
+    Args:
+        store_file: Interaction store built by backend.tools.interaction_store,
+            or a CSV/JSON rule file in the format it reads (default:
+            MEDIBUDDY_INTERACTIONS_FILE); without one, the built-in rules are used
+    
+    Returns:
+        A MedicationDB, or a MappedInteractionDB over a store file
+    """
+    store_file = store_file or os.getenv("MEDIBUDDY_INTERACTIONS_FILE")
+    if not store_file:
+        return MedicationDB()
+    from .interaction_store import MappedInteractionDB, read_interaction_rows
+    if Path(store_file).suffix.lower() in (".csv", ".json"):
+        from .drug_names import get_drug_normalizer
+        canonical = get_drug_normalizer().canonical
+        return MedicationDB(rules=(
+            (canonical(med1), canonical(med2), warning)
+            for med1, med2, warning in read_interaction_rows(store_file)
+        ))
+    return MappedInteractionDB(store_file)
+
+
+# A reload keeping fewer than this share of the current rules is rejected as
+# a truncated or half-written rule file, unless forced
+MIN_RELOAD_RATIO = 0.5
+
+
+class SharedMedicationDB:
+    """
+    Process-wide interaction database with hot reload
+    
+    Checks run against the current index, which is never modified once
+    published: reload() and add_interaction() build a new index next to it
+    and replace the reference in one assignment. A check that started on
+    the old index finishes on it, and no check waits for a reload. version
+    changes with every swap, for caches of check results.
+    """
+    
+    def __init__(self, rules_file: Optional[str] = None):
+        self.rules_file = rules_file or os.getenv("MEDIBUDDY_INTERACTIONS_FILE")
+        self._current = create_medication_db(self.rules_file)
+        self._generation = 0
+        self._rules_mtime = self._mtime()
+        # Serializes writers (reload, add_interaction); readers never take it
+        self._write_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self.metrics: Dict[str, Any] = {
+            "reloads": 0,
+            "reload_failures": 0,
+            "last_build_ms": None,
+            "last_swap_us": None,
+            "last_error": None,
+            "loaded_at": datetime.now().isoformat(),
+        }
+    
+    @property
+    def index(self):
+        """The current MedicationDB or MappedInteractionDB"""
+        return self._current
+    
+    @property
+    def version(self) -> int:
+        return self._generation
+    
+    def _mtime(self) -> Optional[float]:
+        if self.rules_file and os.path.exists(self.rules_file):
+            return os.stat(self.rules_file).st_mtime
+        return None
+    
+    def _swap(self, index) -> float:
+        """Publish a new index; returns the time the swap took, in seconds"""
+        start = time.perf_counter()
+        self._current = index
+        self._generation += 1
+        return time.perf_counter() - start
+    
+    def reload(self, rules_file: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """
+        Build a new index from the rule file and swap it in
+        
+        Checks keep running against the previous index while it is built.
+        On failure the previous index stays in place and the error is raised.
+        A file yielding no rules, or fewer than MIN_RELOAD_RATIO of the
+        current ones, is taken as truncated and fails with ValueError.
+        Only this process's index is swapped; other workers reload on their
+        own (see start_watching).
+        
+        Args:
+            rules_file: New rule file (default: the current one)
+            force: Accept any number of rules
+        
+        Returns:
+            The metrics after the swap
+        """
+        with self._write_lock:
+            rules_file = rules_file or self.rules_file
+            mtime = os.stat(rules_file).st_mtime if rules_file and os.path.exists(rules_file) else None
+            start = time.perf_counter()
+            try:
+                index = create_medication_db(rules_file)
+                if not force:
+                    self._check_rule_count(index)
+            except Exception as e:
+                self.metrics["reload_failures"] += 1
+                self.metrics["last_error"] = str(e)
+                logger.error(f"Interaction rule reload from {rules_file} failed: {e}")
+                raise
+            build = time.perf_counter() - start
+            swap = self._swap(index)
+            self.rules_file = rules_file
+            self._rules_mtime = mtime
+            self.metrics.update({
+                "reloads": self.metrics["reloads"] + 1,
+                "last_build_ms": round(build * 1000, 3),
+                "last_swap_us": round(swap * 1e6, 3),
+                "last_error": None,
+                "loaded_at": datetime.now().isoformat(),
+            })
+        logger.info(f"Reloaded interaction rules from {rules_file or 'built-in rules'} in {build * 1000:.1f} ms")
+        return self.get_metrics()
+    
+    def _check_rule_count(self, index) -> None:
+        """Reject an index with no rules or far fewer than the current one"""
+        size, current = index.adjacency_size(), self._current.adjacency_size()
+        if size == 0 or size < current * MIN_RELOAD_RATIO:
+            raise ValueError(
+                f"New rules have {size} entries against {current} loaded; "
+                "the file looks truncated (reload with force to accept it)"
+            )
+    
+    def _file_state(self) -> Optional[Tuple[float, int]]:
+        """Modification time and size of the rule file"""
+        if self.rules_file and os.path.exists(self.rules_file):
+            stat = os.stat(self.rules_file)
+            return stat.st_mtime, stat.st_size
+        return None
+    
+    def start_watching(self, interval_s: float = 30.0, settle_s: float = 1.0) -> None:
+        """
+        Start a background job that reloads the rule file when it changes
+        
+        A changed file is reloaded once its modification time and size have
+        held still for settle_s seconds, so a file still being written is
+        not loaded half-way.
+        
+        Args:
+            interval_s: Seconds between modification time checks
+            settle_s: Seconds the file must stay unchanged before reloading
+        """
+        if not self.rules_file or self._watcher is not None:
+            return
+        
+        def run() -> None:
+            while not self._stop_watching.wait(interval_s):
+                if self._mtime() == self._rules_mtime:
+                    continue
+                state = self._file_state()
+                while not self._stop_watching.wait(settle_s):
+                    current, state = state, self._file_state()
+                    if current == state:
+                        break
+                else:
+                    return
+                try:
+                    self.reload()
+                except Exception:
+                    # Logged by reload; retried on the next change
+                    self._rules_mtime = self._mtime()
+        
+        self._watcher = threading.Thread(target=run, name="medication-db-reload", daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching {self.rules_file} for rule changes every {interval_s}s")
+    
+    def stop_watching(self) -> None:
+        """Stop the background reload job"""
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+            self._stop_watching.clear()
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Reload metrics and the current index"""
+        index = self._current
+        return {
+            **self.metrics,
+            "version": self._generation,
+            "rules_file": self.rules_file,
+            "index": type(index).__name__,
+            "adjacency_size": index.adjacency_size(),
+            "watching": self._watcher is not None,
+        }
+    
+    def normalize(self, name: str) -> str:
+        return self._current.normalize(name)
+    
+    def drug_id(self, name: str) -> Optional[int]:
+        return self._current.drug_id(name)
+    
+    def check_interaction(self, med1: str, med2: str) -> Optional[str]:
+        """Check for interaction between two medications (see MedicationDB)"""
+        return self._current.check_interaction(med1, med2)
+    
+    def find_interactions(self, medications: List[str]) -> List[Tuple[int, int, str]]:
+        """Find every interacting pair in a medication list (see MedicationDB)"""
+        return self._current.find_interactions(medications)
+    
+    def add_interaction(self, med1: str, med2: str, warning: str) -> None:
+        """Add a rule by publishing a copy of the current index that includes it"""
+        from .drug_names import get_drug_normalizer
+        canonical = get_drug_normalizer().canonical
+        med1, med2 = canonical(med1), canonical(med2)
+        with self._write_lock:
+            current = self._current
+            if not isinstance(current, MedicationDB):
+                raise ValueError("Rules loaded from an interaction store are read-only; rebuild the store")
+            index = MedicationDB(rules=[(a, b, w) for (a, b), w in current.interactions.items()])
+            index.add_interaction(med1, med2, warning)
+            self._swap(index)
+
+
+_shared_db: Optional[SharedMedicationDB] = None
+_shared_lock = threading.Lock()
+
+
+def get_medication_db() -> SharedMedicationDB:
+    """
+    The process-wide interaction database
+    
+    MEDIBUDDY_INTERACTIONS_RELOAD_S > 0 reloads the rule file in the
+    background whenever it changes.
+    """
+    global _shared_db
+    with _shared_lock:
+        if _shared_db is None:
+            _shared_db = SharedMedicationDB()
+            interval = float(os.getenv("MEDIBUDDY_INTERACTIONS_RELOAD_S", "0"))
+            if interval > 0:
+                _shared_db.start_watching(interval)
+        return _shared_db
@@ -0,0 +1,168 @@
+"""Append-only notification outbox with segment rotation"""
+from typing import Dict, Any, List, Optional, IO
+from collections import deque
+import json
+import os
+import threading
+from pathlib import Path
+from ..tools.group_commit import GroupCommitWriter
+from ..tools.logger import get_logger
+
+logger = get_logger(__name__)
+
+SEGMENT_PREFIX = "outbox-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class NotificationOutbox:
+    """
+    Append-only JSON Lines outbox for caregiver notifications
+    
+    Notifications are queued and written by a background GroupCommitWriter,
+    so callers never wait for disk. The outbox is split into numbered
+    segments; a new segment is started once the current one reaches
+    segment_bytes, and only the newest max_segments are kept (if set).
+    The most recent notifications of each patient are kept in memory
+    for recent() queries.
+    """
+    
+    def __init__(
+        self,
+        outbox_dir: str = "backend/data/notifications",
+        segment_bytes: int = 4 * 1024 * 1024,
+        max_segments: Optional[int] = None,
+        recent_per_patient: int = 50,
+        durability: str = "interval",
+        legacy_file: Optional[str] = None
+    ):
+        """
+        Args:
+            outbox_dir: Directory holding the outbox segments
+            segment_bytes: Size at which a new segment is started
+            max_segments: Number of segments to keep (None keeps all)
+            recent_per_patient: Notifications per patient kept for recent()
+            durability: GroupCommitWriter durability mode
+            legacy_file: JSON array of notifications imported on first use
+        """
+        self.outbox_dir = Path(outbox_dir)
+        self.outbox_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.recent_per_patient = recent_per_patient
+        self._recent: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._segment: Optional[IO[str]] = None
+        
+        segments = self._segments()
+        if not segments and legacy_file and Path(legacy_file).exists():
+            self._import_legacy(Path(legacy_file))
+            segments = self._segments()
+        for segment in segments:
+            self._load_segment(segment)
+        self._segment_number = self._number(segments[-1]) if segments else 1
+        
+        self._writer = GroupCommitWriter(self._write_batch, durability=durability, name="notification-outbox")
+        logger.info(f"NotificationOutbox initialized with {len(segments)} segments in {self.outbox_dir}")
+    
+    @staticmethod
+    def _number(segment: Path) -> int:
+        """Sequence number of a segment file"""
+        return int(segment.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+    
+    def _segments(self) -> List[Path]:
+        """Segment files, oldest first"""
+        return sorted(self.outbox_dir.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"), key=self._number)
+    
+    def _segment_path(self, number: int) -> Path:
+        """Path of a segment by sequence number"""
+        return self.outbox_dir / f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+    
+    def _import_legacy(self, legacy_file: Path) -> None:
+        """Carry over notifications from the old whole-file JSON array"""
+        try:
+            with open(legacy_file, 'r') as f:
+                notifications = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Not importing unreadable {legacy_file}: {e}")
+            return
+        with open(self._segment_path(1), 'w') as f:
+            for notification in notifications:
+                f.write(json.dumps(notification, separators=(",", ":")) + "\n")
+        logger.info(f"Imported {len(notifications)} notifications from {legacy_file}")
+    
+    def _load_segment(self, segment: Path) -> None:
+        """Index the complete records of one segment"""
+        with open(segment, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    self._remember(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    
+    def _remember(self, notification: Dict[str, Any]) -> None:
+        """Add a notification to its patient's recent list"""
+        patient_id = notification.get("patient_id")
+        recent = self._recent.get(patient_id)
+        if recent is None:
+            recent = self._recent[patient_id] = deque(maxlen=self.recent_per_patient)
+        recent.append(notification)
+    
+    def append(self, notification: Dict[str, Any]) -> None:
+        """Queue a notification for writing; returns without waiting for disk"""
+        line = json.dumps(notification, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._remember(notification)
+        self._writer.submit(line)
+    
+    def recent(self, patient_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Most recent notifications for a patient
+        
+        Args:
+            patient_id: Patient identifier
+            limit: Maximum number of notifications
+        
+        Returns:
+            Notifications, newest first
+        """
+        with self._lock:
+            recent = self._recent.get(patient_id)
+            if not recent:
+                return []
+            return [recent[-i] for i in range(1, min(limit, len(recent)) + 1)]
+    
+    def flush(self) -> None:
+        """Block until every queued notification has been written"""
+        self._writer.write("")
+    
+    def close(self) -> None:
+        """Write outstanding notifications and close the current segment"""
+        self._writer.close()
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+    
+    def _write_batch(self, lines: List[str], sync: bool) -> None:
+        """Append a batch to the current segment, rotating when it is full"""
+        if self._segment is None:
+            self._segment = open(self._segment_path(self._segment_number), 'a')
+        if lines:
+            self._segment.write("".join(lines))
+            self._segment.flush()
+        if sync:
+            os.fsync(self._segment.fileno())
+        if self._segment.tell() >= self.segment_bytes:
+            self._rotate()
+    
+    def _rotate(self) -> None:
+        """Start a new segment and drop segments beyond max_segments"""
+        os.fsync(self._segment.fileno())
+        self._segment.close()
+        self._segment_number += 1
+        self._segment = open(self._segment_path(self._segment_number), 'a')
+        if self.max_segments is not None:
+            for segment in self._segments()[:-self.max_segments]:
+                segment.unlink()
+        logger.info(f"Rotated notification outbox to segment {self._segment_number}")
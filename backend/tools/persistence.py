@@ -1,67 +1,1033 @@
 """Persistence layer - MemoryBank and SessionService"""
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, IO, Union, Iterator, Tuple, Callable
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future
+from contextlib import contextmanager
+import functools
+import itertools
 import json
+import os
+import threading
+import uuid
+import zlib
 from pathlib import Path
 from datetime import datetime
 from ..tools.logger import get_logger
+from ..tools.event_store import (
+    EventStore, MISSING_TIMESTAMP, timestamp_to_micros, encode_cursor, decode_cursor, medication_diff
+)
+from ..tools.group_commit import GroupCommitWriter
+from ..tools.snapshot import journal_tail, read_snapshot, write_snapshot
+from ..tools.sqlite_store import SQLiteMemoryBank
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
 
 logger = get_logger(__name__)
 
+STORAGE_MODES = ("json", "journal")
+STORAGE_ENGINES = STORAGE_MODES + ("sqlite",)
+
+# Journal mode derives memory_v2.jsonl from the document path and imports it on first use
+DEFAULT_DATA_FILES = {
+    "json": "backend/data/memory_v2.json",
+    "journal": "backend/data/memory_v2.json",
+    "sqlite": "backend/data/memory_v2.db",
+}
+
 
 class MemoryBank:
-    """File-backed JSON storage for patient data and events"""
+    """
+    File-backed storage for patient data and events
+    
+    Two storage modes are supported:
+        json:    the whole {"patients", "events"} document is rewritten on every write
+        journal: every patient upsert or event is appended as one JSON Lines record,
+                 and the in-memory state is rebuilt by replaying the journal on load
+    
+    With a durability mode set, writes go through a GroupCommitWriter: writes
+    from concurrent callers are coalesced into one flush, and each write call
+    returns once its batch is acknowledged under that durability mode.
+    
+    In journal mode, snapshot() and compact() write a binary snapshot of the
+    state; startup then loads the snapshot and replays only the journal tail
+    written after it.
     
-    def __init__(self, data_file: str = "backend/data/memory_v2.json"):
+    Events are held in a columnar EventStore (self.data["events"]) and handed
+    out as dicts.
+    
+    shared=True makes a journal safe to use from several processes (e.g.
+    uvicorn --workers N): appends are serialized with an flock on a sidecar
+    lock file, the journal is the single source of truth, and every read
+    first applies records other processes have appended since (detected by
+    a stat of the journal).
+    """
+    
+    def __init__(
+        self,
+        data_file: str = "backend/data/memory_v2.json",
+        mode: str = "json",
+        durability: Optional[str] = None,
+        batch_window_ms: float = 0.0,
+        max_batch: int = 512,
+        sync_interval_ms: float = 100.0,
+        shared: bool = False,
+        read_only: bool = False
+    ):
+        if mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode '{mode}', expected one of {STORAGE_MODES}")
+        if shared and mode != "journal":
+            raise ValueError("Multi-process sharing requires journal mode")
+        if shared and fcntl is None:
+            raise ValueError("Multi-process sharing requires fcntl file locking (POSIX)")
+        self.mode = mode
+        self.shared = shared
+        self.read_only = read_only
         self.data_file = Path(data_file)
         self.data_file.parent.mkdir(parents=True, exist_ok=True)
-        self.data: Dict[str, Any] = self._load()
-        logger.info(f"MemoryBank initialized with {len(self.data.get('patients', {}))} patients")
+        self.journal_file = self._journal_path(self.data_file)
+        self.snapshot_file = self.journal_file.with_suffix(".snapshot")
+        self._journal: Optional[IO[str]] = None
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self._records_since_snapshot = 0
+        self._compactor: Optional[threading.Thread] = None
+        self._stop_compaction = threading.Event()
+        # Journal bytes applied to memory, and the journal file they came from
+        self._offset = 0
+        self._journal_inode: Optional[int] = None
+        self._lock_fd: Optional[int] = None
+        self._flock_mutex = threading.RLock()
+        self._flock_depth = 0
+        self._listeners: List[Callable[[Optional[Dict[str, Any]]], None]] = []
+        # Per-patient write counters; with the instance token and reload epoch
+        # they identify a patient's data without comparing it
+        self._versions: Dict[str, int] = {}
+        self._patient_writes = 0
+        self._instance = uuid.uuid4().hex[:12]
+        self._epoch = 0
+        if self.shared:
+            self._lock_fd = os.open(str(self.journal_file.with_suffix(".lock")), os.O_RDWR | os.O_CREAT)
+        with self._journal_lock():
+            self.data: Dict[str, Any] = self._load()
+        self._rebuild_indexes()
+        
+        self._writer: Optional[GroupCommitWriter] = None
+        if durability is not None:
+            self._writer = GroupCommitWriter(
+                self._write_batch,
+                durability=durability,
+                batch_window_ms=batch_window_ms,
+                max_batch=max_batch,
+                sync_interval_ms=sync_interval_ms,
+                name=f"memorybank-{self.data_file.stem}"
+            )
+        logger.info(
+            f"MemoryBank initialized with {len(self.data.get('patients', {}))} patients "
+            f"({self.mode} mode)"
+        )
+    
+    @staticmethod
+    def _journal_path(data_file: Path) -> Path:
+        """Journal lives next to the JSON document, e.g. memory_v2.json -> memory_v2.jsonl"""
+        if data_file.suffix == ".jsonl":
+            return data_file
+        return data_file.with_suffix(".jsonl")
     
     def _load(self) -> Dict[str, Any]:
         """Load data from file"""
-        if self.data_file.exists():
+        if self.mode == "journal":
+            return self._load_journal()
+        return self._load_document()
+    
+    def _load_document(self) -> Dict[str, Any]:
+        """Load the whole-document JSON file"""
+        data: Dict[str, Any] = {"patients": {}, "events": EventStore()}
+        if self.data_file.exists() and self.data_file.stat().st_size > 0:
             with open(self.data_file, 'r') as f:
-                return json.load(f)
-        return {"patients": {}, "events": []}
+                document = json.load(f)
+            data["patients"] = document.get("patients", {})
+            for event in document.get("events", []):
+                data["events"].append(event)
+        return data
+    
+    def _load_journal(self) -> Dict[str, Any]:
+        """
+        Rebuild state by replaying the journal
+        
+        If no journal exists yet but a JSON document does, the document is
+        imported into a fresh journal so existing data carries over.
+        """
+        data: Dict[str, Any] = {"patients": {}, "events": EventStore()}
+        
+        if not self.journal_file.exists():
+            if self.data_file != self.journal_file:
+                data = self._load_document()
+            if self.read_only:
+                return data
+            self._seed_journal(data)
+            self._offset = self.journal_file.stat().st_size
+            self._journal_inode = self.journal_file.stat().st_ino
+            return data
+        
+        valid_end = 0
+        snapshot = read_snapshot(self.snapshot_file, self.journal_file)
+        if snapshot is not None:
+            state = snapshot["state"]
+            data = {"patients": state["patients"], "events": EventStore.from_state(state["events"])}
+            valid_end = snapshot["journal_offset"]
+            logger.info(
+                f"Loaded snapshot with {len(data['events'])} events, "
+                f"replaying journal from byte {valid_end}"
+            )
+        
+        with open(self.journal_file, 'rb') as f:
+            f.seek(valid_end)
+            for line_no, line in enumerate(f, start=1):
+                if not line.endswith(b"\n"):
+                    # A torn final write from a crash; everything before it is intact
+                    logger.warning(f"Discarding incomplete journal record at line {line_no}")
+                    break
+                valid_end += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable journal record at line {line_no}")
+                    continue
+                self._apply(data, record)
+                self._records_since_snapshot += 1
+        
+        if valid_end < self.journal_file.stat().st_size and not self.read_only:
+            # Drop the torn tail so the next append starts on a fresh line
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(valid_end)
+        
+        self._offset = valid_end
+        self._journal_inode = self.journal_file.stat().st_ino
+        return data
+    
+    def _seed_journal(self, data: Dict[str, Any]) -> None:
+        """Write the given state as the initial journal contents"""
+        self._seed_journal_file(self.journal_file, data)
+        if data["patients"] or len(data["events"]):
+            logger.info(f"Imported {self.data_file} into journal {self.journal_file}")
+    
+    def _seed_journal_file(self, journal_file: Path, data: Dict[str, Any]) -> None:
+        """Write a journal holding one record per patient followed by all events"""
+        with open(journal_file, 'w') as f:
+            for patient in data["patients"].values():
+                f.write(self._encode({"op": "patient", "patient": patient}))
+            for event in data["events"].iter_events():
+                f.write(self._encode({"op": "event", "event": event}))
+            f.flush()
+            os.fsync(f.fileno())
+    
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> str:
+        """Serialize one journal record as a single line"""
+        return json.dumps(record, separators=(',', ':')) + "\n"
+    
+    @staticmethod
+    def _apply(data: Dict[str, Any], record: Dict[str, Any]) -> None:
+        """Apply one journal record to in-memory state"""
+        op = record.get("op")
+        if op == "patient":
+            patient = record["patient"]
+            data["patients"][patient["patient_id"]] = patient
+        elif op == "event":
+            data["events"].append(record["event"])
+        else:
+            logger.warning(f"Ignoring journal record with unknown op '{op}'")
+    
+    def _rebuild_indexes(self) -> None:
+        """Build the per-patient event indexes from loaded events"""
+        # patient code -> event rows, and patient code -> type code -> event rows
+        self._rows_by_patient: Dict[int, array] = {}
+        self._rows_by_type: Dict[int, Dict[int, array]] = {}
+        by_patient = self._rows_by_patient
+        by_type = self._rows_by_type
+        store = self.data["events"]
+        for row, (patient, event_type) in enumerate(zip(store.patients, store.types)):
+            rows = by_patient.get(patient)
+            if rows is None:
+                rows = by_patient[patient] = array('I')
+                by_type[patient] = {}
+            rows.append(row)
+            type_rows = by_type[patient].get(event_type)
+            if type_rows is None:
+                type_rows = by_type[patient][event_type] = array('I')
+            type_rows.append(row)
+        # (patient code, type code or None) -> (timestamps, rows) sorted by
+        # (timestamp, row); built on first query and maintained from then on
+        self._time_index: Dict[Tuple[int, Optional[int]], Tuple[array, array]] = {}
+    
+    def _index_event(self, row: int) -> None:
+        """Add one event row to the per-patient indexes"""
+        store = self.data["events"]
+        patient = store.patients[row]
+        event_type = store.types[row]
+        self._rows_by_patient.setdefault(patient, array('I')).append(row)
+        by_type = self._rows_by_type.setdefault(patient, {})
+        by_type.setdefault(event_type, array('I')).append(row)
+        
+        timestamp = store.timestamps[row]
+        for key in ((patient, None), (patient, event_type)):
+            index = self._time_index.get(key)
+            if index is None:
+                continue
+            keys, rows = index
+            if not keys or timestamp >= keys[-1]:
+                keys.append(timestamp)
+                rows.append(row)
+            else:
+                # Out-of-order timestamp; row is the newest, so it goes last among equals
+                position = bisect_right(keys, timestamp)
+                keys.insert(position, timestamp)
+                rows.insert(position, row)
+    
+    def _time_index_for(self, patient: int, event_type: Optional[int]) -> Tuple[array, array]:
+        """Timestamp-sorted index of a patient's events (of one type, if given)"""
+        key = (patient, event_type)
+        index = self._time_index.get(key)
+        if index is None:
+            if event_type is None:
+                rows = self._rows_by_patient.get(patient, ())
+            else:
+                rows = self._rows_by_type.get(patient, {}).get(event_type, ())
+            timestamps = self.data["events"].timestamps
+            order = sorted(rows, key=timestamps.__getitem__)
+            index = self._time_index[key] = (array('q', [timestamps[r] for r in order]), array('I', order))
+        return index
+    
+    @contextmanager
+    def _journal_lock(self):
+        """Exclusive cross-process lock on the journal (no-op unless shared)"""
+        if self._lock_fd is None:
+            yield
+            return
+        # flock is held per open file, not per thread, so threads of this
+        # process take turns and only the outermost holder locks and unlocks
+        with self._flock_mutex:
+            if self._flock_depth == 0:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._flock_depth += 1
+            try:
+                yield
+            finally:
+                self._flock_depth -= 1
+                if self._flock_depth == 0:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+    
+    def _journal_handle(self) -> IO[str]:
+        """Append handle on the current journal file, reopened if it was replaced"""
+        if self._journal is not None and self.shared:
+            if os.fstat(self._journal.fileno()).st_ino != self.journal_file.stat().st_ino:
+                self._journal.close()
+                self._journal = None
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a')
+        return self._journal
+    
+    def refresh(self) -> int:
+        """
+        Apply journal records appended by other processes (shared mode only)
+        
+        Returns:
+            Number of records applied
+        """
+        if not self.shared:
+            return 0
+        with self._lock:
+            stat = self.journal_file.stat()
+            if stat.st_ino != self._journal_inode:
+                # Another process compacted the journal; reload from its snapshot
+                self._reload()
+                return 0
+            if stat.st_size <= self._offset:
+                return 0
+            
+            applied = 0
+            with open(self.journal_file, 'rb') as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Still being written by another process
+                        break
+                    self._offset += len(line)
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping unreadable journal record before byte {self._offset}")
+                        continue
+                    self._apply_record(record)
+                    applied += 1
+            self._records_since_snapshot += applied
+            return applied
     
-    def _save(self) -> None:
+    def _reload(self) -> None:
+        """Rebuild all in-memory state from the snapshot and journal"""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            self._records_since_snapshot = 0
+            with self._journal_lock():
+                self.data = self._load()
+            self._rebuild_indexes()
+            logger.info(f"Reloaded MemoryBank from {self.journal_file}")
+            for listener in self._listeners:
+                self._replay(listener)
+            self._epoch += 1
+    
+    def _apply_record(self, record: Dict[str, Any]) -> None:
+        """Apply one journal record to the live state and indexes"""
+        op = record.get("op")
+        if op == "patient":
+            patient = record["patient"]
+            self.data["patients"][patient["patient_id"]] = patient
+            self._patient_writes += 1
+            self._bump_version(patient["patient_id"])
+        elif op == "event":
+            self._index_event(self.data["events"].append(record["event"]))
+            self._notify(record["event"])
+            self._bump_version(record["event"].get("patient_id"))
+        else:
+            logger.warning(f"Ignoring journal record with unknown op '{op}'")
+    
+    def _bump_version(self, patient_id: Any) -> None:
+        """
+        Record a write to a patient's data; call with the lock held, after
+        the listeners have seen it, so state derived from the events is never
+        older than the version it is cached under
+        """
+        self._versions[patient_id] = self._versions.get(patient_id, 0) + 1
+    
+    def data_version(self, patient_id: str) -> str:
+        """
+        Opaque version of a patient's record and events
+        
+        The version changes whenever the patient or one of their events is
+        written, including writes made by other processes in shared mode.
+        """
+        self.refresh()
+        with self._lock:
+            return f"{self._instance}-{self._epoch}-{self._versions.get(patient_id, 0)}"
+    
+    def patients_version(self) -> str:
+        """Opaque version of the patient list; changes whenever a patient is written"""
+        self.refresh()
+        with self._lock:
+            return f"{self._instance}-{self._epoch}-{self._patient_writes}"
+    
+    def add_listener(self, listener: Callable[[Optional[Dict[str, Any]]], None]) -> None:
+        """
+        Call listener with every event added from now on, after replaying
+        the events already stored
+        
+        Listeners run while the MemoryBank lock is held, so they must be quick
+        and must not call back into the MemoryBank. listener(None) means the
+        state was reloaded; it is followed by a replay of every event.
+        """
+        with self._lock:
+            self._replay(listener, reset=False)
+            self._listeners.append(listener)
+    
+    def _replay(self, listener: Callable[[Optional[Dict[str, Any]]], None], reset: bool = True) -> None:
+        """Feed every stored event to a listener"""
+        if reset:
+            listener(None)
+        for event in self.data["events"].iter_events():
+            listener(event)
+    
+    def _notify(self, event: Dict[str, Any]) -> None:
+        """Pass a newly added event to the listeners"""
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Event listener failed: {e}")
+    
+    def _persist(self, record: Dict[str, Any]) -> Optional[Future]:
+        """
+        Persist one record; must be called with the lock held so the
+        on-disk order matches the in-memory order
+        
+        Returns:
+            Future resolving once the record is acknowledged, or None if
+            it was written synchronously
+        """
+        line = self._encode(record) if self.mode == "journal" else None
+        if not self.shared:
+            self._records_since_snapshot += 1
+        if self._writer is not None:
+            return self._writer.submit(line)
+        self._write_batch([line], sync=False)
+        return None
+    
+    def _write_batch(self, lines: List[Optional[str]], sync: bool) -> None:
+        """Write a batch of journal lines (or rewrite the document), fsyncing if asked"""
+        if self.mode == "journal":
+            with self._io_lock:
+                if lines:
+                    with self._journal_lock():
+                        journal = self._journal_handle()
+                        journal.write("".join(lines))
+                        journal.flush()
+                        if sync:
+                            os.fsync(journal.fileno())
+                elif sync and self._journal is not None:
+                    os.fsync(self._journal.fileno())
+        elif lines or sync:
+            # One document rewrite covers every write in the batch
+            with self._lock:
+                self._save(sync)
+    
+    def _save(self, sync: bool = False) -> None:
         """Save data to file"""
-        with open(self.data_file, 'w') as f:
-            json.dump(self.data, f, indent=2)
+        document = {
+            "patients": self.data["patients"],
+            "events": list(self.data["events"].iter_events())
+        }
+        # Replaced in one rename, so readers (e.g. a read-only export) never
+        # see a half-written document
+        temp_file = self.data_file.with_name(self.data_file.name + ".tmp")
+        with open(temp_file, 'w') as f:
+            json.dump(document, f, indent=2)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_file, self.data_file)
+    
+    @contextmanager
+    def _quiesce(self):
+        """
+        Hold writes still while the journal and in-memory state match
+        
+        Yields:
+            (journal offset, journal inode) corresponding to the in-memory state
+        """
+        with self._lock:
+            if self._writer is not None:
+                self._writer.write("")
+            with self._io_lock, self._journal_lock():
+                if self.shared:
+                    self.refresh()
+                    yield self._offset, self._journal_inode
+                else:
+                    stat = self.journal_file.stat()
+                    yield stat.st_size, stat.st_ino
+    
+    def _copy_state(self) -> Dict[str, Any]:
+        """Copy of the state, in snapshot form, that later writes will not change"""
+        return {"patients": dict(self.data["patients"]), "events": self.data["events"].to_state()}
+    
+    def snapshot(self) -> None:
+        """Write a snapshot of the current state (journal mode only)"""
+        if self.mode != "journal":
+            raise ValueError("Snapshots require journal mode")
+        with self._quiesce() as (offset, _):
+            state = self._copy_state()
+            tail = journal_tail(self.journal_file, offset)
+            self._records_since_snapshot = 0
+        write_snapshot(self.snapshot_file, state, offset, tail)
+        logger.info(f"Wrote snapshot of {len(state['events']['values'])} events at journal byte {offset}")
+    
+    def compact(self) -> None:
+        """
+        Rewrite the journal without superseded patient versions and snapshot it
+        
+        The compacted journal and snapshot are built without holding the lock;
+        writes that arrive meanwhile are copied over before the atomic swap.
+        """
+        if self.mode != "journal":
+            raise ValueError("Compaction requires journal mode")
+        with self._quiesce() as (offset, inode):
+            state = self._copy_state()
+            self._records_since_snapshot = 0
+        
+        compacted_file = self.journal_file.with_suffix(".jsonl.compact")
+        self._seed_journal_file(
+            compacted_file,
+            {"patients": state["patients"], "events": EventStore.from_state(state["events"])}
+        )
+        compacted_size = compacted_file.stat().st_size
+        snapshot_tmp = self.snapshot_file.with_suffix(".snapshot.new")
+        write_snapshot(snapshot_tmp, state, compacted_size, journal_tail(compacted_file, compacted_size))
+        
+        with self._quiesce() as (_, current_inode):
+            if current_inode != inode:
+                # Another process compacted the journal in the meantime
+                compacted_file.unlink()
+                snapshot_tmp.unlink()
+                logger.info("Skipped compaction: journal was replaced by another process")
+                return
+            # Carry over records appended while the compacted copy was written
+            with open(self.journal_file, 'rb') as src, open(compacted_file, 'ab') as dst:
+                src.seek(offset)
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            before = self.journal_file.stat().st_size
+            after = compacted_file.stat().st_size
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            os.replace(compacted_file, self.journal_file)
+            os.replace(snapshot_tmp, self.snapshot_file)
+            if self.shared:
+                self._journal_inode = self.journal_file.stat().st_ino
+                self._offset = after
+        logger.info(f"Compacted journal from {before} to {after} bytes")
     
-    def add_patient(self, patient: Dict[str, Any]) -> None:
-        """Add or update patient"""
+    def start_compaction(self, interval_s: float = 300.0, min_records: int = 10000) -> None:
+        """
+        Start a background job that compacts the journal periodically
+        
+        Args:
+            interval_s: Seconds between checks
+            min_records: Journal records written since the last snapshot needed to compact
+        """
+        if self.mode != "journal" or self._compactor is not None:
+            return
+        
+        def run() -> None:
+            while not self._stop_compaction.wait(interval_s):
+                if self._records_since_snapshot >= min_records:
+                    try:
+                        self.compact()
+                    except Exception as e:
+                        logger.error(f"Background compaction failed: {e}")
+        
+        self._compactor = threading.Thread(target=run, name="memorybank-compaction", daemon=True)
+        self._compactor.start()
+        logger.info(f"Background compaction every {interval_s}s (min {min_records} records)")
+    
+    def close(self) -> None:
+        """Flush pending writes and close the journal file handle, if open"""
+        if self._compactor is not None:
+            self._stop_compaction.set()
+            self._compactor.join()
+            self._compactor = None
+        if self._writer is not None:
+            self._writer.close()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+    
+    def _check_writable(self) -> None:
+        """Reject writes to a read-only MemoryBank"""
+        if self.read_only:
+            raise ValueError(f"MemoryBank {self.data_file} is open read-only")
+    
+    def add_patient(self, patient: Dict[str, Any]) -> Dict[str, List[str]]:
+        """
+        Add or update patient
+        
+        Returns:
+            Medication names added and removed (see medication_diff), relative
+            to the record this process last saw in shared mode
+        """
+        self._check_writable()
         patient_id = patient["patient_id"]
-        self.data["patients"][patient_id] = patient
-        self._save()
+        self.refresh()
+        with self._lock:
+            diff = medication_diff(self.data["patients"].get(patient_id), patient)
+            if not self.shared:
+                self.data["patients"][patient_id] = patient
+                self._patient_writes += 1
+                self._bump_version(patient_id)
+            ack = self._persist({"op": "patient", "patient": patient})
+        if ack is not None:
+            ack.result()
+        # Shared mode applies its own writes from the journal, in journal order
+        self.refresh()
         logger.info(f"Saved patient {patient_id}")
+        return diff
     
     def get_patient(self, patient_id: str) -> Optional[Dict[str, Any]]:
         """Get patient by ID"""
+        self.refresh()
         return self.data["patients"].get(patient_id)
     
     def get_all_patients(self) -> List[Dict[str, Any]]:
         """Get all patients"""
+        self.refresh()
         return list(self.data["patients"].values())
     
     def add_event(self, event: Dict[str, Any]) -> None:
         """Add event to history"""
-        if "timestamp" not in event:
+        self._check_writable()
+        if not event.get("timestamp"):
             event["timestamp"] = datetime.now().isoformat()
-        self.data["events"].append(event)
-        self._save()
+        with self._lock:
+            if not self.shared:
+                self._index_event(self.data["events"].append(event))
+                self._notify(event)
+                self._bump_version(event.get("patient_id"))
+            ack = self._persist({"op": "event", "event": event})
+        if ack is not None:
+            ack.result()
+        self.refresh()
         logger.debug(f"Added event: {event.get('type')}")
     
-    def get_patient_events(self, patient_id: str) -> List[Dict[str, Any]]:
-        """Get all events for a patient"""
-        return [
-            event for event in self.data["events"]
-            if event.get("patient_id") == patient_id
+    def get_patient_events(
+        self,
+        patient_id: str,
+        event_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all events for a patient
+        
+        Args:
+            patient_id: Patient identifier
+            event_type: Optional event type filter (dose, symptom, interaction, ...)
+        
+        Returns:
+            Events in insertion order
+        """
+        self.refresh()
+        # A concurrent add_event may have interned the patient but not yet
+        # indexed the event; the row lists are copied as of one write
+        with self._lock:
+            store = self.data["events"]
+            patient = store.patient_code(patient_id)
+            if patient is None:
+                return []
+            if event_type is None:
+                rows = self._rows_by_patient.get(patient, ())
+            else:
+                rows = self._rows_by_type.get(patient, {}).get(store.type_code(event_type), ())
+            rows = rows[:]
+        return list(store.iter_events(rows))
+    
+    def query_events(
+        self,
+        patient_id: str,
+        event_type: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Page through a patient's events in timestamp order
+        
+        Args:
+            patient_id: Patient identifier
+            event_type: Optional event type filter
+            since: Inclusive lower bound (ISO timestamp)
+            until: Inclusive upper bound (ISO timestamp)
+            limit: Maximum events per page
+            cursor: next_cursor of the previous page
+        
+        Returns:
+            {"events", "next_cursor"}; next_cursor is None on the last page
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        lower, upper = _timestamp_bound(since), _timestamp_bound(until)
+        after = decode_cursor(cursor) if cursor else None
+        self.refresh()
+        
+        store = self.data["events"]
+        patient = store.patient_code(patient_id)
+        type_code = store.type_code(event_type) if event_type is not None else None
+        if patient is None or (event_type is not None and type_code is None):
+            return {"events": [], "next_cursor": None}
+        
+        with self._lock:
+            keys, rows = self._time_index_for(patient, type_code)
+            start = bisect_left(keys, lower) if since else 0
+            end = bisect_right(keys, upper) if until else len(keys)
+            if after is not None:
+                after_key, after_row = after
+                lo, hi = bisect_left(keys, after_key), bisect_right(keys, after_key)
+                start = max(start, bisect_right(rows, after_row, lo, hi))
+            stop = min(end, start + limit)
+            page = rows[start:stop] if start < stop else array('I')
+            next_cursor = encode_cursor(keys[stop - 1], rows[stop - 1]) if stop < end else None
+        return {"events": list(store.iter_events(page)), "next_cursor": next_cursor}
+    
+    def get_all_events(self) -> List[Dict[str, Any]]:
+        """Get all events"""
+        self.refresh()
+        return list(self.data["events"].iter_events())
+
+
+def _timestamp_bound(timestamp: Optional[str]) -> int:
+    """Sort key of a since/until bound; raises ValueError if it is not an ISO timestamp"""
+    if timestamp is None:
+        return MISSING_TIMESTAMP
+    key, _ = timestamp_to_micros(timestamp)
+    if key == MISSING_TIMESTAMP:
+        raise ValueError(f"Invalid timestamp '{timestamp}'")
+    return key
+
+
+class ShardedMemoryBank:
+    """
+    MemoryBank partitioned by a hash of patient_id into independent shards
+    
+    Each shard is a MemoryBank with its own file (or journal) and lock, so
+    writes for patients on different shards proceed in parallel and a save
+    only touches one shard. Cross-shard reads iterate over every shard.
+    
+    Opening shards for the first time next to an existing unsharded store
+    (the JSON document or journal at data_file) imports its patients and
+    events into the shards; the unsharded files are left in place but no
+    longer used.
+    """
+    
+    def __init__(
+        self,
+        data_file: str = "backend/data/memory_v2.json",
+        shards: int = 8,
+        mode: str = "journal",
+        **options: Any
+    ):
+        """
+        Args:
+            data_file: Base path; shards live in <stem>.shards/ next to it
+            shards: Number of shards (fixed once data has been written)
+            mode: Storage mode of every shard (json or journal)
+            options: Further MemoryBank options (durability, batching, ...)
+        """
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        base = Path(data_file)
+        self.shard_dir = base.with_name(base.stem + ".shards")
+        self.shard_dir.parent.mkdir(parents=True, exist_ok=True)
+        self.shard_dir.mkdir(exist_ok=True)
+        created = self._check_manifest(shards)
+        
+        suffix = ".jsonl" if mode == "journal" else ".json"
+        self.shards: List[MemoryBank] = [
+            MemoryBank(str(self.shard_dir / f"shard-{i:03d}{suffix}"), mode=mode, **options)
+            for i in range(shards)
         ]
+        if created:
+            self._import_unsharded(base, read_only=options.get("read_only", False))
+            self._write_manifest(shards)
+        logger.info(f"ShardedMemoryBank initialized with {shards} {mode} shards in {self.shard_dir}")
+    
+    def _check_manifest(self, shards: int) -> bool:
+        """
+        Refuse to reopen the data with a different shard count
+        
+        Returns:
+            Whether the shards are new (no manifest yet)
+        """
+        manifest = self.shard_dir / "shards.json"
+        if not manifest.exists():
+            return True
+        with open(manifest, 'r') as f:
+            existing = json.load(f)["shards"]
+        if existing != shards:
+            raise ValueError(
+                f"{self.shard_dir} holds {existing} shards; reopen it with shards={existing}"
+            )
+        return False
+    
+    def _write_manifest(self, shards: int) -> None:
+        """Record the shard count; written once the shards hold their initial data"""
+        with open(self.shard_dir / "shards.json", 'w') as f:
+            json.dump({"shards": shards, "hash": "crc32"}, f)
+    
+    def _import_unsharded(self, base: Path, read_only: bool) -> None:
+        """Move the data of an existing unsharded store into new shards"""
+        journal = MemoryBank._journal_path(base)
+        if journal.exists():
+            source_mode = "journal"
+        elif base.exists() and base.suffix != ".jsonl":
+            source_mode = "json"
+        else:
+            return
+        source = MemoryBank(str(base), mode=source_mode, read_only=True)
+        try:
+            patients, events = source.get_all_patients(), source.get_all_events()
+        finally:
+            source.close()
+        if not patients and not events:
+            return
+        if read_only:
+            raise ValueError(f"{base} has not been imported into {self.shard_dir}; open it writable once")
+        if any(shard.data["patients"] or len(shard.data["events"]) for shard in self.shards):
+            # An import was interrupted before the manifest was written
+            raise ValueError(f"{self.shard_dir} holds a partial import of {base}; remove it and restart")
+        for patient in patients:
+            self.shard_for(patient["patient_id"]).add_patient(patient)
+        for event in events:
+            self.shard_for(event.get("patient_id")).add_event(event)
+        logger.info(f"Imported {len(patients)} patients and {len(events)} events from {base} into {self.shard_dir}")
+    
+    def shard_for(self, patient_id: str) -> MemoryBank:
+        """The shard owning a patient"""
+        return self.shards[zlib.crc32(str(patient_id).encode()) % len(self.shards)]
+    
+    def add_patient(self, patient: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Add or update patient; returns the medication diff"""
+        return self.shard_for(patient["patient_id"]).add_patient(patient)
+    
+    def get_patient(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        """Get patient by ID"""
+        return self.shard_for(patient_id).get_patient(patient_id)
+    
+    def refresh(self) -> int:
+        """Apply records appended by other processes to every shard (shared mode only)"""
+        return sum(shard.refresh() for shard in self.shards)
+    
+    def iter_all_patients(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the patients of every shard, one shard snapshot at a time"""
+        for shard in self.shards:
+            shard.refresh()
+            # Concurrent writes may add patients to the live dict
+            with shard._lock:
+                patients = list(shard.data["patients"].values())
+            yield from patients
+    
+    def get_all_patients(self) -> List[Dict[str, Any]]:
+        """Get all patients"""
+        return list(self.iter_all_patients())
+    
+    def add_event(self, event: Dict[str, Any]) -> None:
+        """Add event to history"""
+        self.shard_for(event.get("patient_id")).add_event(event)
+    
+    def get_patient_events(
+        self,
+        patient_id: str,
+        event_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get all events for a patient, optionally of one type"""
+        return self.shard_for(patient_id).get_patient_events(patient_id, event_type)
+    
+    def query_events(self, patient_id: str, **filters: Any) -> Dict[str, Any]:
+        """Page through a patient's events in timestamp order (see MemoryBank.query_events)"""
+        return self.shard_for(patient_id).query_events(patient_id, **filters)
+    
+    def data_version(self, patient_id: str) -> str:
+        """Opaque version of a patient's record and events (see MemoryBank.data_version)"""
+        return self.shard_for(patient_id).data_version(patient_id)
+    
+    def patients_version(self) -> str:
+        """Opaque version of the patient list (see MemoryBank.patients_version)"""
+        return "+".join(shard.patients_version() for shard in self.shards)
+    
+    def add_listener(self, listener: Callable[[Optional[Dict[str, Any]]], None]) -> None:
+        """Register an event listener on every shard (see MemoryBank.add_listener)"""
+        def shard_listener(event: Optional[Dict[str, Any]], shard: MemoryBank) -> None:
+            if event is not None:
+                listener(event)
+                return
+            # One shard reloaded: the listener drops all derived state, so the
+            # other shards replay their events before the reloaded one does
+            listener(None)
+            for other in self.shards:
+                if other is not shard:
+                    other._replay(listener, reset=False)
+        
+        for shard in self.shards:
+            shard.add_listener(functools.partial(shard_listener, shard=shard))
+    
+    def iter_all_events(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the events of every shard, shard by shard"""
+        for shard in self.shards:
+            shard.refresh()
+        return itertools.chain.from_iterable(
+            shard.data["events"].iter_events() for shard in self.shards
+        )
     
     def get_all_events(self) -> List[Dict[str, Any]]:
         """Get all events"""
-        return self.data["events"]
+        return list(self.iter_all_events())
+    
+    def snapshot(self) -> None:
+        """Snapshot every shard"""
+        for shard in self.shards:
+            shard.snapshot()
+    
+    def compact(self) -> None:
+        """Compact every shard"""
+        for shard in self.shards:
+            shard.compact()
+    
+    def start_compaction(self, interval_s: float = 300.0, min_records: int = 10000) -> None:
+        """Start background compaction on every shard"""
+        for shard in self.shards:
+            shard.start_compaction(interval_s, min_records)
+    
+    def close(self) -> None:
+        """Close every shard"""
+        for shard in self.shards:
+            shard.close()
+
+
+def create_memory_bank(
+    storage: Optional[str] = None,
+    data_file: Optional[str] = None,
+    read_only: bool = False
+) -> Union[MemoryBank, ShardedMemoryBank, SQLiteMemoryBank]:
+    """
+    Build the storage engine selected by configuration
+    
+    Args:
+        storage: json, journal or sqlite (default: MEDIBUDDY_STORAGE, else json)
+        data_file: Storage path (default: MEDIBUDDY_DATA_FILE, else per-engine default)
+        read_only: Open json/journal storage for reading only, e.g. next to a
+            running server; no journal repair, seeding or compaction
+    
+    Group commit is enabled for json/journal by setting MEDIBUDDY_DURABILITY
+    (fsync, interval or os), tuned by MEDIBUDDY_BATCH_WINDOW_MS,
+    MEDIBUDDY_BATCH_MAX and MEDIBUDDY_SYNC_INTERVAL_MS. Journal mode compacts in
+    the background every MEDIBUDDY_COMPACTION_INTERVAL_S seconds (0 disables)
+    once MEDIBUDDY_COMPACTION_MIN_RECORDS records have been written.
+    MEDIBUDDY_SHARDS > 1 partitions json/journal storage by patient.
+    MEDIBUDDY_SHARED=1 lets several processes (uvicorn --workers N) share
+    a journal.
+    
+    Returns:
+        A MemoryBank-compatible storage engine
+    """
+    storage = storage or os.getenv("MEDIBUDDY_STORAGE", "json")
+    if storage not in STORAGE_ENGINES:
+        raise ValueError(f"Unknown storage engine '{storage}', expected one of {STORAGE_ENGINES}")
+    data_file = data_file or os.getenv("MEDIBUDDY_DATA_FILE") or DEFAULT_DATA_FILES[storage]
+    
+    if storage == "sqlite":
+        return SQLiteMemoryBank(data_file)
+    options = {
+        "mode": storage,
+        "durability": os.getenv("MEDIBUDDY_DURABILITY") or None,
+        "batch_window_ms": float(os.getenv("MEDIBUDDY_BATCH_WINDOW_MS", "0")),
+        "max_batch": int(os.getenv("MEDIBUDDY_BATCH_MAX", "512")),
+        "sync_interval_ms": float(os.getenv("MEDIBUDDY_SYNC_INTERVAL_MS", "100")),
+    }
+    if os.getenv("MEDIBUDDY_SHARED", "0") == "1":
+        options["shared"] = True
+    if read_only:
+        options["read_only"] = True
+    shards = int(os.getenv("MEDIBUDDY_SHARDS", "1"))
+    if shards > 1:
+        memory = ShardedMemoryBank(data_file, shards=shards, **options)
+    else:
+        memory = MemoryBank(data_file, **options)
+    compaction_interval = float(os.getenv("MEDIBUDDY_COMPACTION_INTERVAL_S", "300"))
+    if storage == "journal" and compaction_interval > 0 and not read_only:
+        memory.start_compaction(
+            compaction_interval,
+            min_records=int(os.getenv("MEDIBUDDY_COMPACTION_MIN_RECORDS", "10000"))
+        )
+    return memory
 
 
 class SessionService:
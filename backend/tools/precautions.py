@@ -0,0 +1,149 @@
+"""Precaution catalog - indexed medicine precautions keyed by canonical drug name"""
+from typing import Dict, Any, List, Optional, Set, Iterator
+from bisect import bisect_left
+import itertools
+import json
+from pathlib import Path
+from ..tools.drug_names import DrugNameNormalizer, get_drug_normalizer
+from ..tools.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Length of the n-grams indexed for substring search
+NGRAM = 3
+
+# Shared with the Next.js app
+DEFAULT_PRECAUTIONS_FILE = Path(__file__).resolve().parents[2] / "lib" / "data" / "medicine_precautions.json"
+
+
+class PrecautionCatalog:
+    """
+    Precautions from lib/data/medicine_precautions.json
+    
+    Entries are keyed by the canonical name of the medicine, so brand,
+    salt-form and misspelled names find the same entry. Each entry's
+    interactions are also resolved ("interaction_names").
+    
+    Search is served from indexes built once at load over every searchable
+    name (medicine name, catalog key and brand/alternative names): a hash of
+    names for exact lookups, the sorted names for prefix (autocomplete)
+    lookups by bisection, and an n-gram index for substring lookups.
+    """
+    
+    def __init__(self, precautions_file: Optional[str] = None, normalizer: Optional[DrugNameNormalizer] = None):
+        self.precautions_file = Path(precautions_file) if precautions_file else DEFAULT_PRECAUTIONS_FILE
+        self.normalizer = normalizer or get_drug_normalizer()
+        with open(self.precautions_file, 'r', encoding="utf-8") as f:
+            data = json.load(f)
+        
+        # Medicine names become known names for misspelling correction
+        self.normalizer.add_names(entry.get("name", key) for key, entry in data.items())
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        for key, entry in data.items():
+            canonical = self.normalizer.canonical(entry.get("name", key))
+            self.entries[canonical] = {
+                **entry,
+                "id": canonical,
+                "interaction_names": self.normalizer.resolve_all(entry.get("interactions", [])),
+            }
+        self._build_index(data)
+        logger.info(f"PrecautionCatalog loaded {len(self.entries)} medicines ({len(self._names)} names)")
+    
+    def _build_index(self, data: Dict[str, Any]) -> None:
+        """Index every searchable name of the entries"""
+        self._names: Dict[str, str] = {}
+        for key, entry in data.items():
+            canonical = self.normalizer.canonical(entry.get("name", key))
+            for name in (entry.get("name", key), key, canonical):
+                self._names[name.strip().lower()] = canonical
+        for alias, canonical in self.normalizer.aliases().items():
+            if canonical in self.entries:
+                self._names.setdefault(alias, canonical)
+        
+        self._sorted_names: List[str] = sorted(self._names)
+        self._ngrams: Dict[str, Set[str]] = {}
+        for name in self._names:
+            for i in range(len(name) - NGRAM + 1):
+                self._ngrams.setdefault(name[i:i + NGRAM], set()).add(name)
+    
+    def _prefix_names(self, prefix: str) -> Iterator[str]:
+        """Indexed names starting with prefix, in sorted order"""
+        i = bisect_left(self._sorted_names, prefix)
+        while i < len(self._sorted_names) and self._sorted_names[i].startswith(prefix):
+            yield self._sorted_names[i]
+            i += 1
+    
+    def _substring_names(self, text: str) -> List[str]:
+        """Indexed names containing text (at least NGRAM characters), shortest first"""
+        postings = []
+        for i in range(len(text) - NGRAM + 1):
+            names = self._ngrams.get(text[i:i + NGRAM])
+            if not names:
+                return []
+            postings.append(names)
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return sorted((name for name in candidates if text in name), key=lambda n: (len(n), n))
+    
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Precautions for a medicine name, in any form the normalizer resolves"""
+        return self.entries.get(self.normalizer.resolve(name))
+    
+    def for_medications(self, names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Precautions for each of a patient's medication names (None if unknown)"""
+        return {name: self.get(name) for name in names}
+    
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Medicines matching a query: the exact match first, then names
+        starting with it, then names containing it; a misspelled name is
+        corrected only if none of these match
+        
+        Args:
+            query: Medicine name or part of one
+            limit: Maximum number of medicines
+        
+        Returns:
+            Matching entries, each medicine at most once
+        """
+        text = query.strip().lower()
+        if not text:
+            return []
+        found: List[str] = []
+        
+        def add(names: Iterator[str]) -> None:
+            for name in names:
+                if len(found) >= limit:
+                    return
+                canonical = self._names[name]
+                if canonical not in found:
+                    found.append(canonical)
+        
+        exact = self._names.get(text) or self.normalizer.canonical(text)
+        if exact in self.entries:
+            found.append(exact)
+        add(self._prefix_names(text))
+        if len(text) >= NGRAM:
+            add(self._substring_names(text))
+        if not found:
+            # Misspelling correction only when nothing else matched
+            corrected = self.normalizer.resolve(text)
+            if corrected in self.entries:
+                found.append(corrected)
+        return [self.entries[canonical] for canonical in found[:limit]]
+    
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[Dict[str, str]]:
+        """
+        Names starting with prefix, for type-ahead
+        
+        Returns:
+            [{"match": indexed name, "id": canonical name, "name": medicine name}]
+        """
+        text = prefix.strip().lower()
+        if not text:
+            return []
+        suggestions = []
+        for name in itertools.islice(self._prefix_names(text), limit):
+            canonical = self._names[name]
+            suggestions.append({"match": name, "id": canonical, "name": self.entries[canonical].get("name", canonical)})
+        return suggestions
@@ -1,24 +1,63 @@
 """In-memory Scheduler for medication reminders"""
-from typing import Dict, List, Any
-from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timedelta
+import heapq
+import itertools
+import os
+import threading
 import uuid
+from pathlib import Path
 from ..tools.logger import get_logger
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
 logger = get_logger(__name__)
 
 
+def next_fire_time(time_slot: str, after: datetime) -> Optional[datetime]:
+    """
+    First occurrence of a daily "HH:MM" time slot strictly after a moment
+    
+    Returns:
+        The datetime, or None if the slot is not a valid HH:MM time
+    """
+    try:
+        slot = datetime.strptime(time_slot, "%H:%M").time()
+    except (TypeError, ValueError):
+        return None
+    fire = datetime.combine(after.date(), slot)
+    if fire <= after:
+        fire += timedelta(days=1)
+    return fire
+
+
 class Scheduler:
-    """In-memory job scheduler for reminders"""
+    """
+    In-memory job scheduler for reminders
+    
+    Jobs recur daily at their time slot. Next fire times are kept in a
+    min-heap, so finding due jobs costs O(log n) per due job whatever the
+    number of scheduled jobs. Cancelled, removed and rescheduled jobs leave stale
+    heap entries that are skipped when they reach the top.
+    """
     
     def __init__(self):
         self.jobs: Dict[str, Dict[str, Any]] = {}
+        # (fire time, tie breaker, job_id)
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
         logger.info("Scheduler initialized")
     
     def schedule_job(
         self,
         patient_id: str,
         medication: str,
-        time: str
+        time: str,
+        now: Optional[datetime] = None
     ) -> str:
         """
         Schedule a reminder job
@@ -27,39 +66,127 @@ class Scheduler:
             patient_id: Patient identifier
             medication: Medication name
             time: Time slot (e.g., "09:00")
-            
+            now: Current time (default: datetime.now())
+        
         Returns:
             Job ID
         """
         job_id = f"job_{uuid.uuid4().hex[:8]}"
+        now = now or datetime.now()
+        fire = next_fire_time(time, now)
         
-        self.jobs[job_id] = {
-            "job_id": job_id,
-            "patient_id": patient_id,
-            "medication": medication,
-            "time": time,
-            "created_at": datetime.now().isoformat(),
-            "status": "scheduled"
-        }
+        with self._lock:
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "patient_id": patient_id,
+                "medication": medication,
+                "time": time,
+                "created_at": now.isoformat(),
+                "status": "scheduled",
+                "next_fire": fire.isoformat() if fire else None,
+                "fire_count": 0
+            }
+            if fire is not None:
+                heapq.heappush(self._heap, (fire, next(self._sequence), job_id))
         
+        if fire is None:
+            logger.warning(f"Job {job_id} has invalid time slot '{time}'; it will not fire")
         logger.debug(f"Scheduled job {job_id}: {medication} at {time} for {patient_id}")
         return job_id
     
     def get_patient_jobs(self, patient_id: str) -> List[Dict[str, Any]]:
-        """Get all jobs for a patient"""
-        return [
-            job for job in self.jobs.values()
-            if job["patient_id"] == patient_id
-        ]
+        """Get all jobs for a patient (copies, as of one moment)"""
+        with self._lock:
+            return [
+                dict(job) for job in self.jobs.values()
+                if job["patient_id"] == patient_id
+            ]
     
     def get_all_jobs(self) -> List[Dict[str, Any]]:
-        """Get all scheduled jobs"""
-        return list(self.jobs.values())
+        """Get all scheduled jobs (copies, as of one moment)"""
+        with self._lock:
+            return [dict(job) for job in self.jobs.values()]
     
     def cancel_job(self, job_id: str) -> bool:
         """Cancel a scheduled job"""
-        if job_id in self.jobs:
+        with self._lock:
+            if job_id not in self.jobs:
+                return False
+            # The heap entry is dropped when it comes due
             self.jobs[job_id]["status"] = "cancelled"
-            logger.info(f"Cancelled job {job_id}")
-            return True
-        return False
+            self.jobs[job_id]["next_fire"] = None
+        logger.info(f"Cancelled job {job_id}")
+        return True
+    
+    def remove_patient_jobs(self, patient_id: str) -> int:
+        """Delete all of a patient's jobs; returns how many were removed"""
+        with self._lock:
+            # Their heap entries are dropped when they come due
+            job_ids = [job_id for job_id, job in self.jobs.items() if job["patient_id"] == patient_id]
+            for job_id in job_ids:
+                del self.jobs[job_id]
+        return len(job_ids)
+    
+    def _is_live(self, fire: datetime, job_id: str) -> bool:
+        """Whether a heap entry is the job's current fire time"""
+        job = self.jobs.get(job_id)
+        return job is not None and job["status"] == "scheduled" and job["next_fire"] == fire.isoformat()
+    
+    def next_fire(self) -> Optional[datetime]:
+        """Earliest fire time of any scheduled job"""
+        with self._lock:
+            while self._heap and not self._is_live(self._heap[0][0], self._heap[0][2]):
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+    
+    def pop_due(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Take the jobs due at or before now and reschedule them for their
+        next daily slot
+        
+        A job that was due several times (e.g. while the process was down)
+        fires once and moves to its next future slot.
+        
+        Args:
+            now: Current time (default: datetime.now())
+        
+        Returns:
+            Copies of the due jobs, with "fire_time" set to the slot that fired
+        """
+        now = now or datetime.now()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                fire, _, job_id = heapq.heappop(self._heap)
+                if not self._is_live(fire, job_id):
+                    continue
+                job = self.jobs[job_id]
+                following = next_fire_time(job["time"], max(fire, now))
+                job["next_fire"] = following.isoformat()
+                job["last_fired"] = fire.isoformat()
+                job["fire_count"] += 1
+                heapq.heappush(self._heap, (following, next(self._sequence), job_id))
+                due.append({**job, "fire_time": fire.isoformat()})
+        return due
+
+
+def acquire_dispatch_lock(lock_file: str) -> Optional[int]:
+    """
+    Elect this process as the reminder dispatcher among the processes
+    sharing lock_file (e.g. uvicorn workers), so each reminder is sent once
+    
+    Returns:
+        The lock's file descriptor, held until closed, or None if another
+        process is the dispatcher
+    """
+    Path(lock_file).parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+    if fcntl is None:
+        # Without file locking a single process is assumed
+        return fd
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
@@ -0,0 +1,88 @@
+"""Binary snapshots of MemoryBank state for fast startup"""
+from typing import Dict, Any, Optional
+import marshal
+import os
+import sys
+from pathlib import Path
+from ..tools.logger import get_logger
+
+logger = get_logger(__name__)
+
+SNAPSHOT_MAGIC = b"MBSNAP"
+SNAPSHOT_FORMAT = 2
+
+# Bytes of journal preceding the snapshot offset that are stored in the
+# snapshot, so a snapshot is never replayed against a different journal
+JOURNAL_TAIL_BYTES = 64
+
+
+def journal_tail(journal_file: Path, offset: int) -> bytes:
+    """Read the journal bytes immediately before offset"""
+    start = max(0, offset - JOURNAL_TAIL_BYTES)
+    with open(journal_file, 'rb') as f:
+        f.seek(start)
+        return f.read(offset - start)
+
+
+def write_snapshot(
+    snapshot_file: Path,
+    state: Dict[str, Any],
+    journal_offset: int,
+    tail: bytes
+) -> None:
+    """
+    Atomically write a snapshot
+    
+    Args:
+        snapshot_file: Target path
+        state: MemoryBank state ({"patients", "events": EventStore.to_state()})
+        journal_offset: Journal byte offset the state corresponds to
+        tail: Journal bytes preceding journal_offset (see journal_tail)
+    """
+    payload = marshal.dumps({
+        "format": SNAPSHOT_FORMAT,
+        "python": sys.version_info[:2],
+        "journal_offset": journal_offset,
+        "journal_tail": tail,
+        "state": state,
+    })
+    tmp_file = snapshot_file.with_suffix(snapshot_file.suffix + ".tmp")
+    with open(tmp_file, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, snapshot_file)
+
+
+def read_snapshot(snapshot_file: Path, journal_file: Path) -> Optional[Dict[str, Any]]:
+    """
+    Load a snapshot if it is readable and matches the journal
+    
+    Returns:
+        {"state", "journal_offset"} or None if the journal must be replayed in full
+    """
+    if not snapshot_file.exists():
+        return None
+    try:
+        with open(snapshot_file, 'rb') as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ValueError("bad magic")
+            snapshot = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable snapshot {snapshot_file}: {e}")
+        return None
+    
+    if snapshot.get("format") != SNAPSHOT_FORMAT or snapshot.get("python") != sys.version_info[:2]:
+        logger.warning(f"Ignoring snapshot {snapshot_file} written by another format or Python version")
+        return None
+    
+    offset = snapshot["journal_offset"]
+    if not journal_file.exists() or journal_file.stat().st_size < offset:
+        logger.warning(f"Ignoring snapshot {snapshot_file}: journal is shorter than the snapshot")
+        return None
+    if journal_tail(journal_file, offset) != snapshot["journal_tail"]:
+        logger.warning(f"Ignoring snapshot {snapshot_file}: journal does not match the snapshot")
+        return None
+    
+    return {"state": snapshot["state"], "journal_offset": offset}
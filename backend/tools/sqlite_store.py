@@ -0,0 +1,386 @@
+"""SQLite storage engine with the MemoryBank method surface"""
+from typing import Dict, Any, List, Optional, Callable
+import argparse
+import json
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+from datetime import datetime
+from ..tools.event_store import (
+    MISSING_TIMESTAMP, encode_cursor, decode_cursor, medication_diff, timestamp_to_micros
+)
+from ..tools.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    patient_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id TEXT,
+    type TEXT,
+    timestamp TEXT,
+    ts_micros INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+# Events are ordered and filtered on ts_micros, the sort key MemoryBank uses
+# (timestamp_to_micros: epoch microseconds, MISSING_TIMESTAMP if absent), so
+# both engines page identically whatever the timestamp's offset or format
+INDEXES = """
+DROP INDEX IF EXISTS idx_events_patient_type_ts;
+CREATE INDEX IF NOT EXISTS idx_events_patient_type_micros
+    ON events (patient_id, type, ts_micros);
+CREATE INDEX IF NOT EXISTS idx_events_patient_micros
+    ON events (patient_id, ts_micros);
+"""
+
+
+class SQLiteMemoryBank:
+    """
+    SQLite-backed storage for patient data and events
+    
+    Only the rows a call needs are read, so memory use and startup time do
+    not grow with the size of the history.
+    
+    Listeners see every event in id order, including events committed by
+    other processes (e.g. other uvicorn workers): reads check SQLite's
+    data_version and pass on the rows above the last id delivered.
+    """
+    
+    def __init__(self, db_file: str = "backend/data/memory_v2.db"):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Optional[Dict[str, Any]]], None]] = []
+        self._versions: Dict[str, int] = {}
+        self._patient_writes = 0
+        self._instance = uuid.uuid4().hex[:12]
+        # Highest event id passed to the listeners, and the data_version seen then
+        self._delivered_id = 0
+        self._seen_data_version: Optional[int] = None
+        self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._add_sort_key_column()
+        self._conn.executescript(INDEXES)
+        logger.info(f"SQLiteMemoryBank initialized with {self.count_patients()} patients")
+    
+    def _add_sort_key_column(self) -> None:
+        """Add and fill ts_micros in databases created before it existed"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(events)")}
+        if "ts_micros" in columns:
+            return
+        with self._conn:
+            self._conn.execute("ALTER TABLE events ADD COLUMN ts_micros INTEGER NOT NULL DEFAULT 0")
+            rows = self._conn.execute("SELECT id, timestamp FROM events").fetchall()
+            self._conn.executemany(
+                "UPDATE events SET ts_micros = ? WHERE id = ?",
+                ((timestamp_to_micros(timestamp)[0], event_id) for event_id, timestamp in rows)
+            )
+        logger.info(f"Added the ts_micros sort key to {len(rows)} events in {self.db_file}")
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        self._conn.close()
+    
+    def count_patients(self) -> int:
+        """Number of stored patients"""
+        return self._conn.execute("SELECT COUNT(*) FROM patients").fetchone()[0]
+    
+    def add_patient(self, patient: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Add or update patient; returns the medication diff (see medication_diff)"""
+        patient_id = patient["patient_id"]
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT data FROM patients WHERE patient_id = ?", (patient_id,)
+            ).fetchone()
+            diff = medication_diff(json.loads(row[0]) if row else None, patient)
+            self._conn.execute(
+                "INSERT INTO patients (patient_id, data) VALUES (?, ?) "
+                "ON CONFLICT(patient_id) DO UPDATE SET data = excluded.data",
+                (patient_id, json.dumps(patient))
+            )
+            self._patient_writes += 1
+            self._bump_version(patient_id)
+        logger.info(f"Saved patient {patient_id}")
+        return diff
+    
+    def get_patient(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        """Get patient by ID"""
+        self.refresh()
+        row = self._conn.execute(
+            "SELECT data FROM patients WHERE patient_id = ?", (patient_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def get_all_patients(self) -> List[Dict[str, Any]]:
+        """Get all patients"""
+        self.refresh()
+        rows = self._conn.execute("SELECT data FROM patients ORDER BY rowid")
+        return [json.loads(data) for (data,) in rows]
+    
+    def add_event(self, event: Dict[str, Any]) -> None:
+        """Add event to history"""
+        if not event.get("timestamp"):
+            event["timestamp"] = datetime.now().isoformat()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO events (patient_id, type, timestamp, ts_micros, data) VALUES (?, ?, ?, ?, ?)",
+                    self._event_row(event)
+                )
+            self._deliver()
+            self._bump_version(event.get("patient_id"))
+        logger.debug(f"Added event: {event.get('type')}")
+    
+    def add_events(self, events: List[Dict[str, Any]]) -> None:
+        """Add many events in a single transaction"""
+        for event in events:
+            if not event.get("timestamp"):
+                event["timestamp"] = datetime.now().isoformat()
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO events (patient_id, type, timestamp, ts_micros, data) VALUES (?, ?, ?, ?, ?)",
+                    (self._event_row(event) for event in events)
+                )
+            self._deliver()
+            for event in events:
+                self._bump_version(event.get("patient_id"))
+    
+    def _bump_version(self, patient_id: Any) -> None:
+        """Record a write to a patient's data; call with the lock held, after delivering it"""
+        self._versions[patient_id] = self._versions.get(patient_id, 0) + 1
+    
+    def data_version(self, patient_id: str) -> str:
+        """
+        Opaque version of a patient's record and events
+        
+        Writes through this connection bump the patient's counter; commits by
+        other connections change SQLite's data_version, which conservatively
+        changes the version of every patient. Those commits are delivered to
+        the listeners before their version is returned.
+        """
+        with self._lock:
+            self._sync_external()
+            return f"{self._instance}-{self._seen_data_version}-{self._versions.get(patient_id, 0)}"
+    
+    def patients_version(self) -> str:
+        """Opaque version of the patient list (see data_version for commits by other connections)"""
+        with self._lock:
+            self._sync_external()
+            return f"{self._instance}-{self._seen_data_version}-{self._patient_writes}"
+    
+    def refresh(self) -> int:
+        """
+        Pass events committed by other connections to the listeners
+        
+        Returns:
+            Number of events delivered
+        """
+        if not self._listeners:
+            return 0
+        with self._lock:
+            return self._sync_external()
+    
+    def _sync_external(self) -> int:
+        """Deliver events committed by other connections; call with the lock held"""
+        external = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if external == self._seen_data_version:
+            return 0
+        self._seen_data_version = external
+        return self._deliver()
+    
+    def add_listener(self, listener: Callable[[Optional[Dict[str, Any]]], None]) -> None:
+        """
+        Call listener with every stored event, then with every event added
+        through any connection (see MemoryBank.add_listener)
+        """
+        with self._lock:
+            self._seen_data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            rows = self._conn.execute("SELECT id, data FROM events WHERE id <= ? ORDER BY id",
+                                      (self._delivered_id,))
+            for _, data in rows:
+                listener(json.loads(data))
+            self._listeners.append(listener)
+            self._deliver()
+    
+    def _deliver(self) -> int:
+        """Pass the events above the delivered id to the listeners; call with the lock held"""
+        if not self._listeners:
+            return 0
+        rows = self._conn.execute(
+            "SELECT id, data FROM events WHERE id > ? ORDER BY id", (self._delivered_id,)
+        ).fetchall()
+        for event_id, data in rows:
+            event = json.loads(data)
+            for listener in self._listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    logger.error(f"Event listener failed: {e}")
+            self._delivered_id = event_id
+        return len(rows)
+    
+    @staticmethod
+    def _event_row(event: Dict[str, Any]) -> tuple:
+        """Column values for an event row"""
+        return (
+            event.get("patient_id"),
+            event.get("type"),
+            event.get("timestamp"),
+            timestamp_to_micros(event.get("timestamp"))[0],
+            json.dumps(event)
+        )
+    
+    def get_patient_events(
+        self,
+        patient_id: str,
+        event_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all events for a patient
+        
+        Args:
+            patient_id: Patient identifier
+            event_type: Optional event type filter (dose, symptom, interaction, ...)
+        
+        Returns:
+            Events in insertion order
+        """
+        if event_type is None:
+            rows = self._conn.execute(
+                "SELECT data FROM events WHERE patient_id = ? ORDER BY id", (patient_id,)
+            )
+        else:
+            rows = self._conn.execute(
+                "SELECT data FROM events WHERE patient_id = ? AND type = ? ORDER BY id",
+                (patient_id, event_type)
+            )
+        return [json.loads(data) for (data,) in rows]
+    
+    def query_events(
+        self,
+        patient_id: str,
+        event_type: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Page through a patient's events in timestamp order
+        
+        Args:
+            patient_id: Patient identifier
+            event_type: Optional event type filter
+            since: Inclusive lower bound (ISO timestamp)
+            until: Inclusive upper bound (ISO timestamp)
+            limit: Maximum events per page
+            cursor: next_cursor of the previous page
+        
+        Returns:
+            {"events", "next_cursor"}; next_cursor is None on the last page
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        since, until = _timestamp_bound(since), _timestamp_bound(until)
+        clauses = ["patient_id = ?"]
+        params: List[Any] = [patient_id]
+        if event_type is not None:
+            clauses.append("type = ?")
+            params.append(event_type)
+        if since is not None:
+            clauses.append("ts_micros >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts_micros <= ?")
+            params.append(until)
+        if cursor:
+            after_key, after_id = decode_cursor(cursor)
+            if not isinstance(after_key, int):
+                raise ValueError(f"Invalid cursor '{cursor}'")
+            clauses.append("(ts_micros > ? OR (ts_micros = ? AND id > ?))")
+            params.extend([after_key, after_key, after_id])
+        
+        rows = self._conn.execute(
+            f"SELECT id, ts_micros, data FROM events WHERE {' AND '.join(clauses)} "
+            "ORDER BY ts_micros, id LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+        return {"events": [json.loads(data) for _, _, data in rows[:limit]], "next_cursor": next_cursor}
+    
+    def get_all_events(self) -> List[Dict[str, Any]]:
+        """Get all events"""
+        rows = self._conn.execute("SELECT data FROM events ORDER BY id")
+        return [json.loads(data) for (data,) in rows]
+
+
+def _timestamp_bound(timestamp: Optional[str]) -> Optional[int]:
+    """ts_micros of a since/until bound; raises ValueError if it is not an ISO timestamp"""
+    if timestamp is None:
+        return None
+    key, _ = timestamp_to_micros(timestamp)
+    if key == MISSING_TIMESTAMP:
+        raise ValueError(f"Invalid timestamp '{timestamp}'")
+    return key
+
+
+def migrate_json(source: str, db_file: str) -> SQLiteMemoryBank:
+    """
+    Import a MemoryBank JSON document or journal into a SQLite database
+    
+    Args:
+        source: Path to memory_v2.json (document) or a .jsonl journal
+        db_file: Target SQLite database path
+    
+    Returns:
+        The populated SQLiteMemoryBank
+    """
+    from .persistence import MemoryBank
+    
+    mode = "journal" if Path(source).suffix == ".jsonl" else "json"
+    # Read-only: a missing source is not created and the source is never re-saved
+    memory = MemoryBank(source, mode=mode, read_only=True)
+    bank = SQLiteMemoryBank(db_file)
+    if bank._conn.execute("SELECT 1 FROM events LIMIT 1").fetchone():
+        bank.close()
+        raise ValueError(f"{db_file} already contains events; migrate into a new database")
+    
+    with bank._lock, bank._conn:
+        bank._conn.executemany(
+            "INSERT INTO patients (patient_id, data) VALUES (?, ?) "
+            "ON CONFLICT(patient_id) DO UPDATE SET data = excluded.data",
+            ((p["patient_id"], json.dumps(p)) for p in memory.get_all_patients())
+        )
+    bank.add_events(memory.get_all_events())
+    memory.close()
+    
+    logger.info(
+        f"Migrated {len(memory.get_all_patients())} patients and "
+        f"{len(memory.get_all_events())} events from {source} to {db_file}"
+    )
+    return bank
+
+
+def main() -> None:
+    """Command line entry point for the JSON -> SQLite migration"""
+    parser = argparse.ArgumentParser(description="Import MemoryBank JSON data into SQLite")
+    parser.add_argument("source", nargs="?", default="backend/data/memory_v2.json",
+                        help="JSON document or .jsonl journal to import")
+    parser.add_argument("target", nargs="?", default="backend/data/memory_v2.db",
+                        help="SQLite database to create")
+    args = parser.parse_args()
+    migrate_json(args.source, args.target).close()
+
+
+if __name__ == "__main__":
+    main()
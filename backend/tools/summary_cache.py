@@ -0,0 +1,56 @@
+"""Summary cache - versioned, memory-bounded LRU for computed summaries"""
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+import json
+import threading
+from ..tools.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SummaryCache:
+    """
+    LRU cache of summaries keyed on (patient_id, data version)
+    
+    An entry is only returned while the patient's data version is unchanged,
+    so writes invalidate it without any explicit call. Entries are evicted
+    least recently used first once their estimated size exceeds max_bytes.
+    """
+    
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+        self._entries: "OrderedDict[str, tuple[str, Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, patient_id: str, version: str) -> Optional[Dict[str, Any]]:
+        """Cached summary for this version of the patient's data, if any"""
+        with self._lock:
+            entry = self._entries.get(patient_id)
+            if entry is None or entry[0] != version:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(patient_id)
+            self.stats["hits"] += 1
+            return entry[1]
+    
+    def put(self, patient_id: str, version: str, summary: Dict[str, Any]) -> None:
+        """Store a summary computed from the given data version"""
+        # Serialized length approximates the memory held by the entry
+        size = len(json.dumps(summary, default=str))
+        with self._lock:
+            previous = self._entries.pop(patient_id, None)
+            if previous is not None:
+                self.size -= previous[2]
+            if size > self.max_bytes:
+                return
+            self._entries[patient_id] = (version, summary, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.stats["evictions"] += 1
+    
+    def __len__(self) -> int:
+        return len(self._entries)
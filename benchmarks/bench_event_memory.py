@@ -0,0 +1,92 @@
+"""Benchmark event memory: list of dicts vs the columnar EventStore"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.tools.event_store import EventStore
+
+SYMPTOMS = ["Headache", "Nausea", "Dizziness", "Fatigue", "Cough"]
+TRIAGE = ["low", "medium", "high", "critical"]
+MEDICATIONS = ["Aspirin", "Metformin", "Lisinopril", "Warfarin"]
+
+
+def journal_lines(events: int, patients: int):
+    """Journal-style JSON lines, decoded one at a time as on replay"""
+    for i in range(events):
+        if i % 2:
+            event = {
+                "type": "symptom",
+                "patient_id": f"patient_{i % patients:05d}",
+                "symptom": SYMPTOMS[i % len(SYMPTOMS)],
+                "severity": i % 10 + 1,
+                "triage_level": TRIAGE[i % len(TRIAGE)],
+                "timestamp": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:00"
+            }
+        else:
+            event = {
+                "type": "dose",
+                "patient_id": f"patient_{i % patients:05d}",
+                "medication": MEDICATIONS[i % len(MEDICATIONS)],
+                "scheduled": True,
+                "taken": i % 5 != 0,
+                "timestamp": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:00"
+            }
+        yield json.dumps(event)
+
+
+def measure(build) -> tuple:
+    """Memory retained (bytes) by the result of build(), and its build time"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--patients", type=int, default=5_000)
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print(f"Event memory - {args.events} events, {args.patients} patients")
+    print("=" * 60)
+    
+    def build_dicts():
+        return [json.loads(line) for line in journal_lines(args.events, args.patients)]
+    
+    def build_store():
+        store = EventStore()
+        for line in journal_lines(args.events, args.patients):
+            store.append(json.loads(line))
+        return store
+    
+    dicts, dict_bytes, dict_time = measure(build_dicts)
+    del dicts
+    store, store_bytes, store_time = measure(build_store)
+    
+    start = time.perf_counter()
+    for _ in store.iter_events():
+        pass
+    view_time = time.perf_counter() - start
+    
+    print(f"List of dicts:  {dict_bytes / 1e6:8.1f} MB  ({dict_bytes / args.events:.0f} B/event, built in {dict_time:.2f}s)")
+    print(f"EventStore:     {store_bytes / 1e6:8.1f} MB  ({store_bytes / args.events:.0f} B/event, built in {store_time:.2f}s)")
+    print(f"Reduction:      {dict_bytes / store_bytes:.1f}x")
+    print(f"Dict views of all events: {view_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
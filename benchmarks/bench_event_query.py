@@ -0,0 +1,64 @@
+"""Benchmark time-range event queries: full scan vs the timestamp-sorted index"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.tools.persistence import MemoryBank
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=50_000, help="Events for the queried patient")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print(f"Event queries - {args.events} events for one patient, {args.queries} queries")
+    print("=" * 60)
+    
+    start_time = datetime(2024, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryBank(str(Path(tmp) / "memory.jsonl"), mode="journal")
+        store = memory.data["events"]
+        for i in range(args.events):
+            store.append({
+                "type": "dose" if i % 2 else "symptom",
+                "patient_id": "patient_00001",
+                "timestamp": (start_time + timedelta(minutes=30 * i)).isoformat()
+            })
+        memory._rebuild_indexes()
+        
+        windows = []
+        for q in range(args.queries):
+            since = start_time + timedelta(minutes=30 * (q * args.events // args.queries))
+            windows.append((since.isoformat(), (since + timedelta(days=1)).isoformat()))
+        
+        begin = time.perf_counter()
+        for since, until in windows:
+            scanned = [
+                e for e in memory.get_patient_events("patient_00001")
+                if since <= e["timestamp"] <= until
+            ][:100]
+        scan_time = time.perf_counter() - begin
+        
+        memory.query_events("patient_00001", limit=1)
+        begin = time.perf_counter()
+        for since, until in windows:
+            page = memory.query_events("patient_00001", since=since, until=until, limit=100)
+        index_time = time.perf_counter() - begin
+        assert page["events"] == scanned
+        memory.close()
+    
+    print(f"Full scan:       {scan_time / args.queries * 1000:8.2f} ms/query")
+    print(f"Sorted index:    {index_time / args.queries * 1000:8.2f} ms/query")
+    print(f"Speedup:         {scan_time / index_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
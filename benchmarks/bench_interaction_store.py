@@ -0,0 +1,88 @@
+"""Benchmark the memory-mapped interaction store against the in-memory MedicationDB"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.tools.med_db import MedicationDB
+from backend.tools.interaction_store import MappedInteractionDB, read_interaction_rows, write_interaction_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drugs", type=int, default=20_000)
+    parser.add_argument("--pairs", type=int, default=300_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print(f"Interaction store - {args.drugs} drugs, {args.pairs} rules")
+    print("=" * 60)
+    
+    rng = random.Random(7)
+    names = [f"drug{i:06d}" for i in range(args.drugs)]
+    rules = [(rng.choice(names), rng.choice(names), f"warning {rng.randrange(500)}") for _ in range(args.pairs)]
+    probes = [(rng.choice(names), rng.choice(names)) for _ in range(args.lookups)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "interactions.csv"
+        with open(source, 'w') as f:
+            f.write("drug_a,drug_b,warning\n")
+            f.writelines(f"{a},{b},{w}\n" for a, b, w in rules)
+        store_file = Path(tmp) / "interactions.bin"
+        
+        begin = time.perf_counter()
+        write_interaction_store(read_interaction_rows(str(source)), str(store_file))
+        print(f"Build store:     {(time.perf_counter() - begin) * 1000:8.0f} ms  "
+              f"({store_file.stat().st_size / 1024 / 1024:.1f} MB)")
+        
+        def load_dict() -> MedicationDB:
+            db = MedicationDB()
+            for a, b, w in read_interaction_rows(str(source)):
+                db.interactions[(a, b)] = w
+                db._link(a, b, w)
+            return db
+        
+        begin = time.perf_counter()
+        db = load_dict()
+        dict_load = time.perf_counter() - begin
+        begin = time.perf_counter()
+        store = MappedInteractionDB(str(store_file))
+        mapped_load = time.perf_counter() - begin
+        
+        # Heap held by each, measured on a second load (tracemalloc slows loading)
+        tracemalloc.start()
+        second = load_dict()
+        dict_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del second
+        tracemalloc.start()
+        second = MappedInteractionDB(str(store_file))
+        mapped_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        second.close()
+        
+        print(f"Load in-memory:  {dict_load * 1000:8.1f} ms  {dict_memory / 1024 / 1024:8.1f} MB heap")
+        print(f"Open mapped:     {mapped_load * 1000:8.1f} ms  {mapped_memory / 1024 / 1024:8.1f} MB heap")
+        
+        begin = time.perf_counter()
+        expected = [db.check_interaction(a, b) for a, b in probes]
+        dict_time = time.perf_counter() - begin
+        begin = time.perf_counter()
+        found = [store.check_interaction(a, b) for a, b in probes]
+        mapped_time = time.perf_counter() - begin
+        assert found == expected
+        store.close()
+    
+    print(f"Lookup in-memory:{dict_time / args.lookups * 1e6:8.2f} us")
+    print(f"Lookup mapped:   {mapped_time / args.lookups * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark interaction checks: pairwise dict lookups vs the adjacency index"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.tools.med_db import MedicationDB
+
+
+def pairwise(db: MedicationDB, medications):
+    """The previous check: both key orders of every pair in the tuple-keyed table"""
+    found = []
+    for i in range(len(medications)):
+        for j in range(i + 1, len(medications)):
+            med1, med2 = medications[i].lower(), medications[j].lower()
+            warning = db.interactions.get((med1, med2)) or db.interactions.get((med2, med1))
+            if warning:
+                found.append((i, j, warning))
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drugs", type=int, default=20_000, help="Distinct drugs in the database")
+    parser.add_argument("--pairs", type=int, default=300_000, help="Interaction rules")
+    parser.add_argument("--meds", type=int, nargs="+", default=[5, 15, 30, 60], help="Medications per patient")
+    parser.add_argument("--patients", type=int, default=2_000)
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print(f"Interaction checks - {args.drugs} drugs, {args.pairs} rules, {args.patients} patients")
+    print("=" * 60)
+    
+    rng = random.Random(42)
+    names = [f"drug{i:06d}" for i in range(args.drugs)]
+    # Skewed popularity: common drugs have many rules
+    popular = names[:max(1, args.drugs // 50)]
+    db = MedicationDB()
+    begin = time.perf_counter()
+    for _ in range(args.pairs):
+        med1 = rng.choice(popular) if rng.random() < 0.5 else rng.choice(names)
+        med2 = rng.choice(names)
+        if med1 != med2:
+            db.interactions[(med1, med2)] = f"{med1}/{med2}"
+            db._link(med1, med2, f"{med1}/{med2}")
+    print(f"Index build:     {(time.perf_counter() - begin) * 1000:8.0f} ms")
+    
+    for k in args.meds:
+        patients = [
+            [rng.choice(popular) if rng.random() < 0.3 else rng.choice(names) for _ in range(k)]
+            for _ in range(args.patients)
+        ]
+        
+        begin = time.perf_counter()
+        expected = [len(pairwise(db, meds)) for meds in patients]
+        pairwise_time = time.perf_counter() - begin
+        
+        begin = time.perf_counter()
+        found = [len(db.find_interactions(meds)) for meds in patients]
+        index_time = time.perf_counter() - begin
+        assert found == expected
+        
+        print(f"k={k:3d}  pairwise {pairwise_time / args.patients * 1e6:8.1f} us/patient  "
+              f"index {index_time / args.patients * 1e6:8.1f} us/patient  "
+              f"({pairwise_time / index_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
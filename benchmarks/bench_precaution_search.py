@@ -0,0 +1,74 @@
+"""Benchmark precaution search: linear substring scan vs the prebuilt indexes"""
+import argparse
+import json
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.tools.drug_names import DrugNameNormalizer
+from backend.tools.precautions import PrecautionCatalog
+
+
+def scan(entries, name):
+    """The Next.js route: first entry equal to or containing the name"""
+    return next((m for m in entries if m["name"].lower() == name or name in m["name"].lower()), None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--medicines", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print(f"Precaution search - {args.medicines} medicines, {args.queries} queries")
+    print("=" * 60)
+    
+    rng = random.Random(3)
+    names = sorted({
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(6, 14)))
+        for _ in range(args.medicines)
+    })
+    data = {name: {"name": name.title(), "precautions": ["Take with food"], "interactions": []} for name in names}
+    queries = []
+    for _ in range(args.queries):
+        name = rng.choice(names)
+        start = rng.randrange(len(name) - 3)
+        queries.append(rng.choice([name, name[:4], name[start:start + 4]]))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "precautions.json"
+        path.write_text(json.dumps(data))
+        begin = time.perf_counter()
+        catalog = PrecautionCatalog(str(path), normalizer=DrugNameNormalizer())
+        print(f"Index build:     {(time.perf_counter() - begin) * 1000:8.0f} ms")
+    
+    entries = list(data.values())
+    begin = time.perf_counter()
+    for query in queries:
+        scan(entries, query)
+    scan_time = time.perf_counter() - begin
+    
+    begin = time.perf_counter()
+    for query in queries:
+        catalog.search(query, limit=10)
+    search_time = time.perf_counter() - begin
+    
+    begin = time.perf_counter()
+    for query in queries:
+        catalog.autocomplete(query[:3], limit=10)
+    complete_time = time.perf_counter() - begin
+    
+    print(f"Linear scan:     {scan_time / args.queries * 1000:8.3f} ms/query (first match only)")
+    print(f"Indexed search:  {search_time / args.queries * 1000:8.3f} ms/query (top 10)")
+    print(f"Autocomplete:    {complete_time / args.queries * 1000:8.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
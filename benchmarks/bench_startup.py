@@ -0,0 +1,66 @@
+"""Benchmark MemoryBank cold start: full journal replay vs snapshot + tail"""
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.tools.persistence import MemoryBank
+
+logging.disable(logging.INFO)
+
+
+def build_journal(journal_file: Path, events: int, patients: int) -> None:
+    """Write a journal with the given number of patients and events"""
+    memory = MemoryBank(str(journal_file), mode="journal")
+    for p in range(patients):
+        memory.add_patient({"patient_id": f"patient_{p}", "name": f"Patient {p}", "age": 70, "medications": []})
+    for i in range(events):
+        memory.add_event({
+            "type": "symptom" if i % 3 else "dose",
+            "patient_id": f"patient_{i % patients}",
+            "symptom": "Headache",
+            "severity": 4,
+            "triage_level": "medium",
+            "timestamp": f"2024-01-{1 + i % 28:02d}T09:00:00"
+        })
+    memory.close()
+
+
+def timed_load(journal_file: Path) -> float:
+    """Seconds to construct a MemoryBank from the journal"""
+    start = time.perf_counter()
+    MemoryBank(str(journal_file), mode="journal").close()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--patients", type=int, default=5_000)
+    parser.add_argument("--tail", type=int, default=10_000, help="events written after the snapshot")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print(f"MemoryBank cold start - {args.events} events, {args.patients} patients")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        journal_file = Path(tmp) / "memory.jsonl"
+        build_journal(journal_file, args.events, args.patients)
+        print(f"Full journal replay:     {timed_load(journal_file):.2f}s")
+        
+        memory = MemoryBank(str(journal_file), mode="journal")
+        memory.compact()
+        for i in range(args.tail):
+            memory.add_event({"type": "symptom", "patient_id": "patient_0", "symptom": "Cough"})
+        memory.close()
+        print(f"Snapshot + {args.tail} tail: {timed_load(journal_file):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
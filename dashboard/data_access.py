@@ -0,0 +1,242 @@
+"""Dashboard data access - cached, incremental loading of patients and events"""
+from typing import Dict, Any, List, Optional, NamedTuple
+import json
+import threading
+import urllib.parse
+import urllib.request
+from pathlib import Path
+import pandas as pd
+
+
+class Update(NamedTuple):
+    """Changes found by one poll of a data source"""
+    reset: bool
+    patients: Dict[str, Dict[str, Any]]
+    events: List[Dict[str, Any]]
+    # Events stored in total, when the source knows it without loading them
+    event_total: Optional[int] = None
+
+
+class FileSource:
+    """
+    Reads the MemoryBank files directly
+    
+    A journal (.jsonl) is tailed from the last byte offset, so each poll
+    parses only records appended since the previous one; it is re-read
+    from the start if it was replaced (compaction) or truncated. A JSON
+    document is re-read only when its size or modification time changes.
+    
+    The file read is the one the backend writes: the journal for journal
+    storage, the document for json storage. Without a storage setting, the
+    more recently modified of the two is used. SQLite and sharded storage
+    are read through ApiSource.
+    """
+    
+    def __init__(self, data_file: str = "backend/data/memory_v2.json", storage: Optional[str] = None):
+        """
+        Args:
+            data_file: MemoryBank path (document or journal)
+            storage: json or journal, as MEDIBUDDY_STORAGE (default: from the files)
+        """
+        if storage not in (None, "json", "journal"):
+            raise ValueError(f"The dashboard cannot read {storage} storage files; set MEDIBUDDY_DASHBOARD_API")
+        path = Path(data_file)
+        journal = path if path.suffix == ".jsonl" else path.with_suffix(".jsonl")
+        document = path.with_suffix(".json")
+        if storage is not None:
+            self.is_journal = storage == "journal"
+        elif path.suffix == ".jsonl" or not document.exists():
+            self.is_journal = journal.exists() or path.suffix == ".jsonl"
+        else:
+            # A journal left over from an earlier run must not hide the live document
+            self.is_journal = journal.exists() and journal.stat().st_mtime > document.stat().st_mtime
+        self.path = journal if self.is_journal else document
+        self._offset = 0
+        self._identity: Optional[tuple] = None
+    
+    def exists(self) -> bool:
+        """Whether the data file has been created yet"""
+        return self.path.exists()
+    
+    def poll(self) -> Update:
+        """Read what changed since the last poll"""
+        if not self.path.exists():
+            return Update(False, {}, [])
+        stat = self.path.stat()
+        if self.is_journal:
+            return self._poll_journal(stat)
+        return self._poll_document(stat)
+    
+    def _poll_journal(self, stat) -> Update:
+        """Parse journal records appended since the last poll"""
+        reset = stat.st_ino != self._identity or stat.st_size < self._offset
+        if reset:
+            self._identity = stat.st_ino
+            self._offset = 0
+        if stat.st_size == self._offset:
+            return Update(reset, {}, [])
+        
+        patients: Dict[str, Dict[str, Any]] = {}
+        events: List[Dict[str, Any]] = []
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Still being written
+                    break
+                self._offset += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("op") == "patient":
+                    patient = record["patient"]
+                    patients[patient["patient_id"]] = patient
+                elif record.get("op") == "event":
+                    events.append(record["event"])
+        return Update(reset, patients, events)
+    
+    def _poll_document(self, stat) -> Update:
+        """Re-read the whole document if it changed"""
+        identity = (stat.st_mtime_ns, stat.st_size)
+        if identity == self._identity:
+            return Update(False, {}, [])
+        self._identity = identity
+        if stat.st_size == 0:
+            return Update(True, {}, [])
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        return Update(True, data.get("patients", {}), data.get("events", []))
+    
+    def poll_patient(self, patient_id: str, known: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Events are already delivered by poll()"""
+        return []
+
+
+class ApiSource:
+    """
+    Reads from the backend API instead of the raw files
+    
+    Each poll reads the event total and the patient list version, and lists
+    the patients only when that version changed. A patient's events are
+    fetched only when they are shown, in pages of page_size, starting from
+    the newest timestamp already held.
+    """
+    
+    def __init__(self, base_url: str = "http://localhost:8000", page_size: int = 500, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.page_size = page_size
+        self.timeout = timeout
+        self._patients_version: Optional[str] = None
+    
+    def exists(self) -> bool:
+        """The API is assumed reachable; request errors surface on poll"""
+        return True
+    
+    def _get(self, path: str, **params: Any) -> Dict[str, Any]:
+        """GET a JSON endpoint, dropping unset query parameters"""
+        query = urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+        url = f"{self.base_url}{path}" + (f"?{query}" if query else "")
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            return json.load(response)
+    
+    def poll(self) -> Update:
+        """
+        Event total, and the patient list if it changed; events are loaded
+        per patient
+        """
+        totals = self._get("/api/analytics/totals")
+        if totals["patients_version"] == self._patients_version:
+            return Update(False, {}, [], totals["total_events"])
+        patients = self._get("/api/patients")["patients"]
+        self._patients_version = totals["patients_version"]
+        return Update(False, {p["patient_id"]: p for p in patients}, [], totals["total_events"])
+    
+    def poll_patient(self, patient_id: str, known: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Events of a patient newer than the ones already known
+        
+        Pages start at the latest known timestamp; events at exactly that
+        timestamp that are already known are skipped.
+        """
+        since = known[-1].get("timestamp") if known else None
+        skip = sum(1 for e in reversed(known) if e.get("timestamp") == since) if since else 0
+        
+        new_events: List[Dict[str, Any]] = []
+        cursor = None
+        path = f"/api/events/{urllib.parse.quote(patient_id, safe='')}"
+        while True:
+            page = self._get(path, since=since, limit=self.page_size, cursor=cursor)
+            new_events.extend(page["events"])
+            cursor = page.get("next_cursor")
+            if not cursor:
+                break
+        return new_events[skip:]
+
+
+class DashboardData:
+    """
+    Cached view of patients and events for the dashboard
+    
+    refresh() applies only what the source reports as new. Events are kept
+    per patient, and each patient's DataFrame is extended with new rows
+    rather than rebuilt.
+    """
+    
+    def __init__(self, source):
+        self.source = source
+        self.patients: Dict[str, Dict[str, Any]] = {}
+        # Events loaded so far, and the stored total if the source reports it
+        self.event_count = 0
+        self.event_total: Optional[int] = None
+        self._events: Dict[str, List[Dict[str, Any]]] = {}
+        self._frames: Dict[str, pd.DataFrame] = {}
+        # Shared by every Streamlit session of the process
+        self._lock = threading.Lock()
+    
+    def refresh(self) -> None:
+        """Pull changes from the source"""
+        with self._lock:
+            update = self.source.poll()
+            if update.reset:
+                self.patients = {}
+                self.event_count = 0
+                self._events = {}
+                self._frames = {}
+            self.patients.update(update.patients)
+            self._add_events(update.events)
+            if update.event_total is not None:
+                self.event_total = update.event_total
+    
+    @property
+    def total_events(self) -> int:
+        """Events stored, not only the ones loaded so far"""
+        return self.event_total if self.event_total is not None else self.event_count
+    
+    def _add_events(self, events: List[Dict[str, Any]]) -> None:
+        """File events under their patient"""
+        for event in events:
+            self._events.setdefault(event.get("patient_id"), []).append(event)
+        self.event_count += len(events)
+    
+    def patient_events(self, patient_id: str) -> List[Dict[str, Any]]:
+        """All known events of a patient, fetching new ones if the source is lazy"""
+        with self._lock:
+            known = self._events.get(patient_id, [])
+            self._add_events(self.source.poll_patient(patient_id, known))
+            return list(self._events.get(patient_id, []))
+    
+    def patient_frame(self, patient_id: str) -> pd.DataFrame:
+        """
+        DataFrame of the patient's events loaded so far (see patient_events),
+        extended with new rows instead of being rebuilt
+        """
+        with self._lock:
+            events = self._events.get(patient_id, [])
+            frame = self._frames.get(patient_id)
+            if frame is None:
+                frame = pd.DataFrame(events)
+            elif len(frame) < len(events):
+                frame = pd.concat([frame, pd.DataFrame(events[len(frame):])], ignore_index=True)
+            self._frames[patient_id] = frame
+            return frame
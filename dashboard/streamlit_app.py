@@ -1,33 +1,46 @@
 """Streamlit Dashboard for Clinicians"""
 import streamlit as st
-import json
-from pathlib import Path
-import pandas as pd
-from datetime import datetime
+import os
+from data_access import DashboardData, FileSource, ApiSource
 
 st.set_page_config(page_title="MediBuddy v2 Dashboard", page_icon="🏥", layout="wide")
 
 st.title("🏥 MediBuddy v2 - Clinician Dashboard")
 st.markdown("**AI Multi-Agent Medication Adherence Assistant**")
 
+
+@st.cache_resource
+def get_dashboard_data() -> DashboardData:
+    """Data access layer shared across reruns; each rerun only reads what changed"""
+    api_url = os.getenv("MEDIBUDDY_DASHBOARD_API")
+    if api_url:
+        return DashboardData(ApiSource(api_url))
+    storage = os.getenv("MEDIBUDDY_STORAGE")
+    if int(os.getenv("MEDIBUDDY_SHARDS", "1")) > 1:
+        storage = "sharded"
+    return DashboardData(FileSource(os.getenv("MEDIBUDDY_DATA_FILE", "backend/data/memory_v2.json"), storage))
+
+
 # Load data
-data_file = Path("backend/data/memory_v2.json")
+try:
+    dashboard_data = get_dashboard_data()
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+source = dashboard_data.source
 
-if not data_file.exists():
+if not source.exists():
     st.warning("⚠️ No data file found. Please run the backend and create patients first.")
-    st.info(f"Expected file: {data_file.absolute()}")
+    st.info(f"Expected file: {source.path.absolute()}")
     st.stop()
 
-with open(data_file, 'r') as f:
-    data = json.load(f)
-
-patients = data.get("patients", {})
-events = data.get("events", [])
+dashboard_data.refresh()
+patients = dashboard_data.patients
 
 # Sidebar
 st.sidebar.header("📊 Overview")
 st.sidebar.metric("Total Patients", len(patients))
-st.sidebar.metric("Total Events", len(events))
+st.sidebar.metric("Total Events", dashboard_data.total_events)
 
 if not patients:
     st.info("No patients found. Create a patient using the API or frontend.")
@@ -39,7 +52,7 @@ selected_patient_id = st.sidebar.selectbox("Select Patient", patient_ids)
 
 # Main content
 patient = patients[selected_patient_id]
-patient_events = [e for e in events if e.get("patient_id") == selected_patient_id]
+patient_events = dashboard_data.patient_events(selected_patient_id)
 
 col1, col2 = st.columns(2)
 
@@ -62,8 +75,8 @@ with col2:
 # Events
 st.subheader("📋 Recent Events")
 if patient_events:
-    # Create DataFrame
-    events_df = pd.DataFrame(patient_events)
+    # Cached per-patient DataFrame, extended with new events only
+    events_df = dashboard_data.patient_frame(selected_patient_id)
     
     # Display event types
     event_types = events_df['type'].value_counts()
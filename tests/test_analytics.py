@@ -0,0 +1,164 @@
+"""Unit tests for AnalyticsAgent aggregates"""
+import pytest
+from datetime import date, timedelta
+from backend.tools.persistence import MemoryBank
+from backend.agents.analytics_agent import AnalyticsAgent
+from backend.tools.summary_cache import SummaryCache
+
+
+def _patient(patient_id):
+    return {"patient_id": patient_id, "name": "Test Patient", "medications": []}
+
+
+def test_summary_from_running_aggregates(tmp_path):
+    """Test events before and after the agent starts are both counted"""
+    memory = MemoryBank(str(tmp_path / "memory.json"))
+    memory.add_patient(_patient("p1"))
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": True})
+    
+    analytics = AnalyticsAgent(memory)
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": False})
+    for i in range(7):
+        memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": f"s{i}", "triage_level": "low"})
+    memory.add_event({"type": "interaction", "patient_id": "p1", "interaction": "Aspirin + Warfarin"})
+    memory.add_event({"type": "dose", "patient_id": "p2", "scheduled": True, "taken": False})
+    
+    summary = analytics.generate_summary("p1")
+    assert summary["total_doses"] == 2
+    assert summary["taken_doses"] == 1
+    assert summary["adherence_rate"] == 50.0
+    assert [s["symptom"] for s in summary["recent_symptoms"]] == ["s2", "s3", "s4", "s5", "s6"]
+    assert summary["interactions_detected"] == ["Aspirin + Warfarin"]
+    assert "High severity symptoms reported" not in summary["alerts"]
+    assert analytics.calculate_adherence("p1") == 50.0
+    assert analytics.calculate_adherence("missing") == 0.0
+    
+    memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Chest pain", "triage_level": "critical"})
+    assert "High severity symptoms reported" in analytics.generate_summary("p1")["alerts"]
+
+
+def test_aggregates_follow_other_workers(tmp_path):
+    """Test events written by another process's MemoryBank reach the aggregates"""
+    journal = str(tmp_path / "memory.jsonl")
+    memory = MemoryBank(journal, mode="journal", shared=True)
+    analytics = AnalyticsAgent(memory)
+    other = MemoryBank(journal, mode="journal", shared=True)
+    other.add_patient(_patient("p1"))
+    other.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": True})
+    
+    assert analytics.generate_summary("p1")["taken_doses"] == 1
+    other.compact()
+    other.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": False})
+    assert analytics.generate_summary("p1")["total_doses"] == 2
+
+
+def test_cohort_summary_filters(tmp_path):
+    """Test cohort metrics with medication and age band filters"""
+    memory = MemoryBank(str(tmp_path / "memory.json"))
+    analytics = AnalyticsAgent(memory)
+    for patient_id, age, medication, taken in (("p1", 70, "Warfarin", [True, False]),
+                                               ("p2", 45, "Aspirin", [True, True]),
+                                               ("p3", 80, "Aspirin", [False, False])):
+        memory.add_patient({"patient_id": patient_id, "name": patient_id, "age": age,
+                            "medications": [{"name": medication, "dosage": "1", "frequency": "daily"}]})
+        for dose in taken:
+            memory.add_event({"type": "dose", "patient_id": patient_id, "scheduled": True, "taken": dose})
+    memory.add_event({"type": "interaction", "patient_id": "p2", "interaction": "Aspirin + Ibuprofen"})
+    
+    cohort = analytics.generate_cohort_summary()
+    assert cohort["patient_count"] == 3
+    assert cohort["aggregate"]["overall_adherence_rate"] == 50.0
+    assert cohort["aggregate"]["missed_doses"] == 3
+    assert cohort["aggregate"]["total_events"] == 7
+    assert cohort["aggregate"]["alert_counts"] == {"low_adherence": 2, "high_severity": 0, "interactions": 1}
+    assert {p["patient_id"]: p["adherence_rate"] for p in cohort["patients"]} == {"p1": 50.0, "p2": 100.0, "p3": 0.0}
+    
+    aspirin_seniors = analytics.generate_cohort_summary(medication="aspirin", age_band="65+")
+    assert [p["patient_id"] for p in aspirin_seniors["patients"]] == ["p3"]
+    assert analytics.generate_cohort_summary(age_band="40-64")["patient_count"] == 1
+    assert analytics.generate_cohort_summary(medication="Metformin")["patient_count"] == 0
+    with pytest.raises(ValueError):
+        analytics.generate_cohort_summary(age_band="old")
+
+
+def test_summary_cache_follows_data_version(tmp_path):
+    """Test cached summaries are reused until the patient's data changes"""
+    memory = MemoryBank(str(tmp_path / "memory.json"))
+    analytics = AnalyticsAgent(memory)
+    memory.add_patient(_patient("p1"))
+    memory.add_patient(_patient("p2"))
+    
+    version, first = analytics.get_summary("p1")
+    assert analytics.get_summary("p1") == (version, first)
+    assert analytics.summary_cache.stats["hits"] == 1
+    
+    memory.add_event({"type": "dose", "patient_id": "p2", "scheduled": True, "taken": True})
+    assert memory.data_version("p1") == version
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": False})
+    new_version, second = analytics.get_summary("p1")
+    assert new_version != version
+    assert second["total_doses"] == 1
+
+
+def test_summary_cache_evicts_by_size():
+    """Test the cache stays within its memory bound, dropping the least recently used"""
+    cache = SummaryCache(max_bytes=300)
+    for i in range(5):
+        cache.put(f"p{i}", "v1", {"patient_id": f"p{i}", "notes": "x" * 80})
+        cache.get("p0", "v1")
+    
+    assert cache.size <= 300
+    assert cache.get("p0", "v1") is not None
+    assert cache.get("p1", "v1") is None
+    assert cache.get("p0", "v2") is None
+
+
+def test_rolling_and_daily_adherence(tmp_path):
+    """Test windowed adherence and daily series from per-day buckets"""
+    memory = MemoryBank(str(tmp_path / "memory.json"))
+    analytics = AnalyticsAgent(memory)
+    memory.add_patient(_patient("p1"))
+    as_of = date(2024, 3, 31)
+    for days_ago, medication, taken in ((0, "Aspirin", True), (0, "Metformin", False),
+                                        (5, "Aspirin", False), (20, "Aspirin", True),
+                                        (60, "Metformin", True), (200, "Aspirin", False)):
+        day = as_of - timedelta(days=days_ago)
+        memory.add_event({"type": "dose", "patient_id": "p1", "medication": medication,
+                          "scheduled": True, "taken": taken, "timestamp": f"{day.isoformat()}T09:00:00"})
+    
+    windows = analytics.rolling_adherence("p1", as_of=as_of)
+    assert windows["7d"] == {"scheduled": 3, "taken": 1, "adherence_rate": 33.3}
+    assert windows["30d"]["adherence_rate"] == 50.0
+    assert windows["90d"]["scheduled"] == 5
+    assert analytics.rolling_adherence("p1", as_of=as_of, medication="Metformin")["90d"]["taken"] == 1
+    
+    daily = analytics.daily_adherence("p1", days=7, as_of=as_of)
+    assert len(daily) == 7
+    assert daily[-1] == {"date": "2024-03-31", "scheduled": 2, "taken": 1, "adherence_rate": 50.0}
+    assert daily[0]["adherence_rate"] is None
+    
+    report = analytics.adherence_report("p1", days=7, as_of=as_of)
+    assert sorted(report["medications"]) == ["Aspirin", "Metformin"]
+    assert report["medications"]["Aspirin"]["windows"]["7d"]["scheduled"] == 2
+
+
+def test_top_risk_patients(tmp_path):
+    """Test the risk queue orders patients and follows new events"""
+    memory = MemoryBank(str(tmp_path / "memory.json"))
+    analytics = AnalyticsAgent(memory)
+    for i in range(5):
+        memory.add_event({"type": "dose", "patient_id": f"p{i}", "scheduled": True, "taken": True})
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": False})
+    memory.add_event({"type": "symptom", "patient_id": "p3", "symptom": "Chest pain", "triage_level": "critical"})
+    
+    top = analytics.top_risk_patients(2)
+    assert [p["patient_id"] for p in top] == ["p1", "p3"]
+    assert top[0]["risk_score"] == 50.0
+    assert top[1]["recent_critical"] == 1
+    
+    memory.add_event({"type": "interaction", "patient_id": "p3", "interaction": "Aspirin + Warfarin"})
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": True})
+    top = analytics.top_risk_patients(3)
+    assert [p["patient_id"] for p in top[:2]] == ["p3", "p1"]
+    assert [p["risk_score"] for p in top] == [40.0, 33.3, 0.0]
+    assert len(analytics.top_risk_patients(10)) == 5
@@ -0,0 +1,101 @@
+"""Unit tests for the dashboard data access layer"""
+import os
+
+import pytest
+
+from backend.tools.persistence import MemoryBank
+from dashboard.data_access import ApiSource, DashboardData, FileSource
+
+
+def test_journal_source_reads_only_new_records(tmp_path):
+    """Test the journal is tailed and the patient DataFrame grows incrementally"""
+    journal = str(tmp_path / "memory.jsonl")
+    memory = MemoryBank(journal, mode="journal")
+    memory.add_patient({"patient_id": "p1", "name": "Patient One", "medications": []})
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": True})
+    
+    source = FileSource(journal)
+    data = DashboardData(source)
+    data.refresh()
+    assert data.patients["p1"]["name"] == "Patient One"
+    assert len(data.patient_events("p1")) == 1
+    first_frame = data.patient_frame("p1")
+    offset = source._offset
+    
+    data.refresh()
+    assert source._offset == offset
+    
+    memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Headache"})
+    memory.add_event({"type": "symptom", "patient_id": "p2", "symptom": "Cough"})
+    data.refresh()
+    assert data.event_count == 3
+    frame = data.patient_frame("p1")
+    assert len(frame) == 2 and len(first_frame) == 1
+    assert list(frame["type"]) == ["dose", "symptom"]
+    
+    memory.compact()
+    data.refresh()
+    assert data.event_count == 3
+    assert len(data.patient_frame("p1")) == 2
+
+
+def test_document_source_reloads_on_change(tmp_path):
+    """Test the JSON document is re-read only after it changes"""
+    document = str(tmp_path / "memory.json")
+    memory = MemoryBank(document)
+    memory.add_patient({"patient_id": "p1", "name": "Patient One", "medications": []})
+    
+    source = FileSource(document)
+    data = DashboardData(source)
+    data.refresh()
+    assert not source.poll().reset
+    
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": False})
+    data.refresh()
+    assert len(data.patient_events("p1")) == 1
+
+
+def test_stale_journal_does_not_hide_document(tmp_path):
+    """Test a leftover journal is ignored while the backend writes the document"""
+    journal = MemoryBank(str(tmp_path / "memory.jsonl"), mode="journal")
+    journal.add_patient({"patient_id": "old", "name": "Old Patient", "medications": []})
+    document = tmp_path / "memory.json"
+    memory = MemoryBank(str(document))
+    memory.add_patient({"patient_id": "p1", "name": "Patient One", "medications": []})
+    os.utime(tmp_path / "memory.jsonl", (1, 1))
+    
+    for source in (FileSource(str(document)), FileSource(str(document), storage="json")):
+        data = DashboardData(source)
+        data.refresh()
+        assert list(data.patients) == ["p1"]
+    
+    assert FileSource(str(document), storage="journal").is_journal
+    with pytest.raises(ValueError):
+        FileSource(str(document), storage="sqlite")
+
+
+def test_api_source_polls_totals_and_changed_patient_lists():
+    """Test the API source reports the stored event total and lists patients only after a change"""
+    calls = []
+    
+    class StubApi(ApiSource):
+        version = "v1"
+        
+        def _get(self, path, **params):
+            calls.append(path)
+            if path == "/api/patients":
+                return {"patients": [{"patient_id": "p1"}, {"patient_id": "p2"}]}
+            return {"total_events": 42, "patients_version": self.version}
+    
+    source = StubApi("http://backend")
+    data = DashboardData(source)
+    data.refresh()
+    data.refresh()
+    assert calls == ["/api/analytics/totals", "/api/patients", "/api/analytics/totals"]
+    assert sorted(data.patients) == ["p1", "p2"]
+    assert data.event_count == 0
+    assert data.total_events == 42
+    
+    source.version = "v2"
+    data.refresh()
+    assert calls[-1] == "/api/patients"
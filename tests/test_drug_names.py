@@ -0,0 +1,77 @@
+"""Unit tests for drug name normalization"""
+from backend.tools.drug_names import DrugNameNormalizer
+from backend.tools.precautions import PrecautionCatalog
+from backend.agents.interaction_agent import InteractionAgent
+
+
+def test_brand_salt_dose_and_misspelling_resolution():
+    """Test names in different forms resolve to the generic name"""
+    normalizer = DrugNameNormalizer()
+    assert normalizer.resolve("Coumadin") == "warfarin"
+    assert normalizer.resolve("warfarin sodium 5mg") == "warfarin"
+    assert normalizer.resolve("Advil 200 mg tablets") == "ibuprofen"
+    assert normalizer.resolve("Tylenol Extra Strength") == "acetaminophen"
+    assert normalizer.resolve("Potassium chloride") == "potassium"
+    assert normalizer.resolve("Warfrin") == "warfarin"
+    assert normalizer.resolve("metfromin") == "metformin"
+    # Similar but different drugs are not merged
+    assert normalizer.resolve("Atorvastatin 20mg") == "atorvastatin"
+    assert normalizer.canonical("Warfrin") == "warfrin"
+    
+    normalizer.resolve("Coumadin")
+    assert normalizer.stats()["cache_hits"] == 1
+    normalizer.add_synonyms({"Lipitor": "atorvastatin"})
+    assert normalizer.stats()["cache_size"] == 0
+    assert normalizer.resolve("lipitor") == "atorvastatin"
+
+
+def test_unrelated_names_are_not_merged():
+    """Test names that only resemble or mention a known drug stay unresolved"""
+    normalizer = DrugNameNormalizer()
+    assert normalizer.resolve("fosinopril") == "fosinopril"
+    assert normalizer.resolve("alcohol-free cough syrup") == "alcohol free cough"
+    assert normalizer.resolve("aspirin-free") == "aspirin free"
+    assert normalizer.resolve("losartan potassium hydrochlorothiazide") == "losartan potassium hydrochlorothiazide"
+    assert normalizer.resolve("potassium iodide") == "potassium iodide"
+    assert normalizer.resolve("Bayer Aspirin") == "aspirin"
+    
+    agent = InteractionAgent(normalizer=normalizer)
+    assert agent.check_interactions(["metformin", "alcohol-free cough syrup"]) == []
+    assert agent.check_interactions(["warfarin", "aspirin-free"]) == []
+    assert agent.check_interactions(["fosinopril", "potassium iodide"]) == []
+
+
+def test_interaction_agent_resolves_brand_names():
+    """Test brand and salt forms match the generic interaction rules"""
+    agent = InteractionAgent(normalizer=DrugNameNormalizer())
+    interactions = agent.check_interactions(["Coumadin", "metformin", "Bayer Aspirin 81mg"])
+    assert interactions == ["Coumadin + Bayer Aspirin 81mg: Increased bleeding risk"]
+
+
+def test_precaution_catalog_lookup():
+    """Test precautions are found by canonical name"""
+    catalog = PrecautionCatalog(normalizer=DrugNameNormalizer())
+    assert catalog.get("Tylenol")["name"] == "Acetaminophen"
+    assert catalog.get("amoxicilin 500mg")["name"] == "Amoxicillin"
+    assert catalog.get("unknown") is None
+    assert "warfarin" in catalog.get("aspirin")["interaction_names"]
+    assert catalog.get("lisinopril")["interaction_names"][0] == "potassium"
+
+
+def test_precaution_search_and_autocomplete():
+    """Test exact, brand, prefix and substring search and autocomplete"""
+    catalog = PrecautionCatalog(normalizer=DrugNameNormalizer())
+    assert [e["id"] for e in catalog.search("Tylenol")] == ["acetaminophen"]
+    assert [e["id"] for e in catalog.search("ibu")] == ["ibuprofen"]
+    assert [e["id"] for e in catalog.search("CILLIN")] == ["amoxicillin"]
+    assert [e["id"] for e in catalog.search("a", limit=2)] == ["acetaminophen", "aspirin"]
+    assert catalog.search("xyz") == []
+    assert catalog.search("  ") == []
+    
+    suggestions = catalog.autocomplete("amox")
+    assert [s["match"] for s in suggestions] == ["amoxicillin", "amoxil"]
+    assert {s["name"] for s in suggestions} == {"Amoxicillin"}
+    
+    batch = catalog.for_medications(["Advil 200mg", "Unknown"])
+    assert batch["Advil 200mg"]["id"] == "ibuprofen"
+    assert batch["Unknown"] is None
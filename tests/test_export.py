@@ -0,0 +1,104 @@
+"""Unit tests for the bulk summary export"""
+import csv
+import pytest
+from backend.tools.persistence import MemoryBank
+from backend.tools.export import export_summaries, COLUMNS
+from backend.agents.analytics_agent import AnalyticsAgent
+
+
+def _populate(data_file, count):
+    memory = MemoryBank(data_file, mode="journal")
+    for i in range(count):
+        patient_id = f"p{i}"
+        memory.add_patient({"patient_id": patient_id, "name": f"Patient {i}", "medications": []})
+        memory.add_event({"type": "dose", "patient_id": patient_id, "scheduled": True, "taken": i % 2 == 0})
+    memory.add_event({"type": "interaction", "patient_id": "p0", "interaction": "Aspirin + Warfarin"})
+    memory.add_event({"type": "symptom", "patient_id": "p0", "symptom": "Dizziness", "triage_level": "low"})
+    memory.close()
+    return [f"p{i}" for i in range(count)]
+
+
+def test_csv_export_in_worker_processes(tmp_path):
+    """Test chunks are written to separate part files by a process pool"""
+    data_file = str(tmp_path / "memory.jsonl")
+    patient_ids = _populate(data_file, 5)
+    
+    manifest = export_summaries(
+        patient_ids + ["missing"], str(tmp_path / "out"), workers=2, chunk_size=2,
+        storage="journal", data_file=data_file
+    )
+    assert manifest["rows"] == 5
+    assert len(manifest["files"]) == 3
+    
+    rows = []
+    for path in manifest["files"]:
+        with open(path, newline='') as f:
+            reader = csv.DictReader(f)
+            assert reader.fieldnames == COLUMNS
+            rows.extend(reader)
+    assert [row["patient_id"] for row in rows] == patient_ids
+    assert rows[0]["adherence_rate"] == "100.0"
+    assert rows[1]["adherence_rate"] == "0.0"
+    assert rows[0]["interactions"] == "Aspirin + Warfarin"
+    assert rows[0]["recent_symptoms"] == "Dizziness"
+
+
+def test_export_from_analytics_aggregates(tmp_path, monkeypatch):
+    """Test an export from a live AnalyticsAgent reads no events and a JSON save is atomic"""
+    data_file = tmp_path / "memory.json"
+    memory = MemoryBank(str(data_file), mode="json")
+    analytics = AnalyticsAgent(memory)
+    for i in range(4):
+        memory.add_patient({"patient_id": f"p{i}", "name": f"Patient {i}", "medications": []})
+        memory.add_event({"type": "dose", "patient_id": f"p{i}", "scheduled": True, "taken": i < 3})
+    assert not (tmp_path / "memory.json.tmp").exists()
+    
+    def no_event_reads(*args, **kwargs):
+        raise AssertionError("events must not be re-read")
+    
+    monkeypatch.setattr(memory, "get_patient_events", no_event_reads)
+    manifest = export_summaries(["p0", "p1", "p2", "p3", "missing"], str(tmp_path / "out"),
+                                chunk_size=2, analytics=analytics)
+    assert manifest["rows"] == 4 and manifest["workers"] == 0
+    with open(manifest["files"][1], newline='') as f:
+        assert [row["adherence_rate"] for row in csv.DictReader(f)] == ["100.0", "0.0"]
+    memory.close()
+
+
+def test_workers_read_their_own_chunks(tmp_path, monkeypatch):
+    """Test the exporting process hands out patient IDs and never reads events itself"""
+    data_file = str(tmp_path / "memory.jsonl")
+    patient_ids = _populate(data_file, 4)
+    
+    def no_parent_reads(*args, **kwargs):
+        raise AssertionError("the exporting process must not read patient data")
+    
+    # Spawned workers import MemoryBank afresh and are unaffected
+    monkeypatch.setattr(MemoryBank, "get_patient_events", no_parent_reads)
+    monkeypatch.setattr(MemoryBank, "get_patient", no_parent_reads)
+    manifest = export_summaries(patient_ids, str(tmp_path / "out"), workers=2, chunk_size=2,
+                                storage="journal", data_file=data_file)
+    assert manifest["rows"] == 4
+    with open(manifest["files"][0], newline='') as f:
+        assert next(csv.DictReader(f))["interactions"] == "Aspirin + Warfarin"
+
+
+def test_parquet_export(tmp_path):
+    """Test Parquet output when pyarrow is installed"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    data_file = str(tmp_path / "memory.jsonl")
+    patient_ids = _populate(data_file, 3)
+    
+    manifest = export_summaries(patient_ids, str(tmp_path / "out"), fmt="parquet", workers=1,
+                                storage="journal", data_file=data_file)
+    table = pq.read_table(manifest["files"][0])
+    assert table.column("patient_id").to_pylist() == patient_ids
+
+
+def test_read_only_memory_bank_rejects_writes(tmp_path):
+    """Test a read-only MemoryBank leaves a missing journal uncreated"""
+    memory = MemoryBank(str(tmp_path / "memory.jsonl"), mode="journal", read_only=True)
+    assert memory.get_all_patients() == []
+    assert not (tmp_path / "memory.jsonl").exists()
+    with pytest.raises(ValueError):
+        memory.add_patient({"patient_id": "p1", "name": "Test", "medications": []})
@@ -1,7 +1,9 @@
 """Integration test for full flow"""
 import pytest
 from backend.tools.persistence import MemoryBank
+from backend.tools.outbox import NotificationOutbox
 from backend.agents.orchestrator import OrchestratorAgent
+from backend.agents.notifier_agent import NotifierAgent
 import tempfile
 import os
 
@@ -20,9 +22,17 @@ def temp_memory():
         os.remove(temp_file)
 
 
-def test_full_patient_flow(temp_memory):
+@pytest.fixture
+def notifier(tmp_path):
+    """Notifier writing to a temporary outbox"""
+    notifier = NotifierAgent(outbox=NotificationOutbox(str(tmp_path / "outbox")))
+    yield notifier
+    notifier.close()
+
+
+def test_full_patient_flow(temp_memory, notifier):
     """Test complete patient flow from creation to summary"""
-    orchestrator = OrchestratorAgent(temp_memory)
+    orchestrator = OrchestratorAgent(temp_memory, notifier=notifier)
     
     # Create patient
     patient = {
@@ -51,6 +61,7 @@ def test_full_patient_flow(temp_memory):
     result = orchestrator.orchestrate("test_001", "check_interactions")
     assert result["status"] == "success"
     assert len(result["interactions"]) > 0  # Should detect aspirin-warfarin interaction
+    result_interactions = result["interactions"]
     
     # Schedule reminders
     result = orchestrator.orchestrate("test_001", "schedule_reminders")
@@ -70,11 +81,16 @@ def test_full_patient_flow(temp_memory):
     assert summary["patient_id"] == "test_001"
     assert "adherence_rate" in summary
     assert len(summary["interactions_detected"]) > 0
+    
+    # Population re-screen
+    report = orchestrator.rescreen_population()
+    assert report["patients_screened"] == 1
+    assert report["interactions"]["test_001"] == result_interactions
 
 
-def test_high_severity_symptom(temp_memory):
+def test_high_severity_symptom(temp_memory, notifier):
     """Test high severity symptom triggers notification"""
-    orchestrator = OrchestratorAgent(temp_memory)
+    orchestrator = OrchestratorAgent(temp_memory, notifier=notifier)
     
     patient = {
         "patient_id": "test_002",
@@ -93,3 +109,26 @@ def test_high_severity_symptom(temp_memory):
     
     assert result["status"] == "success"
     assert result["triage"]["level"] in ["high", "critical"]
+    
+    recent = orchestrator.notifier_agent.get_recent_notifications("test_002")
+    assert recent[0]["severity"] == result["triage"]["level"]
+
+
+def test_relabelled_drug_does_not_record_interaction_again(temp_memory, notifier):
+    """Test interactions are recorded once per canonical drug pair, whatever the labels"""
+    orchestrator = OrchestratorAgent(temp_memory, notifier=notifier)
+    patient = {
+        "patient_id": "test_003",
+        "name": "Test Patient 3",
+        "medications": [{"name": "Aspirin"}, {"name": "Warfarin"}, {"name": "Ibuprofen"}]
+    }
+    temp_memory.add_patient(patient)
+    orchestrator.orchestrate("test_003", "check_interactions")
+    assert len(temp_memory.get_patient_events("test_003", "interaction")) == 2
+    
+    patient["medications"][0] = {"name": "Bayer 81mg"}
+    patient["medications"][1] = {"name": "Coumadin 5mg"}
+    temp_memory.add_patient(patient)
+    result = orchestrator.orchestrate("test_003", "check_interactions")
+    assert len(result["interactions"]) == 2
+    assert len(temp_memory.get_patient_events("test_003", "interaction")) == 2
@@ -1,6 +1,7 @@
 """Unit tests for interaction checking"""
+import time
 import pytest
-from backend.tools.med_db import MedicationDB
+from backend.tools.med_db import MedicationDB, SharedMedicationDB
 from backend.agents.interaction_agent import InteractionAgent
 
 
@@ -61,3 +62,172 @@ def test_interaction_agent_case_insensitive():
     interactions_mixed = agent.check_interactions(meds_mixed)
     
     assert len(interactions_lower) == len(interactions_upper) == len(interactions_mixed)
+
+
+def test_find_interactions_matches_pairwise_scan():
+    """Test the adjacency index reports the same pairs, in order, as checking every pair"""
+    db = MedicationDB()
+    db.add_interaction("Clopidogrel", "omeprazole", "Reduced antiplatelet effect")
+    meds = ["Omeprazole", "aspirin", "metformin", " Warfarin ", "ibuprofen", "clopidogrel", "aspirin"]
+    
+    expected = []
+    for i in range(len(meds)):
+        for j in range(i + 1, len(meds)):
+            warning = db.check_interaction(meds[i], meds[j])
+            if warning:
+                expected.append((i, j, warning))
+    
+    assert db.find_interactions(meds) == expected
+    assert (0, 5, "Reduced antiplatelet effect") in expected
+    assert db.check_interaction("omeprazole", "CLOPIDOGREL") == "Reduced antiplatelet effect"
+    assert db.drug_id("unknown-drug") is None
+
+
+def test_rules_added_by_brand_name_match_generics():
+    """Test runtime rules are stored under canonical names in both databases"""
+    for db in (MedicationDB(), SharedMedicationDB()):
+        db.add_interaction("Coumadin", "Amoxil", "Increased INR")
+        agent = InteractionAgent(med_db=db)
+        assert agent.check_interactions(["warfarin", "amoxicillin"]) == ["warfarin + amoxicillin: Increased INR"]
+    
+    db = SharedMedicationDB()
+    db.add_interaction("Warfarin Sodium 5mg", "amoxicillin", "Increased INR")
+    assert InteractionAgent(med_db=db).check_interactions(["Jantoven", "Amoxil"]) == [
+        "Jantoven + Amoxil: Increased INR"
+    ]
+
+
+def test_batch_checks_share_regimen_cache():
+    """Test identical regimens are checked once and rule changes invalidate the cache"""
+    agent = InteractionAgent(med_db=MedicationDB())
+    results = agent.check_batch({
+        "p1": ["Aspirin", "warfarin", "metformin"],
+        "p2": ["metformin", "Coumadin", "aspirin"],
+        "p3": ["simvastatin"],
+    })
+    assert results["p1"] == ["Aspirin + warfarin: Increased bleeding risk"]
+    assert results["p2"] == ["Coumadin + aspirin: Increased bleeding risk"]
+    assert results["p3"] == []
+    stats = agent.cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    
+    agent.med_db.add_interaction("metformin", "simvastatin", "Test rule")
+    assert agent.check_interactions(["simvastatin", "Metformin 500mg"]) == [
+        "simvastatin + Metformin 500mg: Test rule"
+    ]
+    assert agent.check_batch({"p1": ["aspirin", "warfarin", "metformin"]})["p1"] == [
+        "aspirin + warfarin: Increased bleeding risk"
+    ]
+    assert agent.cache_stats()["rules_version"] == 1
+
+
+def test_incremental_update_reports_only_new_interactions():
+    """Test added drugs are checked against the list and removed drugs drop their pairs"""
+    agent = InteractionAgent(med_db=MedicationDB())
+    assert agent.check_patient("p1", ["aspirin", "warfarin"]) == ["aspirin + warfarin: Increased bleeding risk"]
+    
+    meds = ["aspirin", "warfarin", "Advil", "metformin"]
+    new = agent.update_patient("p1", meds, {"added": ["Advil", "metformin"], "removed": []})
+    assert new == ["aspirin + Advil: Increased GI bleeding risk"]
+    
+    # Removing aspirin drops both of its pairs; re-adding it reports them again
+    meds = ["warfarin", "Advil", "metformin"]
+    assert agent.update_patient("p1", meds, {"added": [], "removed": ["aspirin"]}) == []
+    meds = ["warfarin", "Advil", "metformin", "Aspirin 81mg"]
+    new = agent.update_patient("p1", meds, {"added": ["Aspirin 81mg"], "removed": []})
+    assert new == [
+        "warfarin + Aspirin 81mg: Increased bleeding risk",
+        "Advil + Aspirin 81mg: Increased GI bleeding risk",
+    ]
+    
+    # Unknown patient: the full list is checked, only added drugs are new
+    new = agent.update_patient("p2", ["aspirin", "warfarin", "ibuprofen"], {"added": ["ibuprofen"], "removed": []})
+    assert new == ["aspirin + ibuprofen: Increased GI bleeding risk"]
+
+
+def test_relabelled_drugs_are_not_new():
+    """Test renaming a drug already taken does not report its interactions again"""
+    agent = InteractionAgent(med_db=MedicationDB())
+    agent.check_patient("p1", ["Aspirin", "warfarin"])
+    meds = ["Aspirin 81mg", "warfarin"]
+    assert agent.update_patient("p1", meds, {"added": ["Aspirin 81mg"], "removed": ["Aspirin"]}) == []
+    meds = ["Bayer", "Coumadin"]
+    diff = {"added": ["Bayer", "Coumadin"], "removed": ["Aspirin 81mg", "warfarin"]}
+    assert agent.update_patient("p1", meds, diff) == []
+    
+    # Without a kept result (restart, other worker) the old list comes from the diff
+    fresh_agent = InteractionAgent(med_db=MedicationDB())
+    assert fresh_agent.update_patient("p1", meds, diff) == []
+    assert fresh_agent.update_patient("p1", meds + ["Advil"], {"added": ["Advil"], "removed": []}) == [
+        "Bayer + Advil: Increased GI bleeding risk"
+    ]
+
+
+def test_shared_db_reload_swaps_index(tmp_path):
+    """Test a reload publishes a new index without changing the one in use"""
+    rules = tmp_path / "rules.csv"
+    rules.write_text("drug_a,drug_b,warning\nsertraline,tramadol,Serotonin syndrome risk\n")
+    db = SharedMedicationDB(str(rules))
+    agent = InteractionAgent(med_db=db)
+    old_index = db.index
+    assert agent.check_interactions(["Sertraline", "tramadol"]) == ["Sertraline + tramadol: Serotonin syndrome risk"]
+    assert db.check_interaction("aspirin", "warfarin") is None
+    
+    rules.write_text("drug_a,drug_b,warning\nCoumadin,aspirin,Bleeding risk\n")
+    metrics = db.reload()
+    assert metrics["version"] == 1
+    assert metrics["reloads"] == 1
+    assert metrics["last_swap_us"] is not None
+    assert agent.check_interactions(["warfarin", "aspirin"]) == ["warfarin + aspirin: Bleeding risk"]
+    assert agent.check_interactions(["sertraline", "tramadol"]) == []
+    # A check holding the previous index still sees the previous rules
+    assert old_index.check_interaction("sertraline", "tramadol") == "Serotonin syndrome risk"
+    
+    index = db.index
+    db.add_interaction("metformin", "alcohol", "Lactic acidosis risk")
+    assert db.version == 2
+    assert db.check_interaction("alcohol", "metformin") == "Lactic acidosis risk"
+    assert index.check_interaction("alcohol", "metformin") is None
+    
+    with pytest.raises(Exception):
+        db.reload(str(tmp_path / "missing.csv"))
+    assert db.get_metrics()["reload_failures"] == 1
+    assert db.check_interaction("aspirin", "warfarin") == "Bleeding risk"
+
+
+def test_shared_db_rejects_truncated_rules(tmp_path):
+    """Test a rule file that lost most of its rules is not published unless forced"""
+    rules = tmp_path / "rules.csv"
+    rules.write_text("drug_a,drug_b,warning\nsertraline,tramadol,Serotonin\n"
+                     "warfarin,aspirin,Bleeding\nmetformin,alcohol,Lactic acidosis\n")
+    db = SharedMedicationDB(str(rules))
+    
+    rules.write_text("drug_a,drug_b,warning\n")
+    with pytest.raises(ValueError):
+        db.reload()
+    rules.write_text("drug_a,drug_b,warning\nsertraline,tramadol,Serotonin\n")
+    with pytest.raises(ValueError):
+        db.reload()
+    assert db.version == 0
+    assert db.check_interaction("aspirin", "warfarin") == "Bleeding"
+    
+    db.reload(force=True)
+    assert db.check_interaction("aspirin", "warfarin") is None
+    assert db.get_metrics()["reload_failures"] == 2
+
+
+def test_shared_db_watcher_waits_for_complete_file(tmp_path):
+    """Test the watcher reloads a changed file once it stops changing"""
+    rules = tmp_path / "rules.csv"
+    rules.write_text("drug_a,drug_b,warning\nsertraline,tramadol,Serotonin\n")
+    db = SharedMedicationDB(str(rules))
+    db.start_watching(interval_s=0.02, settle_s=0.05)
+    try:
+        rules.write_text("drug_a,drug_b,warning\nsertraline,tramadol,Serotonin\nwarfarin,aspirin,Bleeding\n")
+        deadline = time.monotonic() + 5
+        while db.version == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert db.check_interaction("aspirin", "warfarin") == "Bleeding"
+    finally:
+        db.stop_watching()
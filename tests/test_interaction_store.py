@@ -0,0 +1,57 @@
+"""Unit tests for the memory-mapped interaction store"""
+import json
+import pytest
+from backend.tools.med_db import MedicationDB, create_medication_db
+from backend.tools.interaction_store import (
+    MappedInteractionDB, read_interaction_rows, write_interaction_store
+)
+
+
+def test_csv_store_matches_medication_db(tmp_path):
+    """Test a store built from CSV answers like MedicationDB with the same rules"""
+    db = MedicationDB()
+    source = tmp_path / "interactions.csv"
+    lines = ["drug_a,drug_b,warning"]
+    lines += [f"{a},{b},{w}" for (a, b), w in db.interactions.items()]
+    lines.append("Clopidogrel,Omeprazole,Reduced antiplatelet effect")
+    source.write_text("\n".join(lines) + "\n")
+    db.add_interaction("clopidogrel", "omeprazole", "Reduced antiplatelet effect")
+    
+    stats = write_interaction_store(read_interaction_rows(str(source)), str(tmp_path / "interactions.bin"))
+    assert stats["interactions"] == 7
+    
+    store = MappedInteractionDB(str(tmp_path / "interactions.bin"))
+    assert store.check_interaction("Warfarin", "ASPIRIN") == "Increased bleeding risk"
+    assert store.check_interaction("aspirin", "metformin") is None
+    assert store.check_interaction("unknown", "aspirin") is None
+    assert store.drug_name(store.drug_id("omeprazole")) == "omeprazole"
+    
+    meds = ["omeprazole", "aspirin", "metformin", "warfarin", "ibuprofen", "clopidogrel", "Aspirin"]
+    assert store.find_interactions(meds) == db.find_interactions(meds)
+    with pytest.raises(ValueError):
+        store.add_interaction("a", "b", "c")
+    store.close()
+
+
+def test_json_store_and_factory(tmp_path, monkeypatch):
+    """Test JSON input and selecting the store with MEDIBUDDY_INTERACTIONS_FILE"""
+    source = tmp_path / "interactions.json"
+    source.write_text(json.dumps([
+        ["Sertraline", "Tramadol", "Serotonin syndrome risk"],
+        {"drug_a": "sertraline", "drug_b": "linezolid", "warning": "Serotonin syndrome risk"},
+    ]))
+    store_file = tmp_path / "interactions.bin"
+    write_interaction_store(read_interaction_rows(str(source)), str(store_file))
+    
+    monkeypatch.setenv("MEDIBUDDY_INTERACTIONS_FILE", str(store_file))
+    store = create_medication_db()
+    assert isinstance(store, MappedInteractionDB)
+    assert store.neighbors(store.drug_id("sertraline")) == {
+        store.drug_id("linezolid"): "Serotonin syndrome risk",
+        store.drug_id("tramadol"): "Serotonin syndrome risk",
+    }
+    store.close()
+    
+    (tmp_path / "bad.bin").write_bytes(b"not a store" * 4)
+    with pytest.raises(ValueError):
+        MappedInteractionDB(str(tmp_path / "bad.bin"))
@@ -0,0 +1,52 @@
+"""Unit tests for the notification outbox"""
+import json
+from backend.tools.outbox import NotificationOutbox
+
+
+def _notification(patient_id, i):
+    return {"patient_id": patient_id, "message": f"Alert {i}", "severity": "high", "status": "sent"}
+
+
+def test_outbox_appends_and_queries_recent(tmp_path):
+    """Test notifications are appended and recent() returns newest first"""
+    outbox = NotificationOutbox(str(tmp_path / "outbox"), recent_per_patient=3)
+    for i in range(5):
+        outbox.append(_notification("p1", i))
+    outbox.append(_notification("p2", 0))
+    
+    assert [n["message"] for n in outbox.recent("p1")] == ["Alert 4", "Alert 3", "Alert 2"]
+    assert [n["message"] for n in outbox.recent("p1", limit=1)] == ["Alert 4"]
+    assert outbox.recent("unknown") == []
+    outbox.close()
+    
+    lines = (tmp_path / "outbox" / "outbox-000001.jsonl").read_text().splitlines()
+    assert len(lines) == 6
+    
+    reopened = NotificationOutbox(str(tmp_path / "outbox"))
+    assert reopened.recent("p2")[0]["message"] == "Alert 0"
+    assert len(reopened.recent("p1")) == 5
+    reopened.close()
+
+
+def test_outbox_rotates_segments(tmp_path):
+    """Test a new segment is started when the current one is full"""
+    outbox = NotificationOutbox(str(tmp_path / "outbox"), segment_bytes=200, max_segments=3)
+    for i in range(40):
+        outbox.append(_notification("p1", i))
+        outbox.flush()
+    outbox.close()
+    
+    segments = sorted((tmp_path / "outbox").glob("outbox-*.jsonl"))
+    assert len(segments) == 3
+    last = [json.loads(line) for line in segments[-1].read_text().splitlines()]
+    assert last[-1]["message"] == "Alert 39"
+
+
+def test_outbox_imports_legacy_file(tmp_path):
+    """Test notifications.json written by older versions is carried over"""
+    legacy = tmp_path / "notifications.json"
+    legacy.write_text(json.dumps([_notification("p1", 0), _notification("p1", 1)]))
+    
+    outbox = NotificationOutbox(str(tmp_path / "outbox"), legacy_file=str(legacy))
+    assert [n["message"] for n in outbox.recent("p1")] == ["Alert 1", "Alert 0"]
+    outbox.close()
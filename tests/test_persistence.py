@@ -0,0 +1,538 @@
+"""Unit tests for MemoryBank persistence"""
+import json
+import multiprocessing
+import sqlite3
+import threading
+import pytest
+from backend.tools.persistence import MemoryBank, ShardedMemoryBank, create_memory_bank
+from backend.tools.sqlite_store import SQLiteMemoryBank, migrate_json
+from backend.tools.group_commit import GroupCommitWriter
+from backend.tools.event_store import EventStore
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    """Path for a journal-mode memory bank"""
+    return str(tmp_path / "memory.jsonl")
+
+
+def test_journal_appends_one_record_per_write(journal_path):
+    """Test journal mode appends records instead of rewriting the file"""
+    memory = MemoryBank(journal_path, mode="journal")
+    memory.add_patient({"patient_id": "p1", "name": "Patient One", "medications": []})
+    memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Headache"})
+    memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Nausea"})
+    memory.close()
+    
+    with open(journal_path) as f:
+        records = [json.loads(line) for line in f]
+    
+    assert [r["op"] for r in records] == ["patient", "event", "event"]
+    assert records[2]["event"]["symptom"] == "Nausea"
+
+
+def test_journal_replay_restores_state(journal_path):
+    """Test state is rebuilt by replaying the journal"""
+    memory = MemoryBank(journal_path, mode="journal")
+    memory.add_patient({"patient_id": "p1", "name": "Old Name", "medications": []})
+    memory.add_patient({"patient_id": "p1", "name": "New Name", "medications": []})
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": True})
+    memory.close()
+    
+    reloaded = MemoryBank(journal_path, mode="journal")
+    assert reloaded.get_patient("p1")["name"] == "New Name"
+    assert len(reloaded.get_all_patients()) == 1
+    assert len(reloaded.get_patient_events("p1")) == 1
+
+
+def test_journal_skips_torn_final_record(journal_path):
+    """Test a partially written last line does not prevent loading"""
+    memory = MemoryBank(journal_path, mode="journal")
+    memory.add_patient({"patient_id": "p1", "name": "Patient One", "medications": []})
+    memory.close()
+    
+    with open(journal_path, "a") as f:
+        f.write('{"op":"event","event":{"type":"sym')
+    
+    reloaded = MemoryBank(journal_path, mode="journal")
+    assert reloaded.get_patient("p1") is not None
+    assert reloaded.get_all_events() == []
+
+
+def test_journal_imports_existing_document(tmp_path):
+    """Test switching to journal mode carries over the JSON document"""
+    document = tmp_path / "memory.json"
+    legacy = MemoryBank(str(document))
+    legacy.add_patient({"patient_id": "p1", "name": "Patient One", "medications": []})
+    legacy.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Headache"})
+    
+    memory = MemoryBank(str(document), mode="journal")
+    assert memory.journal_file == tmp_path / "memory.jsonl"
+    assert memory.get_patient("p1")["name"] == "Patient One"
+    assert len(memory.get_all_events()) == 1
+
+
+def test_journal_appends_after_torn_record(journal_path):
+    """Test new records are not glued onto a torn final line"""
+    memory = MemoryBank(journal_path, mode="journal")
+    memory.close()
+    with open(journal_path, "a") as f:
+        f.write('{"op":"patient","pati')
+    
+    memory = MemoryBank(journal_path, mode="journal")
+    memory.add_patient({"patient_id": "p1", "name": "Patient One", "medications": []})
+    memory.close()
+    
+    reloaded = MemoryBank(journal_path, mode="journal")
+    assert reloaded.get_patient("p1")["name"] == "Patient One"
+
+
+def test_patient_event_index(journal_path):
+    """Test per-patient and per-type event lookups, before and after reload"""
+    memory = MemoryBank(journal_path, mode="journal")
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": True})
+    memory.add_event({"type": "symptom", "patient_id": "p2", "symptom": "Cough"})
+    memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Headache"})
+    memory.close()
+    
+    for bank in (memory, MemoryBank(journal_path, mode="journal")):
+        assert len(bank.get_patient_events("p1")) == 2
+        assert [e["symptom"] for e in bank.get_patient_events("p1", "symptom")] == ["Headache"]
+        assert bank.get_patient_events("p2", "dose") == []
+        assert bank.get_patient_events("unknown") == []
+
+
+def test_patient_events_before_indexing(journal_path):
+    """Test a patient interned by an event not yet indexed (a racing add_event) reads as empty"""
+    memory = MemoryBank(journal_path, mode="journal")
+    memory.data["events"].append({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": True})
+    assert memory.get_patient_events("p1", "dose") == []
+    assert memory.get_patient_events("p1") == []
+    memory.close()
+
+
+def test_sqlite_memory_bank_surface(tmp_path):
+    """Test SQLiteMemoryBank keeps the MemoryBank method surface"""
+    memory = create_memory_bank("sqlite", str(tmp_path / "memory.db"))
+    assert isinstance(memory, SQLiteMemoryBank)
+    
+    memory.add_patient({"patient_id": "p1", "name": "Old Name", "medications": []})
+    memory.add_patient({"patient_id": "p1", "name": "New Name", "medications": []})
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": False})
+    memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Headache"})
+    memory.add_event({"type": "symptom", "patient_id": "p2", "symptom": "Cough"})
+    
+    assert memory.get_patient("p1")["name"] == "New Name"
+    assert memory.get_patient("missing") is None
+    assert len(memory.get_all_patients()) == 1
+    assert [e["type"] for e in memory.get_patient_events("p1")] == ["dose", "symptom"]
+    assert len(memory.get_patient_events("p1", "symptom")) == 1
+    assert len(memory.get_all_events()) == 3
+    assert "timestamp" in memory.get_all_events()[0]
+
+
+def test_sqlite_listeners_see_other_connections(tmp_path):
+    """Test listeners receive events committed by another connection, once each"""
+    db_file = str(tmp_path / "memory.db")
+    reader, writer = SQLiteMemoryBank(db_file), SQLiteMemoryBank(db_file)
+    writer.add_event({"type": "dose", "patient_id": "p1", "taken": True})
+    seen = []
+    reader.add_listener(lambda event: seen.append(event["type"]))
+    assert seen == ["dose"]
+    
+    writer.add_event({"type": "symptom", "patient_id": "p1", "severity": "high"})
+    reader.add_event({"type": "dose", "patient_id": "p2", "taken": False})
+    assert seen == ["dose", "symptom", "dose"]
+    writer.add_events([{"type": "dose", "patient_id": "p1", "taken": True}] * 2)
+    version = reader.data_version("p1")
+    assert seen == ["dose", "symptom", "dose", "dose", "dose"]
+    assert reader.refresh() == 0
+    assert reader.data_version("p1") == version
+    reader.close()
+    writer.close()
+
+
+def test_migrate_json_to_sqlite(tmp_path):
+    """Test the migration tool imports an existing JSON document"""
+    document = tmp_path / "memory.json"
+    legacy = MemoryBank(str(document))
+    legacy.add_patient({"patient_id": "p1", "name": "Patient One", "medications": []})
+    legacy.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Headache"})
+    
+    source_state = (document.read_bytes(), document.stat().st_mtime_ns)
+    
+    db_file = str(tmp_path / "memory.db")
+    migrate_json(str(document), db_file).close()
+    assert (document.read_bytes(), document.stat().st_mtime_ns) == source_state
+    
+    memory = SQLiteMemoryBank(db_file)
+    assert memory.get_patient("p1")["name"] == "Patient One"
+    assert memory.get_patient_events("p1")[0]["symptom"] == "Headache"
+    
+    migrate_json(str(tmp_path / "missing.jsonl"), str(tmp_path / "empty.db")).close()
+    assert not (tmp_path / "missing.jsonl").exists()
+    
+    with pytest.raises(ValueError):
+        migrate_json(str(document), db_file)
+
+
+def test_group_commit_coalesces_concurrent_writes():
+    """Test concurrent submissions share flushes and are all acknowledged"""
+    batches = []
+    writer = GroupCommitWriter(
+        lambda records, sync: batches.append((list(records), sync)),
+        durability="fsync",
+        batch_window_ms=20
+    )
+    
+    threads = [threading.Thread(target=writer.write, args=(i,)) for i in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.close()
+    
+    written = [r for records, _ in batches for r in records]
+    assert sorted(written) == list(range(50))
+    assert writer.stats["batches"] < 50
+    assert all(sync for records, sync in batches if records)
+
+
+def test_group_commit_rejects_unknown_durability():
+    """Test durability modes are validated"""
+    with pytest.raises(ValueError):
+        GroupCommitWriter(lambda records, sync: None, durability="sometimes")
+
+
+@pytest.mark.parametrize("durability", ["fsync", "interval", "os"])
+def test_memory_bank_group_commit(journal_path, durability):
+    """Test writes acknowledged by the group commit writer survive a reload"""
+    memory = MemoryBank(journal_path, mode="journal", durability=durability)
+    memory.add_patient({"patient_id": "p1", "name": "Patient One", "medications": []})
+    
+    threads = [
+        threading.Thread(
+            target=memory.add_event,
+            args=({"type": "symptom", "patient_id": "p1", "symptom": f"s{i}"},)
+        )
+        for i in range(20)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    memory.close()
+    
+    reloaded = MemoryBank(journal_path, mode="journal")
+    assert len(reloaded.get_patient_events("p1", "symptom")) == 20
+
+
+def test_snapshot_and_tail_replay(journal_path):
+    """Test startup loads the snapshot and replays only later records"""
+    memory = MemoryBank(journal_path, mode="journal")
+    memory.add_patient({"patient_id": "p1", "name": "Patient One", "medications": []})
+    memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Headache"})
+    memory.snapshot()
+    memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Nausea"})
+    memory.close()
+    
+    reloaded = MemoryBank(journal_path, mode="journal")
+    assert reloaded._records_since_snapshot == 1
+    symptoms = [e["symptom"] for e in reloaded.get_patient_events("p1", "symptom")]
+    assert symptoms == ["Headache", "Nausea"]
+
+
+def test_compaction_drops_superseded_patients(journal_path):
+    """Test compaction keeps only the latest version of each patient"""
+    memory = MemoryBank(journal_path, mode="journal")
+    for i in range(5):
+        memory.add_patient({"patient_id": "p1", "name": f"Version {i}", "medications": []})
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": True})
+    memory.compact()
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": False})
+    memory.close()
+    
+    with open(journal_path) as f:
+        ops = [json.loads(line)["op"] for line in f]
+    assert ops == ["patient", "event", "event"]
+    
+    reloaded = MemoryBank(journal_path, mode="journal")
+    assert reloaded.get_patient("p1")["name"] == "Version 4"
+    assert len(reloaded.get_patient_events("p1", "dose")) == 2
+
+
+def test_stale_snapshot_is_ignored(journal_path):
+    """Test a snapshot that does not match the journal falls back to full replay"""
+    memory = MemoryBank(journal_path, mode="journal")
+    memory.add_patient({"patient_id": "p1", "name": "Patient One", "medications": []})
+    memory.snapshot()
+    memory.close()
+    
+    with open(journal_path, "w") as f:
+        f.write(json.dumps({"op": "patient", "patient": {"patient_id": "p2", "name": "Other"}}) + "\n")
+    
+    reloaded = MemoryBank(journal_path, mode="journal")
+    assert reloaded.get_patient("p1") is None
+    assert reloaded.get_patient("p2")["name"] == "Other"
+
+
+def test_event_store_round_trip():
+    """Test EventStore hands back the events it was given"""
+    store = EventStore()
+    events = [
+        {"type": "dose", "patient_id": "p1", "medication": "Aspirin",
+         "scheduled": True, "taken": False, "timestamp": "2024-01-15T09:00:00"},
+        {"type": "symptom", "patient_id": "p2", "symptom": "Headache", "severity": 3,
+         "triage_level": "low", "timestamp": "2024-01-15T09:00:00.250000"},
+        {"type": "custom", "patient_id": "p1", "timestamp": "2024-01-15T09:00:00+02:00"},
+        {"type": "symptom", "patient_id": "p1", "timestamp": None},
+        {"note": "no type or patient"},
+    ]
+    rows = [store.append(event) for event in events]
+    
+    assert [store.get(row) for row in rows] == events
+    assert list(EventStore.from_state(store.to_state()).iter_events()) == events
+    assert store.type_code("custom") is not None
+    assert store.patient_code("p3") is None
+
+
+def test_sharded_memory_bank(tmp_path):
+    """Test patients are partitioned across shards and reads merge them"""
+    data_file = str(tmp_path / "memory.json")
+    memory = ShardedMemoryBank(data_file, shards=4)
+    for i in range(20):
+        memory.add_patient({"patient_id": f"p{i}", "name": f"Patient {i}", "medications": []})
+        memory.add_event({"type": "symptom", "patient_id": f"p{i}", "symptom": "Headache"})
+    memory.close()
+    
+    reloaded = ShardedMemoryBank(data_file, shards=4)
+    assert len(reloaded.get_all_patients()) == 20
+    assert len(reloaded.get_all_events()) == 20
+    assert sum(1 for shard in reloaded.shards if shard.get_all_patients()) > 1
+    
+    shard = reloaded.shard_for("p7")
+    assert shard.get_patient("p7")["name"] == "Patient 7"
+    assert len(reloaded.get_patient_events("p7", "symptom")) == 1
+    assert all(s.get_patient("p7") is None for s in reloaded.shards if s is not shard)
+    
+    with pytest.raises(ValueError):
+        ShardedMemoryBank(data_file, shards=8)
+
+
+@pytest.mark.parametrize("mode", ["json", "journal"])
+def test_sharded_memory_bank_imports_unsharded_store(tmp_path, mode):
+    """Test opening shards next to an existing store carries its data over once"""
+    data_file = str(tmp_path / "memory.json")
+    memory = MemoryBank(data_file, mode=mode)
+    for i in range(5):
+        memory.add_patient({"patient_id": f"p{i}", "name": f"Patient {i}"})
+        memory.add_event({"type": "dose", "patient_id": f"p{i}", "taken": True})
+    memory.close()
+    
+    sharded = ShardedMemoryBank(data_file, shards=3, mode=mode)
+    assert sorted(p["patient_id"] for p in sharded.get_all_patients()) == [f"p{i}" for i in range(5)]
+    assert len(sharded.get_all_events()) == 5
+    sharded.close()
+    reopened = ShardedMemoryBank(data_file, shards=3, mode=mode)
+    assert len(reopened.get_all_patients()) == 5
+    assert len(reopened.get_all_events()) == 5
+    
+    # Patients added while iterating do not break the iteration
+    patients = reopened.iter_all_patients()
+    next(patients)
+    for i in range(5, 50):
+        reopened.add_patient({"patient_id": f"p{i}", "name": f"Patient {i}"})
+    assert len(list(patients)) >= 4
+    reopened.close()
+
+
+def test_shared_journal_sees_other_writers(journal_path):
+    """Test shared-mode banks on one journal see each other's writes"""
+    first = MemoryBank(journal_path, mode="journal", shared=True)
+    second = MemoryBank(journal_path, mode="journal", shared=True, durability="fsync")
+    first.add_patient({"patient_id": "p1", "name": "Patient One", "medications": []})
+    second.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Headache"})
+    first.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Nausea"})
+    
+    for bank in (first, second):
+        assert bank.get_patient("p1")["name"] == "Patient One"
+        symptoms = [e["symptom"] for e in bank.get_patient_events("p1", "symptom")]
+        assert symptoms == ["Headache", "Nausea"]
+    
+    second.compact()
+    first.add_event({"type": "symptom", "patient_id": "p1", "symptom": "Dizziness"})
+    assert len(second.get_patient_events("p1")) == 3
+    first.close()
+    second.close()
+    
+    reloaded = MemoryBank(journal_path, mode="journal")
+    assert len(reloaded.get_all_events()) == 3
+
+
+def _write_symptoms(journal_path, worker, count):
+    """Append symptom events from a separate process"""
+    memory = MemoryBank(journal_path, mode="journal", shared=True)
+    for i in range(count):
+        memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": f"w{worker}-{i}"})
+    memory.close()
+
+
+def test_shared_journal_across_processes(journal_path):
+    """Test concurrent writer processes do not lose or interleave records"""
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_write_symptoms, args=(journal_path, w, 50)) for w in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+    
+    memory = MemoryBank(journal_path, mode="journal")
+    assert len(memory.get_patient_events("p1", "symptom")) == 200
+
+
+def test_shared_requires_journal_mode(tmp_path):
+    """Test multi-process sharing is rejected for whole-document storage"""
+    with pytest.raises(ValueError):
+        MemoryBank(str(tmp_path / "memory.json"), mode="json", shared=True)
+
+
+def _page_through(memory, **filters):
+    """Collect every page of a query_events result"""
+    pages, cursor = [], None
+    while True:
+        page = memory.query_events("p1", limit=2, cursor=cursor, **filters)
+        pages.append([e["symptom"] for e in page["events"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("storage", ["json", "sqlite"])
+def test_query_events_time_range_and_cursor(tmp_path, storage):
+    """Test timestamp-ordered paging with since/until/type filters"""
+    memory = create_memory_bank(storage, str(tmp_path / f"memory.{'db' if storage == 'sqlite' else 'json'}"))
+    for day in (3, 1, 2, 5):
+        memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": f"d{day}",
+                          "timestamp": f"2024-01-0{day}T09:00:00"})
+    memory.add_event({"type": "dose", "patient_id": "p1", "timestamp": "2024-01-04T09:00:00"})
+    memory.query_events("p1")
+    memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": "d4",
+                      "timestamp": "2024-01-04T09:00:00"})
+    
+    assert _page_through(memory, event_type="symptom") == [["d1", "d2"], ["d3", "d4"], ["d5"]]
+    ranged = _page_through(memory, event_type="symptom",
+                           since="2024-01-02T09:00:00", until="2024-01-04T23:00:00")
+    assert ranged == [["d2", "d3"], ["d4"]]
+    assert len(memory.query_events("p1", limit=10)["events"]) == 6
+    assert memory.query_events("p1", event_type="unknown")["events"] == []
+    with pytest.raises(ValueError):
+        memory.query_events("p1", cursor="not-a-cursor")
+
+
+@pytest.mark.parametrize("storage", ["json", "sqlite"])
+def test_query_events_pages_events_without_timestamp(tmp_path, storage):
+    """Test events logged without a timestamp are defaulted and paged through"""
+    memory = create_memory_bank(storage, str(tmp_path / f"memory.{'db' if storage == 'sqlite' else 'json'}"))
+    for i in range(3):
+        memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": f"t{i}",
+                          "timestamp": f"2024-01-0{i + 1}T09:00:00"})
+    for i in range(3):
+        memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": f"n{i}", "timestamp": None})
+    
+    assert all(e["timestamp"] for e in memory.get_all_events())
+    assert _page_through(memory) == [["t0", "t1"], ["t2", "n0"], ["n1", "n2"]]
+    with pytest.raises(ValueError):
+        memory.query_events("p1", since="yesterday")
+    memory.close()
+
+
+def test_sqlite_pages_legacy_null_timestamps(tmp_path):
+    """Test a database from before the sort key column is upgraded and NULL timestamps page first"""
+    db_file = str(tmp_path / "memory.db")
+    conn = sqlite3.connect(db_file)
+    conn.executescript(
+        "CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id TEXT, type TEXT, "
+        "timestamp TEXT, data TEXT NOT NULL);"
+        "CREATE INDEX idx_events_patient_type_ts ON events (patient_id, type, timestamp);"
+    )
+    with conn:
+        for i in range(3):
+            conn.execute(
+                "INSERT INTO events (patient_id, type, timestamp, data) VALUES (?, ?, NULL, ?)",
+                ("p1", "symptom", json.dumps({"type": "symptom", "patient_id": "p1", "symptom": f"n{i}"}))
+            )
+    conn.close()
+    
+    memory = SQLiteMemoryBank(db_file)
+    for i in range(3):
+        memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": f"t{i}",
+                          "timestamp": f"2024-01-0{i + 1}T09:00:00"})
+    
+    assert _page_through(memory) == [["n0", "n1"], ["n2", "t0"], ["t1", "t2"]]
+    memory.close()
+
+
+@pytest.mark.parametrize("storage", ["json", "sqlite"])
+def test_add_patient_returns_medication_diff(tmp_path, storage):
+    """Test add_patient reports the medication names added and removed"""
+    memory = create_memory_bank(storage, str(tmp_path / f"memory.{'db' if storage == 'sqlite' else 'json'}"))
+    
+    def patient(*names):
+        return {"patient_id": "p1", "name": "Test", "medications": [{"name": n} for n in names]}
+    
+    assert memory.add_patient(patient("aspirin", "warfarin")) == {"added": ["aspirin", "warfarin"], "removed": []}
+    assert memory.add_patient(patient("warfarin", "metformin")) == {"added": ["metformin"], "removed": ["aspirin"]}
+    assert memory.add_patient(patient("warfarin", "metformin")) == {"added": [], "removed": []}
+    memory.close()
+
+
+@pytest.mark.parametrize("storage", ["json", "sqlite"])
+def test_data_version_changes_after_listeners_run(tmp_path, storage):
+    """Test listeners see an event before the patient's data version moves past it"""
+    memory = create_memory_bank(storage, str(tmp_path / f"memory.{'db' if storage == 'sqlite' else 'json'}"))
+    before = memory.data_version("p1")
+    versions_seen = []
+    memory.add_listener(lambda event: event and versions_seen.append(memory._versions.get("p1", 0)))
+    
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": True})
+    assert versions_seen == [0]
+    assert memory.data_version("p1") != before
+    memory.close()
+
+
+@pytest.mark.parametrize("storage", ["json", "sqlite"])
+def test_patients_version_changes_on_patient_writes(tmp_path, storage):
+    """Test the patient list version moves on patient writes only"""
+    memory = create_memory_bank(storage, str(tmp_path / f"memory.{'db' if storage == 'sqlite' else 'json'}"))
+    initial = memory.patients_version()
+    memory.add_patient({"patient_id": "p1", "name": "Test", "medications": []})
+    after_patient = memory.patients_version()
+    assert after_patient != initial
+    memory.add_event({"type": "dose", "patient_id": "p1", "scheduled": True, "taken": True})
+    assert memory.patients_version() == after_patient
+    memory.close()
+
+
+def test_query_events_orders_offset_timestamps_alike(tmp_path):
+    """Test both engines filter and page timezone-aware timestamps by the instant they denote"""
+    stamps = {
+        "a": "2024-01-01T10:00:00+02:00",   # 08:00 UTC
+        "b": "2024-01-01T07:30:00",
+        "c": "2024-01-01T03:00:00-05:00",   # 08:00 UTC, after a
+        "d": "2024-01-01T09:00:00.250000",
+        "e": "2024-01-01T08:59:00Z",
+    }
+    results = []
+    for storage in ("json", "sqlite"):
+        memory = create_memory_bank(storage, str(tmp_path / f"memory.{'db' if storage == 'sqlite' else 'json'}"))
+        for name, timestamp in stamps.items():
+            memory.add_event({"type": "symptom", "patient_id": "p1", "symptom": name, "timestamp": timestamp})
+        results.append((
+            _page_through(memory),
+            _page_through(memory, since="2024-01-01T09:00:00+01:00", until="2024-01-01T08:59:00"),
+        ))
+        memory.close()
+    
+    assert results[0] == results[1]
+    assert results[0][0] == [["b", "a"], ["c", "e"], ["d"]]
+    assert results[0][1] == [["a", "c"], ["e"]]
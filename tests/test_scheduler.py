@@ -0,0 +1,128 @@
+"""Unit tests for reminder scheduling and dispatch"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+from backend.tools.scheduler import Scheduler, acquire_dispatch_lock, fcntl, next_fire_time
+from backend.tools.outbox import NotificationOutbox
+from backend.agents.reminder_agent import ReminderAgent
+from backend.agents.notifier_agent import NotifierAgent
+
+
+def test_next_fire_time():
+    """Test daily slots roll over to the next day and invalid slots are rejected"""
+    now = datetime(2024, 1, 1, 12, 0)
+    assert next_fire_time("13:30", now) == datetime(2024, 1, 1, 13, 30)
+    assert next_fire_time("12:00", now) == datetime(2024, 1, 2, 12, 0)
+    assert next_fire_time("08:00", now) == datetime(2024, 1, 2, 8, 0)
+    assert next_fire_time("morning", now) is None
+    assert next_fire_time("25:00", now) is None
+
+
+def test_pop_due_order_and_daily_reschedule():
+    """Test due jobs fire in time order once and move to the next day"""
+    scheduler = Scheduler()
+    now = datetime(2024, 1, 1, 6, 0)
+    evening = scheduler.schedule_job("P1", "Aspirin", "20:00", now=now)
+    morning = scheduler.schedule_job("P1", "Metformin", "08:00", now=now)
+    scheduler.schedule_job("P2", "Warfarin", "bedtime", now=now)
+    assert scheduler.next_fire() == datetime(2024, 1, 1, 8, 0)
+    
+    assert scheduler.pop_due(datetime(2024, 1, 1, 7, 59)) == []
+    due = scheduler.pop_due(datetime(2024, 1, 1, 21, 0))
+    assert [job["job_id"] for job in due] == [morning, evening]
+    assert due[0]["fire_time"] == "2024-01-01T08:00:00"
+    assert scheduler.jobs[morning]["next_fire"] == "2024-01-02T08:00:00"
+    assert scheduler.jobs[morning]["fire_count"] == 1
+    assert scheduler.pop_due(datetime(2024, 1, 1, 23, 0)) == []
+    
+    # Missed days fire once, then resume at the next future slot
+    due = scheduler.pop_due(datetime(2024, 1, 5, 9, 0))
+    assert [job["job_id"] for job in due] == [morning, evening]
+    assert scheduler.jobs[morning]["next_fire"] == "2024-01-06T08:00:00"
+    assert scheduler.jobs[evening]["next_fire"] == "2024-01-05T20:00:00"
+    
+    # Listed jobs are copies; later fires do not change them
+    listed = scheduler.get_patient_jobs("P1")
+    scheduler.pop_due(datetime(2024, 1, 6, 9, 0))
+    assert [job["fire_count"] for job in listed] == [2, 2]
+    assert len(scheduler.get_all_jobs()) == 3
+
+
+def test_cancelled_jobs_are_skipped():
+    """Test cancelled jobs never fire and rescheduling replaces old jobs"""
+    agent = ReminderAgent(memory_bank=None)
+    scheduler = agent.scheduler
+    patient = {"patient_id": "P1", "medications": [{"name": "Aspirin", "time_slots": ["09:00"]}]}
+    first = agent.schedule_reminders(patient)
+    second = agent.schedule_reminders(patient)
+    assert len(first) == len(second) == 1
+    
+    assert [job["job_id"] for job in scheduler.get_patient_jobs("P1")] == [second[0]["job_id"]]
+    cancelled = scheduler.schedule_job("P2", "Warfarin", "09:30")
+    scheduler.cancel_job(cancelled)
+    due = scheduler.pop_due(datetime.now() + timedelta(days=1))
+    assert [job["job_id"] for job in due] == [second[0]["job_id"]]
+
+
+def test_dispatch_due_sends_reminders(tmp_path):
+    """Test due reminders are handed to the notifier outbox"""
+    notifier = NotifierAgent(outbox=NotificationOutbox(str(tmp_path / "outbox")))
+    agent = ReminderAgent(memory_bank=None)
+    now = datetime(2024, 1, 1, 8, 0)
+    agent.scheduler.schedule_job("P1", "Metformin", "08:30", now=now)
+    agent.scheduler.schedule_job("P2", "Aspirin", "09:00", now=now)
+    
+    assert agent.dispatch_due(notifier, now=datetime(2024, 1, 1, 8, 45))[0]["patient_id"] == "P1"
+    sent = notifier.get_recent_notifications("P1")
+    assert len(sent) == 1
+    assert sent[0]["type"] == "reminder"
+    assert sent[0]["medication"] == "Metformin"
+    assert notifier.get_recent_notifications("P2") == []
+    notifier.close()
+
+
+def test_dispatch_loop_fires_due_reminder(tmp_path):
+    """Test the asyncio loop dispatches a reminder as soon as it is due"""
+    notifier = NotifierAgent(outbox=NotificationOutbox(str(tmp_path / "outbox")))
+    agent = ReminderAgent(memory_bank=None)
+    # Scheduled three minutes ago for a slot that passed a minute later
+    slot = (datetime.now() - timedelta(minutes=2)).strftime("%H:%M")
+    agent.scheduler.schedule_job("P1", "Aspirin", slot, now=datetime.now() - timedelta(minutes=3))
+    
+    async def run() -> None:
+        task = asyncio.create_task(agent.run_dispatch_loop(notifier, tick_s=0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+    
+    asyncio.run(run())
+    assert len(notifier.get_recent_notifications("P1")) == 1
+    notifier.close()
+
+
+def test_sync_patients_follows_stored_time_slots():
+    """Test reminders are rebuilt from patients and rescheduled only when slots change"""
+    agent = ReminderAgent(memory_bank=None)
+    patients = [
+        {"patient_id": "P1", "medications": [{"name": "Aspirin", "time_slots": ["09:00"]}]},
+        {"patient_id": "P2", "medications": [{"name": "Metformin", "time_slots": ["08:00", "20:00"]}]},
+    ]
+    assert agent.sync_patients(patients) == 2
+    assert agent.sync_patients(patients) == 0
+    assert len(agent.scheduler.get_all_jobs()) == 3
+    
+    patients[0]["medications"][0]["time_slots"] = ["10:00"]
+    assert agent.sync_patient(patients[0]) is True
+    assert [job["time"] for job in agent.get_scheduled_reminders("P1")] == ["10:00"]
+
+
+def test_dispatch_lock_elects_one_process(tmp_path):
+    """Test only one holder of the dispatch lock at a time"""
+    lock_file = str(tmp_path / "reminders.lock")
+    first = acquire_dispatch_lock(lock_file)
+    assert first is not None
+    if fcntl is not None:
+        assert acquire_dispatch_lock(lock_file) is None
+    os.close(first)
+    second = acquire_dispatch_lock(lock_file)
+    assert second is not None
+    os.close(second)